@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+"""Time the repaint of a Canvas with many shapes.
+
+With the painter paths cached by Shape, against dropping the caches
+before each repaint as when they were rebuilt from the points on every
+paint.
+"""
+
+import argparse
+import math
+import random
+import time
+
+from qtpy import QtCore
+from qtpy import QtGui
+from qtpy import QtWidgets
+
+from labelme.shape import Shape
+from labelme.widgets.canvas import Canvas
+
+
+def make_shapes(num_shapes, size):
+    random.seed(0)
+    shape_types = ["polygon"] * 7 + [
+        "rectangle",
+        "circle",
+        "linestrip",
+        "point",
+        "line",
+    ]
+    shapes = []
+    for _ in range(num_shapes):
+        shape_type = random.choice(shape_types)
+        shape = Shape(label="shape", shape_type=shape_type)
+        x, y = random.uniform(0, size - 50), random.uniform(0, size - 50)
+        if shape_type == "polygon":
+            for i in range(12):
+                angle = 2 * math.pi * i / 12
+                shape.addPoint(
+                    QtCore.QPointF(
+                        x + 25 + 20 * math.cos(angle),
+                        y + 25 + 20 * math.sin(angle),
+                    )
+                )
+        elif shape_type == "linestrip":
+            for i in range(6):
+                shape.addPoint(QtCore.QPointF(x + 8 * i, y + i % 2 * 10))
+        elif shape_type == "point":
+            shape.addPoint(QtCore.QPointF(x, y))
+        else:
+            shape.addPoint(QtCore.QPointF(x, y))
+            shape.addPoint(QtCore.QPointF(x + 30, y + 20))
+        shape.close()
+        shapes.append(shape)
+    return shapes
+
+
+def bench(func, repeat):
+    start = time.time()
+    for _ in range(repeat):
+        func()
+    return (time.time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--shapes", type=int, default=5000)
+    parser.add_argument("--size", type=int, default=2000, help="image size")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication([])  # NOQA
+
+    canvas = Canvas()
+    pixmap = QtGui.QPixmap(args.size, args.size)
+    pixmap.fill(QtGui.QColor(30, 30, 30))
+    canvas.loadPixmap(pixmap)
+    shapes = make_shapes(args.shapes, args.size)
+    canvas.loadShapes(shapes)
+    canvas.scale = 0.5
+    canvas.resize(args.size // 2, args.size // 2)
+    canvas.grab()
+
+    def invalidate():
+        for shape in shapes:
+            shape._invalidate()
+
+    point = QtCore.QPointF(args.size / 2.0, args.size / 2.0)
+
+    def contains_point():
+        for shape in shapes:
+            shape.containsPoint(point)
+
+    for name, func in [
+        ("repaint", canvas.grab),
+        ("containsPoint", contains_point),
+    ]:
+        uncached = bench(lambda: invalidate() or func(), args.repeat)
+        cached = bench(func, args.repeat)
+        print(
+            "{:>13} of {} shapes: {:.1f} ms uncached, {:.1f} ms "
+            "cached".format(name, len(shapes), uncached * 1e3, cached * 1e3)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+"""Time LabelFile.load on a label file with many shapes.
+
+With the JSON parsers LabelFile can use (orjson and ujson if installed,
+else json) and with lazy=True, against the json.load and conversion of
+the shapes done before.
+"""
+
+import argparse
+import json
+import os.path as osp
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import PIL.Image
+
+from labelme import label_file as label_file_module
+from labelme.label_file import LabelFile
+
+
+def load_json_load(filename):
+    # LabelFile.load before it used orjson/ujson and paused the gc
+    with open(filename, "r") as f:
+        data = json.load(f)
+    shape_keys = ["label", "points", "group_id", "shape_type", "flags"]
+    shapes = []
+    for s in data["shapes"]:
+        shapes.append(
+            dict(
+                label=s["label"],
+                points=s["points"],
+                shape_type=s.get("shape_type", "polygon"),
+                flags=s.get("flags", {}),
+                group_id=s.get("group_id"),
+                other_data={
+                    k: v for k, v in s.items() if k not in shape_keys
+                },
+            )
+        )
+    image_file = osp.join(osp.dirname(filename), data["imagePath"])
+    return shapes, LabelFile.load_image_file(image_file)
+
+
+def make_label_file(filename, num_shapes, num_points):
+    random.seed(0)
+    image_file = osp.splitext(filename)[0] + ".jpg"
+    PIL.Image.fromarray(np.zeros((1000, 1000, 3), dtype=np.uint8)).save(
+        image_file
+    )
+    shapes = []
+    for _ in range(num_shapes):
+        shapes.append(
+            dict(
+                label=random.choice(["a", "b", "c"]),
+                points=[
+                    [random.uniform(0, 1000), random.uniform(0, 1000)]
+                    for _ in range(num_points)
+                ],
+                group_id=None,
+                shape_type="polygon",
+                flags={},
+            )
+        )
+    LabelFile().save(
+        filename,
+        shapes=shapes,
+        imagePath=osp.basename(image_file),
+        imageHeight=1000,
+        imageWidth=1000,
+    )
+
+
+def bench(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        times.append(time.time() - start)
+    return np.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--shapes", type=int, default=10000)
+    parser.add_argument("--points", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    parsers = [("json", label_file_module._json_loads_stdlib)]
+    for module in ["ujson", "orjson"]:
+        try:
+            parsers.append((module, __import__(module).loads))
+        except ImportError:
+            print("{} is not installed".format(module))
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        filename = osp.join(tmp_dir, "label.json")
+        make_label_file(filename, args.shapes, args.points)
+        print(
+            "{} shapes of {} points, {:.1f} MB".format(
+                args.shapes, args.points, osp.getsize(filename) / 1e6
+            )
+        )
+
+        elapsed = bench(lambda: load_json_load(filename), args.repeat)
+        print("{:>16}: {:.0f} ms".format("json.load", elapsed * 1e3))
+        json_loads = label_file_module._json_loads
+        try:
+            for name, loads in parsers:
+                label_file_module._json_loads = loads
+                for lazy in [False, True]:
+                    elapsed = bench(
+                        lambda: LabelFile(filename, lazy=lazy), args.repeat
+                    )
+                    print(
+                        "{:>16}: {:.0f} ms".format(
+                            name + (" lazy" if lazy else ""), elapsed * 1e3
+                        )
+                    )
+        finally:
+            label_file_module._json_loads = json_loads
+        elapsed = bench(lambda: LabelFile.load_summary(filename), args.repeat)
+        print("{:>16}: {:.0f} ms".format("load_summary", elapsed * 1e3))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
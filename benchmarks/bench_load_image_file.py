@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+"""Time the image loading of MainWindow.loadFile.
+
+LabelFile.load_image_file + QImage.fromData, against the decode, EXIF
+orientation and re-encode of every image done before.
+"""
+
+import argparse
+import io
+import os.path as osp
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import PIL.Image
+from qtpy import QtGui
+
+from labelme.label_file import LabelFile
+from labelme import utils
+
+
+def load_image_file_reencode(filename):
+    # LabelFile.load_image_file before it returned the file bytes as-is
+    image_pil = PIL.Image.open(filename)
+    image_pil = utils.apply_exif_orientation(image_pil)
+    with io.BytesIO() as f:
+        ext = osp.splitext(filename)[1].lower()
+        format = "JPEG" if ext in [".jpg", ".jpeg"] else "PNG"
+        image_pil.save(f, format=format)
+        f.seek(0)
+        return f.read()
+
+
+def bench(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        times.append(time.time() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--width", type=int, default=6000)
+    parser.add_argument("--height", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        filename = osp.join(tmp_dir, "image.jpg")
+        y, x = np.mgrid[: args.height, : args.width]
+        img = np.dstack([x % 256, y % 256, (x + y) % 256]).astype(np.uint8)
+        PIL.Image.fromarray(img).save(filename, quality=90)
+
+        for name, load in [
+            ("re-encode", load_image_file_reencode),
+            ("load_image_file", LabelFile.load_image_file),
+        ]:
+            elapsed = bench(
+                lambda: QtGui.QImage.fromData(load(filename)), args.repeat
+            )
+            print(
+                "{:>16}: {:.3f} s per {}x{} JPEG".format(
+                    name, elapsed, args.width, args.height
+                )
+            )
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+"""Time utils.shapes_to_label on an image with many shapes.
+
+The shapes drawn in one label image, against drawing each shape in its
+own image-size mask written into the labels before.
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from labelme import utils
+
+
+def shapes_to_label_per_mask(img_shape, shapes, label_name_to_value):
+    # utils.shapes_to_label before it drew the shapes in one image
+    cls = np.zeros(img_shape[:2], dtype=np.int32)
+    ins = np.zeros_like(cls)
+    instances = []
+    for shape in shapes:
+        instance = (shape["label"], shape["group_id"])
+        if instance not in instances:
+            instances.append(instance)
+        ins_id = instances.index(instance) + 1
+        cls_id = label_name_to_value[shape["label"]]
+
+        mask = utils.shape_to_mask(
+            img_shape[:2], shape["points"], shape["shape_type"]
+        )
+        cls[mask] = cls_id
+        ins[mask] = ins_id
+    return cls, ins
+
+
+def make_shapes(num_shapes, height, width):
+    random.seed(0)
+    shape_types = ["polygon"] * 5 + [
+        "rectangle",
+        "circle",
+        "line",
+        "linestrip",
+        "point",
+    ]
+    shapes = []
+    for i in range(num_shapes):
+        shape_type = random.choice(shape_types)
+        x, y = random.uniform(0, width), random.uniform(0, height)
+        num_points = dict(polygon=8, linestrip=4, point=1).get(shape_type, 2)
+        points = [
+            [x + random.uniform(-100, 100), y + random.uniform(-100, 100)]
+            for _ in range(num_points)
+        ]
+        if shape_type == "rectangle":
+            # the corners in order, required by newer Pillow
+            points = np.sort(points, axis=0).tolist()
+        shapes.append(
+            dict(
+                label=random.choice(["a", "b", "c"]),
+                points=points,
+                shape_type=shape_type,
+                group_id=random.randint(0, num_shapes // 2),
+            )
+        )
+    return shapes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--shapes", type=int, default=500)
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    args = parser.parse_args()
+
+    img_shape = (args.height, args.width)
+    shapes = make_shapes(args.shapes, args.height, args.width)
+    label_name_to_value = {"_background_": 0, "a": 1, "b": 2, "c": 3}
+
+    results = []
+    for name, func in [
+        ("per mask", shapes_to_label_per_mask),
+        ("shapes_to_label", utils.shapes_to_label),
+    ]:
+        start = time.time()
+        results.append(func(img_shape, shapes, label_name_to_value))
+        print(
+            "{:>15}: {:.2f} s for {} shapes on {}x{}".format(
+                name,
+                time.time() - start,
+                len(shapes),
+                args.width,
+                args.height,
+            )
+        )
+    for expected, label in zip(results[0], results[1]):
+        np.testing.assert_array_equal(label, expected)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,6 @@
 import logging
 import sys
 
-from qtpy import QT_VERSION
-
 
 __appname__ = "labelme"
 
@@ -14,12 +12,26 @@ __appname__ = "labelme"
 # 3. PATCH version when you make backwards-compatible bug fixes.
 __version__ = "4.5.6"
 
-QT4 = QT_VERSION[0] == "4"
-QT5 = QT_VERSION[0] == "5"
-del QT_VERSION
-
 PY2 = sys.version[0] == "2"
 PY3 = sys.version[0] == "3"
+
+
+def __getattr__(name):
+    # QT4 and QT5 import Qt, which is only done when they are used so that
+    # the data layer (LabelFile, utils) can be used without Qt installed
+    if name in ["QT4", "QT5"]:
+        from qtpy import QT_VERSION
+
+        return QT_VERSION[0] == name[-1]
+    raise AttributeError(
+        "module {!r} has no attribute {!r}".format(__name__, name)
+    )
+
+
+if sys.version_info < (3, 7):
+    # no module __getattr__ (PEP 562)
+    QT4 = __getattr__("QT4")
+    QT5 = __getattr__("QT5")
 del sys
 
 from labelme.label_file import LabelFile
@@ -55,7 +55,22 @@ def main():
         "--nodata",
         dest="store_data",
         action="store_false",
-        help="stop storing image data to JSON file",
+        help="stop storing image data to JSON file (deprecated, it is the "
+        "default unless store_data is set in the config file)",
+        default=argparse.SUPPRESS,
+    )
+    parser.add_argument(
+        "--data",
+        dest="store_data",
+        action="store_true",
+        help="store image data to JSON file",
+        default=argparse.SUPPRESS,
+    )
+    parser.add_argument(
+        "--image-store",
+        dest="image_store",
+        help="directory to save the images without image file by the hash "
+        "of their content, instead of storing their data to JSON file",
         default=argparse.SUPPRESS,
     )
     parser.add_argument(
@@ -19,12 +19,21 @@ from labelme import QT5
 
 from . import utils
 from labelme.config import get_config
+from labelme.dataset_index import DatasetIndex
+from labelme.dataset_index import LabelSummary
+from labelme.dir_scanner import DirScanner
+from labelme.dir_scanner import scan_images
+from labelme.file_search import FileSearch
+from labelme.image_prefetcher import ImagePrefetcher
+from labelme.image_store import ImageStore
 from labelme.label_file import LabelFile
 from labelme.label_file import LabelFileError
+from labelme.label_writer import LabelWriter
 from labelme.logger import logger
 from labelme.shape import Shape
 from labelme.widgets import BrightnessContrastDialog
 from labelme.widgets import Canvas
+from labelme.widgets import FileListWidget
 from labelme.widgets import LabelDialog
 from labelme.widgets import LabelListWidget
 from labelme.widgets import LabelListWidgetItem
@@ -161,8 +170,45 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.fileSearch = QtWidgets.QLineEdit()
         self.fileSearch.setPlaceholderText(self.tr("Search Filename"))
-        self.fileSearch.textChanged.connect(self.fileSearchChanged)
-        self.fileListWidget = QtWidgets.QListWidget()
+        self.fileSearch.setToolTip(
+            self.tr(
+                "Substring, glob or re:REGEX of the path, "
+                "is:labeled, is:unlabeled or label:NAME, "
+                "-TERM to exclude the matching files"
+            )
+        )
+        # filter the file list once the user stops typing
+        self.fileSearchTimer = QtCore.QTimer(self)
+        self.fileSearchTimer.setSingleShot(True)
+        self.fileSearchTimer.setInterval(200)
+        self.fileSearchTimer.timeout.connect(self.fileSearchChanged)
+        self.fileSearch.textChanged.connect(
+            lambda: self.fileSearchTimer.start()
+        )
+        self.fileSearch.returnPressed.connect(self.fileSearchChanged)
+        # auto save once the edits pause, see setDirty
+        self.autoSaveTimer = QtCore.QTimer(self)
+        self.autoSaveTimer.setSingleShot(True)
+        self.autoSaveTimer.setInterval(
+            self._config["auto_save_timing"]["idle_ms"]
+        )
+        self.autoSaveTimer.timeout.connect(self.autoSave)
+        self.autoSaveLatencyTimer = QtCore.QTimer(self)
+        self.autoSaveLatencyTimer.setSingleShot(True)
+        self.autoSaveLatencyTimer.setInterval(
+            self._config["auto_save_timing"]["max_latency_ms"]
+        )
+        self.autoSaveLatencyTimer.timeout.connect(self.autoSave)
+        # label summaries of the opened directory, see openDatasetIndex
+        self.datasetIndex = DatasetIndex()
+        # label files are written in background, see saveLabels
+        self.labelWriter = LabelWriter(self)
+        self.labelWriter.saved.connect(self.labelsSaved)
+        self.labelWriter.failed.connect(self.labelsSaveFailed)
+        self.fileListWidget = FileListWidget(
+            hasLabelFile=self.imageHasLabelFile,
+            labelNames=self.imageLabelNames,
+        )
         self.fileListWidget.itemSelectionChanged.connect(
             self.fileSelectionChanged
         )
@@ -183,6 +229,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.canvas = self.labelList.canvas = Canvas(
             epsilon=self._config["epsilon"],
             double_click=self._config["canvas"]["double_click"],
+            num_backups=self._config["canvas"]["num_backups"],
         )
         self.canvas.zoomRequest.connect(self.zoomRequest)
 
@@ -455,6 +502,14 @@ class MainWindow(QtWidgets.QMainWindow):
             self.tr("Undo last add and edit of shape"),
             enabled=False,
         )
+        redo = action(
+            self.tr("Redo"),
+            self.redoShapeEdit,
+            shortcuts["redo"],
+            None,
+            self.tr("Redo last undone add and edit of shape"),
+            enabled=False,
+        )
 
         hideAll = action(
             self.tr("&Hide\nPolygons"),
@@ -605,6 +660,7 @@ class MainWindow(QtWidgets.QMainWindow):
             copy=copy,
             undoLastPoint=undoLastPoint,
             undo=undo,
+            redo=redo,
             addPointToEdge=addPointToEdge,
             removePoint=removePoint,
             createMode=createMode,
@@ -635,6 +691,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 delete,
                 None,
                 undo,
+                redo,
                 undoLastPoint,
                 None,
                 addPointToEdge,
@@ -656,6 +713,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 copy,
                 delete,
                 undo,
+                redo,
                 undoLastPoint,
                 addPointToEdge,
                 removePoint,
@@ -792,16 +850,23 @@ class MainWindow(QtWidgets.QMainWindow):
             Qt.Horizontal: {},
             Qt.Vertical: {},
         }  # key=filename, value=scroll_value
-
-        if filename is not None and osp.isdir(filename):
-            self.importDirImages(filename, load=False)
-        else:
-            self.filename = filename
+        self.imagePrefetcher = ImagePrefetcher(
+            max_cache_bytes=self._config["prefetch"]["max_cache_mb"] * 2 ** 20,
+            parent=self,
+        )
+        # scanning the last opened directory in the background
+        self.dirScanner = None
 
         if config["file_search"]:
             self.fileSearch.setText(config["file_search"])
             self.fileSearchChanged()
 
+        if filename is not None and osp.isdir(filename):
+            # the first image is loaded once it is found
+            self.importDirImages(filename)
+        else:
+            self.filename = filename
+
         # XXX: Could be completely declarative.
         # Restore application settings.
         self.settings = QtCore.QSettings("labelme", "labelme")
@@ -875,16 +940,45 @@ class MainWindow(QtWidgets.QMainWindow):
         utils.addActions(self.menus.edit, actions + self.actions.editMenu)
 
     def setDirty(self):
+        self.markDirty()
         if self._config["auto_save"] or self.actions.saveAuto.isChecked():
-            label_file = osp.splitext(self.imagePath)[0] + ".json"
-            if self.output_dir:
-                label_file_without_path = osp.basename(label_file)
-                label_file = osp.join(self.output_dir, label_file_without_path)
-            self.saveLabels(label_file)
+            # not saved on every edit, e.g. while dragging a shape, but once
+            # the edits pause, or after max_latency_ms while they go on
+            self.autoSaveTimer.start()
+            if not self.autoSaveLatencyTimer.isActive():
+                self.autoSaveLatencyTimer.start()
+
+    def autoSave(self):
+        self.autoSaveTimer.stop()
+        self.autoSaveLatencyTimer.stop()
+        if not (
+            self._config["auto_save"] or self.actions.saveAuto.isChecked()
+        ):
+            # turned off since the edits
+            return
+        if not self.dirty or self.image.isNull():
             return
+        label_file = osp.splitext(self.imagePath)[0] + ".json"
+        if self.output_dir:
+            label_file_without_path = osp.basename(label_file)
+            label_file = osp.join(self.output_dir, label_file_without_path)
+        if self.saveLabels(label_file):
+            self.setClean()
+
+    def flushAutoSave(self):
+        """Auto save now the edits waiting for autoSave, if any."""
+        if (
+            self.autoSaveTimer.isActive()
+            or self.autoSaveLatencyTimer.isActive()
+        ):
+            self.autoSave()
+
+    def markDirty(self):
+        # as setDirty, without auto saving
         self.dirty = True
         self.actions.save.setEnabled(True)
         self.actions.undo.setEnabled(self.canvas.isShapeRestorable)
+        self.actions.redo.setEnabled(self.canvas.isShapeRedoable)
         title = __appname__
         if self.filename is not None:
             title = "{} - {}*".format(title, self.filename)
@@ -953,10 +1047,20 @@ class MainWindow(QtWidgets.QMainWindow):
     # Callbacks
 
     def undoShapeEdit(self):
-        self.canvas.restoreShape()
-        self.labelList.clear()
-        self.loadShapes(self.canvas.shapes)
+        changes = self.canvas.restoreShape()
+        if changes is not None:
+            self.updateLabels(changes)
+            self.setDirty()
         self.actions.undo.setEnabled(self.canvas.isShapeRestorable)
+        self.actions.redo.setEnabled(self.canvas.isShapeRedoable)
+
+    def redoShapeEdit(self):
+        changes = self.canvas.redoShape()
+        if changes is not None:
+            self.updateLabels(changes)
+            self.setDirty()
+        self.actions.undo.setEnabled(self.canvas.isShapeRestorable)
+        self.actions.redo.setEnabled(self.canvas.isShapeRedoable)
 
     def tutorial(self):
         url = "https://github.com/wkentaro/labelme/tree/master/examples/tutorial"  # NOQA
@@ -970,6 +1074,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self.actions.editMode.setEnabled(not drawing)
         self.actions.undoLastPoint.setEnabled(drawing)
         self.actions.undo.setEnabled(not drawing)
+        self.actions.redo.setEnabled(
+            not drawing and self.canvas.isShapeRedoable
+        )
         self.actions.delete.setEnabled(not drawing)
 
     def toggleDrawMode(self, edit=True, createMode="polygon", basic_shape=None):
@@ -1121,9 +1228,11 @@ class MainWindow(QtWidgets.QMainWindow):
                 ),
             )
             return
+        self.canvas.beginShapesEdit([shape])
         shape.label = text
         shape.flags = flags
         shape.group_id = group_id
+        self.canvas.endShapesEdit()
         if shape.group_id is None:
             item.setText(shape.label)
         else:
@@ -1135,26 +1244,22 @@ class MainWindow(QtWidgets.QMainWindow):
             self.uniqLabelList.addItem(item)
 
     def fileSearchChanged(self):
-        self.importDirImages(
-            self.lastOpenDir,
-            pattern=self.fileSearch.text(),
-            load=False,
-        )
+        self.fileSearchTimer.stop()
+        search = FileSearch(self.fileSearch.text())
+        if search.error is not None:
+            self.status(search.error)
+        self.fileListWidget.setSearch(search)
+        self.datasetIndex.commit()
 
     def fileSelectionChanged(self):
-        items = self.fileListWidget.selectedItems()
-        if not items:
+        filenames = self.fileListWidget.selectedFilenames()
+        if not filenames:
             return
-        item = items[0]
 
         if not self.mayContinue():
             return
 
-        currIndex = self.imageList.index(str(item.text()))
-        if currIndex < len(self.imageList):
-            filename = self.imageList[currIndex]
-            if filename:
-                self.loadFile(filename)
+        self.loadFile(filenames[0])
 
     # React to canvas signals.
     def shapeSelectionChanged(self, selected_shapes):
@@ -1176,21 +1281,28 @@ class MainWindow(QtWidgets.QMainWindow):
         self.actions.rotate.setEnabled(n_selected == 1 and
                                        selected_shapes[0].shape_type=="polygon")
 
-    def addLabel(self, shape):
+    def addLabel(self, shape, row=None):
+        label_list_item = LabelListWidgetItem(None, shape)
+        if row is None:
+            self.labelList.addItem(label_list_item)
+        else:
+            self.labelList.insertItem(row, label_list_item)
+        self.updateLabel(label_list_item)
+        for action in self.actions.onShapesPresent:
+            action.setEnabled(True)
+
+    def updateLabel(self, label_list_item):
+        shape = label_list_item.shape()
         if shape.group_id is None:
             text = shape.label
         else:
             text = "{} ({})".format(shape.label, shape.group_id)
-        label_list_item = LabelListWidgetItem(text, shape)
-        self.labelList.addItem(label_list_item)
         if not self.uniqLabelList.findItemsByLabel(shape.label):
             item = self.uniqLabelList.createItemFromLabel(shape.label)
             self.uniqLabelList.addItem(item)
             rgb = self._get_rgb_by_label(shape.label)
             self.uniqLabelList.setItemLabel(item, shape.label, rgb)
         self.labelDialog.addLabelHistory(shape.label)
-        for action in self.actions.onShapesPresent:
-            action.setEnabled(True)
 
         rgb = self._get_rgb_by_label(shape.label)
 
@@ -1227,6 +1339,30 @@ class MainWindow(QtWidgets.QMainWindow):
             item = self.labelList.findItemByShape(shape)
             self.labelList.removeItem(item)
 
+    def updateLabels(self, changes):
+        """Update the label list after an undo/redo of the canvas."""
+        self._noSelectionSlot = True
+        self.remLabels(changes.removed)
+        added = sorted(changes.added, key=self.canvas.shapes.index)
+        for shape in added:
+            self.addLabel(shape, row=self.canvas.shapes.index(shape))
+            if not self.canvas.isVisible(shape):
+                item = self.labelList.findItemByShape(shape)
+                item.setCheckState(Qt.Unchecked)
+        for shape in changes.modified:
+            self.updateLabel(self.labelList.findItemByShape(shape))
+        if changes.reordered:
+            # keep the label list in the order of the canvas shapes
+            items = {}
+            for item in list(self.labelList):
+                items[item.shape()] = self.labelList.removeItem(item)
+            for shape in self.canvas.shapes:
+                self.labelList.addItem(items[shape])
+        self._noSelectionSlot = False
+        if self.noShapes():
+            for action in self.actions.onShapesPresent:
+                action.setEnabled(False)
+
     def loadShapes(self, shapes, replace=True):
         self._noSelectionSlot = True
         for shape in shapes:
@@ -1244,6 +1380,7 @@ class MainWindow(QtWidgets.QMainWindow):
             flags = shape["flags"]
             group_id = shape["group_id"]
             other_data = shape["other_data"]
+            mask = shape.get("mask")
 
             shape = Shape(
                 label=label,
@@ -1253,6 +1390,7 @@ class MainWindow(QtWidgets.QMainWindow):
             for x, y in points:
                 shape.addPoint(QtCore.QPointF(x, y))
             shape.close()
+            shape.mask = mask
 
             default_flags = {}
             if self._config["label_flags"]:
@@ -1276,6 +1414,11 @@ class MainWindow(QtWidgets.QMainWindow):
             self.flag_widget.addItem(item)
 
     def saveLabels(self, filename):
+        """Queue the labels to be saved to filename in background.
+
+        Returns False if they can not be, the errors of the writing are
+        reported by labelsSaveFailed.
+        """
         lf = LabelFile()
 
         def format_shape(s):
@@ -1283,12 +1426,14 @@ class MainWindow(QtWidgets.QMainWindow):
             data.update(
                 dict(
                     label=s.label.encode("utf-8") if PY2 else s.label,
-                    points=[(p.x(), p.y()) for p in s.points],
+                    points=s.pointsArray().tolist(),
                     group_id=s.group_id,
                     shape_type=s.shape_type,
-                    flags=s.flags,
+                    flags=dict(s.flags) if s.flags is not None else None,
                 )
             )
+            if s.shape_type == "mask":
+                data["mask"] = s.mask
             return data
 
         self.canvas.cleanResizableStatus()
@@ -1301,35 +1446,66 @@ class MainWindow(QtWidgets.QMainWindow):
             flags[key] = flag
         try:
             imagePath = osp.relpath(self.imagePath, osp.dirname(filename))
-            imageData = self.imageData if self._config["store_data"] else None
+            imageData = None
+            if self._config["store_data"]:
+                imageData = self.imageData
+            elif not QtGui.QImageReader(self.imagePath).canRead():
+                # the image is only in the label file it was loaded from
+                if self._config["image_store"] is None:
+                    imageData = self.imageData
+                else:
+                    imagePath = osp.relpath(
+                        ImageStore(self._config["image_store"]).add(
+                            self.imageData
+                        ),
+                        osp.dirname(filename),
+                    )
             if osp.dirname(filename) and not osp.exists(osp.dirname(filename)):
                 os.makedirs(osp.dirname(filename))
-            lf.save(
-                filename=filename,
-                shapes=shapes,
-                imagePath=imagePath,
-                imageData=imageData,
-                imageHeight=self.image.height(),
-                imageWidth=self.image.width(),
-                otherData=self.otherData,
-                flags=flags,
-            )
-            self.labelFile = lf
-            items = self.fileListWidget.findItems(
-                self.imagePath, Qt.MatchExactly
-            )
-            if len(items) > 0:
-                if len(items) != 1:
-                    raise RuntimeError("There are duplicate files.")
-                items[0].setCheckState(Qt.Checked)
-            # disable allows next and previous image to proceed
-            # self.filename = filename
-            return True
-        except LabelFileError as e:
+        except (LabelFileError, IOError, OSError) as e:
             self.errorMessage(
                 self.tr("Error saving label data"), self.tr("<b>%s</b>") % e
             )
             return False
+        summary = LabelSummary(
+            True,
+            frozenset(shape["label"] for shape in shapes),
+            len(shapes),
+            self.image.height(),
+            self.image.width(),
+        )
+        # the data is encoded and written by the writer thread
+        self.labelWriter.save(
+            filename,
+            context=(self.imagePath, summary),
+            shapes=shapes,
+            imagePath=imagePath,
+            imageData=imageData,
+            imageHeight=self.image.height(),
+            imageWidth=self.image.width(),
+            otherData=dict(self.otherData) if self.otherData else None,
+            flags=flags,
+        )
+        lf.filename = filename
+        self.labelFile = lf
+        # disable allows next and previous image to proceed
+        # self.filename = filename
+        return True
+
+    def labelsSaved(self, filename, context):
+        imagePath, summary = context
+        self.imagePrefetcher.invalidate(filename)
+        self.datasetIndex.update(imagePath, filename, summary=summary)
+        self.datasetIndex.commit()
+        self.fileListWidget.setChecked(imagePath, True)
+
+    def labelsSaveFailed(self, filename, error):
+        if self.labelFile is not None and self.labelFile.filename == filename:
+            # still modified
+            self.markDirty()
+        self.errorMessage(
+            self.tr("Error saving label data"), self.tr("<b>%s</b>") % error
+        )
 
     def copySelectedShape(self):
         added_shapes = self.canvas.copySelectedShapes()
@@ -1396,7 +1572,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self.setDirty()
         else:
             self.canvas.undoLastLine()
-            self.canvas.shapesBackups.pop()
+            self.canvas.shapesHistory.pop()
 
     def scrollRequest(self, delta, orientation):
         units = -delta * 0.1  # natural scroll
@@ -1488,11 +1664,11 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def loadFile(self, filename=None):
         """Load the specified file, or the last opened file if None."""
+        self.flushAutoSave()
         # changing fileListWidget loads file
-        if filename in self.imageList and (
-            self.fileListWidget.currentRow() != self.imageList.index(filename)
-        ):
-            self.fileListWidget.setCurrentRow(self.imageList.index(filename))
+        row = self.fileListWidget.row(filename)
+        if row >= 0 and self.fileListWidget.currentRow() != row:
+            self.fileListWidget.setCurrentRow(row)
             self.fileListWidget.repaint()
             return
 
@@ -1509,11 +1685,14 @@ class MainWindow(QtWidgets.QMainWindow):
             return False
         # assumes same name, but json extension
         self.status(self.tr("Loading %s...") % osp.basename(str(filename)))
-        label_file = osp.splitext(filename)[0] + ".json"
-        if self.output_dir:
-            label_file_without_path = osp.basename(label_file)
-            label_file = osp.join(self.output_dir, label_file_without_path)
-        if QtCore.QFile.exists(label_file) and LabelFile.is_label_file(
+        label_file = self.getLabelFileForImage(filename)
+        if self.labelWriter.isPending(label_file):
+            self.labelWriter.flush()
+        prefetched = self.imagePrefetcher.take(filename, label_file)
+        if prefetched is not None:
+            self.labelFile = prefetched.labelFile
+            self.imageData = prefetched.imageData
+        elif QtCore.QFile.exists(label_file) and LabelFile.is_label_file(
             label_file
         ):
             try:
@@ -1530,17 +1709,21 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.status(self.tr("Error reading %s") % label_file)
                 return False
             self.imageData = self.labelFile.imageData
+        else:
+            self.imageData = LabelFile.load_image_file(filename)
+            self.labelFile = None
+        if self.labelFile:
             self.imagePath = osp.join(
                 osp.dirname(label_file),
                 self.labelFile.imagePath,
             )
             self.otherData = self.labelFile.otherData
+        elif self.imageData:
+            self.imagePath = filename
+        if prefetched is not None:
+            image = prefetched.image
         else:
-            self.imageData = LabelFile.load_image_file(filename)
-            if self.imageData:
-                self.imagePath = filename
-            self.labelFile = None
-        image = QtGui.QImage.fromData(self.imageData)
+            image = QtGui.QImage.fromData(self.imageData)
 
         if image.isNull():
             formats = [
@@ -1564,6 +1747,8 @@ class MainWindow(QtWidgets.QMainWindow):
         flags = {k: False for k in self._config["flags"] or []}
         if self.labelFile:
             self.loadLabels(self.labelFile.shapes)
+            # not an edit to undo
+            self.canvas.shapesHistory.clear()
             if self.labelFile.flags is not None:
                 flags.update(self.labelFile.flags)
         self.loadFlags(flags)
@@ -1614,8 +1799,26 @@ class MainWindow(QtWidgets.QMainWindow):
         self.addRecentFile(self.filename)
         self.toggleActions(True)
         self.status(self.tr("Loaded %s") % osp.basename(str(filename)))
+        self.prefetchAdjacentImages()
         return True
 
+    def prefetchAdjacentImages(self):
+        num_next = self._config["prefetch"]["num_next"]
+        num_prev = self._config["prefetch"]["num_prev"]
+        currIndex = self.fileListWidget.row(self.filename)
+        if currIndex < 0:
+            return
+        count = self.fileListWidget.count()
+        filenames = []
+        for i in range(1, max(num_next, num_prev) + 1):
+            if i <= num_next and currIndex + i < count:
+                filenames.append(self.fileListWidget.filename(currIndex + i))
+            if i <= num_prev and currIndex - i >= 0:
+                filenames.append(self.fileListWidget.filename(currIndex - i))
+        self.imagePrefetcher.prefetch(
+            [(f, self.getLabelFileForImage(f)) for f in filenames]
+        )
+
     def resizeEvent(self, event):
         if (
             self.canvas
@@ -1666,8 +1869,15 @@ class MainWindow(QtWidgets.QMainWindow):
         self.actions.saveWithImageData.setChecked(enabled)
 
     def closeEvent(self, event):
+        self.flushAutoSave()
         if not self.mayContinue():
             event.ignore()
+        else:
+            for scanner in self.findChildren(DirScanner):
+                scanner.cancel()
+                scanner.wait()
+            self.labelWriter.flush()
+            self.datasetIndex.close()
         self.settings.setValue(
             "filename", self.filename if self.filename else ""
         )
@@ -1711,15 +1921,15 @@ class MainWindow(QtWidgets.QMainWindow):
         if not self.mayContinue():
             return
 
-        if len(self.imageList) <= 0:
+        if self.fileListWidget.count() <= 0:
             return
 
         if self.filename is None:
             return
 
-        currIndex = self.imageList.index(self.filename)
+        currIndex = self.fileListWidget.row(self.filename)
         if currIndex - 1 >= 0:
-            filename = self.imageList[currIndex - 1]
+            filename = self.fileListWidget.filename(currIndex - 1)
             if filename:
                 self.loadFile(filename)
 
@@ -1733,18 +1943,19 @@ class MainWindow(QtWidgets.QMainWindow):
         if not self.mayContinue():
             return
 
-        if len(self.imageList) <= 0:
+        count = self.fileListWidget.count()
+        if count <= 0:
             return
 
         filename = None
         if self.filename is None:
-            filename = self.imageList[0]
+            filename = self.fileListWidget.filename(0)
         else:
-            currIndex = self.imageList.index(self.filename)
-            if currIndex + 1 < len(self.imageList):
-                filename = self.imageList[currIndex + 1]
+            currIndex = self.fileListWidget.row(self.filename)
+            if currIndex + 1 < count:
+                filename = self.fileListWidget.filename(currIndex + 1)
             else:
-                filename = self.imageList[-1]
+                filename = self.fileListWidget.filename(count - 1)
         self.filename = filename
 
         if self.filename and load:
@@ -1795,6 +2006,7 @@ class MainWindow(QtWidgets.QMainWindow):
             return
 
         self.output_dir = output_dir
+        self.imagePrefetcher.clear()
 
         self.statusBar().showMessage(
             self.tr("%s . Annotations will be saved/loaded in %s")
@@ -1802,15 +2014,10 @@ class MainWindow(QtWidgets.QMainWindow):
         )
         self.statusBar().show()
 
-        current_filename = self.filename
-        self.importDirImages(self.lastOpenDir, load=False)
-
-        if current_filename in self.imageList:
-            # retain currently selected file
-            self.fileListWidget.setCurrentRow(
-                self.imageList.index(current_filename)
-            )
-            self.fileListWidget.repaint()
+        # retain currently selected file
+        self.importDirImages(
+            self.lastOpenDir, load=False, select=self.filename
+        )
 
     def saveFile(self, _value=False):
         assert not self.image.isNull(), "cannot save empty image"
@@ -1883,6 +2090,13 @@ class MainWindow(QtWidgets.QMainWindow):
 
         return label_file
 
+    def getLabelFileForImage(self, filename):
+        label_file = osp.splitext(filename)[0] + ".json"
+        if self.output_dir:
+            label_file_without_path = osp.basename(label_file)
+            label_file = osp.join(self.output_dir, label_file_without_path)
+        return label_file
+
     def deleteFile(self):
         mb = QtWidgets.QMessageBox
         msg = self.tr(
@@ -1894,12 +2108,16 @@ class MainWindow(QtWidgets.QMainWindow):
             return
 
         label_file = self.getLabelFile()
+        # not to be written again after being removed
+        self.labelWriter.flush()
         if osp.exists(label_file):
             os.remove(label_file)
             logger.info("Label file is removed: {}".format(label_file))
+            self.imagePrefetcher.invalidate(label_file)
+            self.datasetIndex.remove(self.filename)
+            self.datasetIndex.commit()
 
-            item = self.fileListWidget.currentItem()
-            item.setCheckState(Qt.Unchecked)
+            self.fileListWidget.setChecked(self.filename, False)
 
             self.resetState()
 
@@ -1918,9 +2136,11 @@ class MainWindow(QtWidgets.QMainWindow):
             return False
 
         label_file = self.getLabelFile()
-        return osp.exists(label_file)
+        return osp.exists(label_file) or self.labelWriter.isPending(label_file)
 
     def mayContinue(self):
+        # called before switching or closing the file
+        self.flushAutoSave()
         if not self.dirty:
             return True
         mb = QtWidgets.QMessageBox
@@ -2004,11 +2224,28 @@ class MainWindow(QtWidgets.QMainWindow):
 
     @property
     def imageList(self):
-        lst = []
-        for i in range(self.fileListWidget.count()):
-            item = self.fileListWidget.item(i)
-            lst.append(item.text())
-        return lst
+        return self.fileListWidget.filenames()
+
+    def imageHasLabelFile(self, filename):
+        label_file = self.getLabelFileForImage(filename)
+        return QtCore.QFile.exists(label_file) and LabelFile.is_label_file(
+            label_file
+        )
+
+    def imageLabelNames(self, filename):
+        return self.datasetIndex.summary(
+            filename, self.getLabelFileForImage(filename)
+        ).labels
+
+    def openDatasetIndex(self, dirpath):
+        """Keep the label summaries in the index file of dirpath."""
+        path = ":memory:"
+        if self._config["dataset_index"]:
+            path = DatasetIndex.cache_path(dirpath)
+        if path == self.datasetIndex.path:
+            return
+        self.datasetIndex.close()
+        self.datasetIndex = DatasetIndex(path, root=dirpath)
 
     def importDroppedImageFiles(self, imageFiles):
         extensions = [
@@ -2017,58 +2254,98 @@ class MainWindow(QtWidgets.QMainWindow):
         ]
 
         self.filename = None
-        for file in imageFiles:
-            if file in self.imageList or not file.lower().endswith(
-                tuple(extensions)
-            ):
-                continue
-            label_file = osp.splitext(file)[0] + ".json"
-            if self.output_dir:
-                label_file_without_path = osp.basename(label_file)
-                label_file = osp.join(self.output_dir, label_file_without_path)
-            item = QtWidgets.QListWidgetItem(file)
-            item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            if QtCore.QFile.exists(label_file) and LabelFile.is_label_file(
-                label_file
-            ):
-                item.setCheckState(Qt.Checked)
-            else:
-                item.setCheckState(Qt.Unchecked)
-            self.fileListWidget.addItem(item)
+        # already listed files are skipped, the label files are only
+        # looked up when displayed
+        self.fileListWidget.addFiles(
+            [
+                file
+                for file in imageFiles
+                if file.lower().endswith(tuple(extensions))
+            ]
+        )
 
-        if len(self.imageList) > 1:
+        if self.fileListWidget.count() > 1:
             self.actions.openNextImg.setEnabled(True)
             self.actions.openPrevImg.setEnabled(True)
 
         self.openNextImg()
 
-    def importDirImages(self, dirpath, pattern=None, load=True):
+    def importDirImages(self, dirpath, pattern=None, load=True, select=None):
+        """Fill the file list with the images of dirpath.
+
+        The directory is scanned in the background and the file list grows
+        while images are found. The first image is opened (and loaded if
+        load) as soon as it is found, then select if it is found. pattern
+        replaces the text of the file search if given.
+        """
         self.actions.openNextImg.setEnabled(True)
         self.actions.openPrevImg.setEnabled(True)
 
         if not self.mayContinue() or not dirpath:
             return
 
+        if pattern is not None:
+            self.fileSearch.setText(pattern)
+            self.fileSearchChanged()
+
+        if self.dirScanner is not None:
+            # the results of the previous directory are not wanted anymore
+            self.dirScanner.cancel()
+
         self.lastOpenDir = dirpath
         self.filename = None
         self.fileListWidget.clear()
-        for filename in self.scanAllImages(dirpath):
-            if pattern and pattern not in filename:
-                continue
-            label_file = osp.splitext(filename)[0] + ".json"
-            if self.output_dir:
-                label_file_without_path = osp.basename(label_file)
-                label_file = osp.join(self.output_dir, label_file_without_path)
-            item = QtWidgets.QListWidgetItem(filename)
-            item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            if QtCore.QFile.exists(label_file) and LabelFile.is_label_file(
-                label_file
-            ):
-                item.setCheckState(Qt.Checked)
-            else:
-                item.setCheckState(Qt.Unchecked)
-            self.fileListWidget.addItem(item)
-        self.openNextImg(load=load)
+        self.openDatasetIndex(self.output_dir or dirpath)
+
+        extensions = [
+            ".%s" % fmt.data().decode().lower()
+            for fmt in QtGui.QImageReader.supportedImageFormats()
+        ]
+        scanner = DirScanner(
+            dirpath, extensions, output_dir=self.output_dir, parent=self
+        )
+        scanner.found.connect(
+            functools.partial(self.dirScannerFound, scanner, load, select)
+        )
+        scanner.finished.connect(
+            functools.partial(self.dirScannerFinished, scanner)
+        )
+        scanner.finished.connect(scanner.deleteLater)
+        self.dirScanner = scanner
+        self.status(self.tr("Scanning %s ...") % dirpath, delay=0)
+        scanner.start()
+
+    def dirScannerFound(self, scanner, load, select, images):
+        if scanner is not self.dirScanner or scanner.isCancelled():
+            return
+        first_row = self.fileListWidget.count()
+        filenames = [filename for filename, _ in images]
+        self.fileListWidget.addFiles(
+            filenames, [has_label_file for _, has_label_file in images]
+        )
+        # the files not matching the file search are not listed
+        if first_row == 0 and self.fileListWidget.count():
+            self.openNextImg(load=load)
+        if select in filenames and select in self.fileListWidget:
+            self.fileListWidget.setCurrentRow(self.fileListWidget.row(select))
+        self.status(
+            self.tr("Scanning %s ... %d images found")
+            % (scanner.dirpath, self.fileListWidget.count()),
+            delay=0,
+        )
+
+    def dirScannerFinished(self, scanner):
+        if scanner is not self.dirScanner:
+            return
+        self.dirScanner = None
+        if scanner.isCancelled():
+            return
+        # the summaries read for the file search while scanning
+        self.datasetIndex.commit()
+        self.status(
+            self.tr("Found %d images in %s")
+            % (self.fileListWidget.count(), scanner.dirpath)
+        )
 
     def scanAllImages(self, folderPath):
         extensions = [
@@ -2076,14 +2353,9 @@ class MainWindow(QtWidgets.QMainWindow):
             for fmt in QtGui.QImageReader.supportedImageFormats()
         ]
 
-        images = []
-        for root, dirs, files in os.walk(folderPath):
-            for file in files:
-                if file.lower().endswith(tuple(extensions)):
-                    relativePath = osp.join(root, file)
-                    images.append(relativePath)
-        images.sort(key=lambda x: x.lower())
-        return images
+        return [
+            filename for filename, _ in scan_images(folderPath, extensions)
+        ]
 
     def createBasicShapeMenu(self):
         basicShapeMenu = QtWidgets.QMenu(self.tr("Create BasicShape"))
@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+import os.path as osp
+import time
+import traceback
+
+from labelme.label_file import LabelFile
+from labelme.label_file import replace  # NOQA
+from labelme.label_file import save_atomic  # NOQA
+from labelme.logger import logger
+
+
+def find_label_files(folder):
+    """Return the label files under folder, sorted by path."""
+    label_files = []
+    for root, dirs, files in os.walk(folder):
+        for file in files:
+            if file.lower().endswith(LabelFile.suffix):
+                label_files.append(osp.join(root, file))
+    return sorted(label_files)
+
+
+def is_up_to_date(outputs, inputs):
+    """Return True if all outputs exist and none is older than the inputs."""
+    try:
+        oldest = min(os.stat(output).st_mtime for output in outputs)
+    except OSError:
+        return False
+    return all(os.stat(input).st_mtime <= oldest for input in inputs)
+
+
+def _call(func_task):
+    func, task = func_task
+    try:
+        return task, func(task), None
+    except Exception:
+        return task, None, traceback.format_exc()
+
+
+def run(func, tasks, jobs=None, chunksize=8, report_interval=5, ordered=False):
+    """Call func(task) for each task in a pool of jobs processes.
+
+    Yields (task, result, error) as soon as each task is done, error being
+    the formatted traceback if func raised. The results are yielded in the
+    order of tasks if ordered, the results done early are kept until then.
+    The throughput is logged every report_interval seconds and at the end.
+    """
+    tasks = list(tasks)
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    jobs = max(1, min(jobs, len(tasks)))
+    func_tasks = ((func, task) for task in tasks)
+
+    pool = None
+    if jobs == 1:
+        # easier to debug and no pickling
+        results = (_call(func_task) for func_task in func_tasks)
+    else:
+        pool = multiprocessing.Pool(jobs)
+        imap = pool.imap if ordered else pool.imap_unordered
+        results = imap(_call, func_tasks, chunksize=chunksize)
+
+    logger.info("Processing {} files with {} jobs".format(len(tasks), jobs))
+    start = last_report = time.time()
+    done = failed = 0
+    try:
+        for task, result, error in results:
+            done += 1
+            if error is not None:
+                failed += 1
+                logger.error("Failed to process {}:\n{}".format(task, error))
+            now = time.time()
+            if now - last_report >= report_interval:
+                last_report = now
+                _report(done, len(tasks), failed, now - start)
+            yield task, result, error
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    _report(done, len(tasks), failed, time.time() - start)
+
+
+def _report(done, total, failed, elapsed):
+    rate = done / elapsed if elapsed > 0 else 0
+    eta = (total - done) / rate if rate > 0 else 0
+    logger.info(
+        "{}/{} files ({} failed) in {:.1f}s, {:.1f} files/s, "
+        "ETA {:.0f}s".format(done, total, failed, elapsed, rate, eta)
+    )
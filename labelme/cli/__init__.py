@@ -2,5 +2,8 @@
 
 from . import draw_json
 from . import draw_label_png
+from . import export_coco
+from . import export_voc
 from . import json_to_dataset
 from . import on_docker
+from . import strip_data
@@ -0,0 +1,299 @@
+import argparse
+import collections
+import datetime
+import functools
+import json
+import os
+import os.path as osp
+import shutil
+import sys
+import tempfile
+import uuid
+
+import imgviz
+import numpy as np
+
+from labelme import batch
+from labelme.cli.export_voc import load_class_names
+from labelme.label_file import LabelFile
+from labelme.logger import logger
+from labelme import utils
+
+
+class CocoWriter(object):
+    """Write a COCO annotation file one image and annotation at a time.
+
+    The images are written to the file as they are added, the annotations
+    to a temporary file which is copied after the images on close, so that
+    the memory does not grow with the size of the dataset. The ids of the
+    images and the annotations are given in the order they are added.
+    The file is written under a temporary name and renamed on close.
+    """
+
+    def __init__(self, filename, info, licenses, categories):
+        self.filename = filename
+        self._categories = categories
+        self.num_images = 0
+        self.num_annotations = 0
+        self._tmp_filename = osp.join(
+            osp.dirname(filename), ".tmp-" + osp.basename(filename)
+        )
+        self._file = open(self._tmp_filename, "w")
+        self._annotations = tempfile.TemporaryFile(
+            "w+", dir=osp.dirname(filename) or None
+        )
+        self._file.write(
+            '{{"info": {}, "licenses": {}, "images": ['.format(
+                json.dumps(info), json.dumps(licenses)
+            )
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def add_image(self, **image):
+        """Add the image and return its id."""
+        image["id"] = self.num_images
+        if self.num_images:
+            self._file.write(", ")
+        self._file.write(json.dumps(image))
+        self.num_images += 1
+        return image["id"]
+
+    def add_annotation(self, **annotation):
+        """Add the annotation and return its id."""
+        annotation = dict(id=self.num_annotations, **annotation)
+        if self.num_annotations:
+            self._annotations.write(", ")
+        self._annotations.write(json.dumps(annotation))
+        self.num_annotations += 1
+        return annotation["id"]
+
+    def close(self):
+        self._file.write('], "type": "instances", "annotations": [')
+        self._annotations.seek(0)
+        shutil.copyfileobj(self._annotations, self._file)
+        self._annotations.close()
+        self._file.write(
+            '], "categories": {}}}'.format(json.dumps(self._categories))
+        )
+        self._file.close()
+        batch.replace(self._tmp_filename, self.filename)
+
+    def abort(self):
+        self._annotations.close()
+        self._file.close()
+        os.remove(self._tmp_filename)
+
+
+def union_cropped_masks(cropped1, cropped2):
+    """Return the union of two (mask, bbox) of shape_to_cropped_mask."""
+    (mask1, bbox1), (mask2, bbox2) = cropped1, cropped2
+    if not mask1.size:
+        return cropped2
+    if not mask2.size:
+        return cropped1
+    y1, x1 = min(bbox1[0], bbox2[0]), min(bbox1[1], bbox2[1])
+    y2, x2 = max(bbox1[2], bbox2[2]), max(bbox1[3], bbox2[3])
+    mask = np.zeros((y2 - y1, x2 - x1), dtype=bool)
+    for mask_i, (y1_i, x1_i, y2_i, x2_i) in [cropped1, cropped2]:
+        mask[y1_i - y1 : y2_i - y1, x1_i - x1 : x2_i - x1] |= mask_i
+    return mask, (y1, x1, y2, x2)
+
+
+def convert(filename, input_dir, output_dir, labels_file, viz=True):
+    """Convert the label file filename for the COCO annotation file.
+
+    The image (and its visualization if viz) are saved in output_dir and
+    (image, annotations) is returned for CocoWriter, without their ids.
+    """
+    _, class_name_to_id = load_class_names(labels_file)
+    label_file = LabelFile(filename=filename)
+    img = utils.img_data_to_arr(label_file.imageData)
+
+    base = osp.splitext(osp.relpath(filename, input_dir))[0]
+    out_img_file = osp.join(output_dir, "JPEGImages", base + ".jpg")
+    out_viz_file = osp.join(output_dir, "Visualization", base + ".jpg")
+    for out_file in [out_img_file, out_viz_file] if viz else [out_img_file]:
+        if not osp.exists(osp.dirname(out_file)):
+            try:
+                os.makedirs(osp.dirname(out_file))
+            except OSError:
+                # created by another worker
+                if not osp.isdir(osp.dirname(out_file)):
+                    raise
+    batch.save_atomic(
+        out_img_file, functools.partial(imgviz.io.imsave, arr=img)
+    )
+    image = dict(
+        license=0,
+        url=None,
+        file_name=osp.relpath(out_img_file, output_dir),
+        height=img.shape[0],
+        width=img.shape[1],
+        date_captured=None,
+    )
+
+    masks = {}  # (mask, bbox) cropped to the instance, for area
+    segmentations = collections.defaultdict(list)  # for segmentation
+    rle_instances = set()  # with a mask shape, which has no polygon
+    for shape in label_file.shapes:
+        points = shape["points"]
+        label = shape["label"]
+        group_id = shape.get("group_id")
+        shape_type = shape.get("shape_type", "polygon")
+        mask = utils.shape_to_cropped_mask(
+            img.shape[:2], points, shape_type, mask=shape.get("mask")
+        )
+
+        if group_id is None:
+            group_id = uuid.uuid1()
+
+        instance = (label, group_id)
+        if shape_type == "mask":
+            rle_instances.add(instance)
+
+        if instance in masks:
+            masks[instance] = union_cropped_masks(masks[instance], mask)
+        else:
+            masks[instance] = mask
+
+        if shape_type == "rectangle":
+            (x1, y1), (x2, y2) = points
+            x1, x2 = sorted([x1, x2])
+            y1, y2 = sorted([y1, y2])
+            points = [x1, y1, x2, y1, x2, y2, x1, y2]
+        else:
+            points = np.asarray(points).flatten().tolist()
+
+        segmentations[instance].append(points)
+
+    annotations = []
+    for (cls_name, group_id), (mask, (y1, x1, y2, x2)) in masks.items():
+        if cls_name not in class_name_to_id:
+            continue
+        # like pycocotools.mask.area and toBbox
+        area = float(np.count_nonzero(mask))
+        bbox = [float(x1), float(y1), float(x2 - x1), float(y2 - y1)]
+        if (cls_name, group_id) in rle_instances:
+            full_mask = np.zeros(img.shape[:2], dtype=bool)
+            full_mask[y1:y2, x1:x2] = mask
+            segmentation = utils.mask_to_rle(full_mask)
+        else:
+            segmentation = segmentations[(cls_name, group_id)]
+        annotations.append(
+            dict(
+                category_id=class_name_to_id[cls_name],
+                segmentation=segmentation,
+                area=area,
+                bbox=bbox,
+                iscrowd=0,
+            )
+        )
+
+    if viz:
+        instances = []
+        for (cnm, gid), (msk, (y1, x1, y2, x2)) in masks.items():
+            if cnm not in class_name_to_id:
+                continue
+            full_msk = np.zeros(img.shape[:2], dtype=bool)
+            full_msk[y1:y2, x1:x2] = msk
+            instances.append((class_name_to_id[cnm], cnm, full_msk))
+        if instances:
+            labels, captions, instance_masks = zip(*instances)
+            img_viz = imgviz.instances2rgb(
+                image=img,
+                labels=labels,
+                masks=instance_masks,
+                captions=captions,
+                font_size=15,
+                line_width=2,
+            )
+        else:
+            img_viz = img
+        batch.save_atomic(
+            out_viz_file, functools.partial(imgviz.io.imsave, arr=img_viz)
+        )
+    return image, annotations
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert the label files of a directory to a "
+        "COCO-format dataset. The masks are computed in a process pool and "
+        "the annotation file is written while the files are converted.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("input_dir", help="input annotated directory")
+    parser.add_argument("output_dir", help="output dataset directory")
+    parser.add_argument("--labels", help="labels file", required=True)
+    parser.add_argument(
+        "--noviz", help="no visualization", action="store_true"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of processes, the number of CPUs by default",
+    )
+    args = parser.parse_args()
+
+    class_names, class_name_to_id = load_class_names(args.labels)
+    categories = [
+        dict(supercategory=None, id=class_name_to_id[name], name=name)
+        for name in class_names
+    ]
+    now = datetime.datetime.now()
+    info = dict(
+        description=None,
+        url=None,
+        version=None,
+        year=now.year,
+        contributor=None,
+        date_created=now.strftime("%Y-%m-%d %H:%M:%S.%f"),
+    )
+    licenses = [dict(url=None, id=0, name=None)]
+
+    if not osp.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+    out_ann_file = osp.join(args.output_dir, "annotations.json")
+
+    label_files = batch.find_label_files(args.input_dir)
+    converter = functools.partial(
+        convert,
+        input_dir=args.input_dir,
+        output_dir=args.output_dir,
+        labels_file=args.labels,
+        viz=not args.noviz,
+    )
+    failed = 0
+    with CocoWriter(out_ann_file, info, licenses, categories) as writer:
+        # in order, for the ids to not depend on the number of jobs
+        for _, result, error in batch.run(
+            converter, label_files, jobs=args.jobs, ordered=True
+        ):
+            if error is not None:
+                failed += 1
+                continue
+            image, annotations = result
+            image_id = writer.add_image(**image)
+            for annotation in annotations:
+                writer.add_annotation(image_id=image_id, **annotation)
+    logger.info(
+        "Saved {} images and {} annotations to {} ({} failed)".format(
+            writer.num_images, writer.num_annotations, out_ann_file, failed
+        )
+    )
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
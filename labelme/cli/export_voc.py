@@ -0,0 +1,207 @@
+import argparse
+import functools
+import os
+import os.path as osp
+import sys
+
+import imgviz
+import numpy as np
+
+from labelme import batch
+from labelme.label_file import LabelFile
+from labelme.logger import logger
+from labelme import utils
+
+
+def load_class_names(labels_file):
+    """Return the class names and the name -> id of labels_file.
+
+    The first line must be __ignore__ (id -1) and the second _background_
+    (id 0), like in examples/*/labels.txt.
+    """
+    class_names = []
+    class_name_to_id = {}
+    with open(labels_file) as f:
+        lines = [line.strip() for line in f if line.strip()]
+    for i, class_name in enumerate(lines):
+        class_id = i - 1  # starts with -1
+        class_name_to_id[class_name] = class_id
+        if class_id == -1:
+            if class_name != "__ignore__":
+                raise ValueError("The first label must be __ignore__")
+            continue
+        elif class_id == 0:
+            if class_name != "_background_":
+                raise ValueError("The second label must be _background_")
+        class_names.append(class_name)
+    return class_names, class_name_to_id
+
+
+def output_files(output_dir, base, instance=True, viz=True):
+    outputs = dict(
+        img=osp.join(output_dir, "JPEGImages", base + ".jpg"),
+        cls=osp.join(output_dir, "SegmentationClass", base + ".npy"),
+        clsp=osp.join(output_dir, "SegmentationClassPNG", base + ".png"),
+    )
+    if viz:
+        outputs["clsv"] = osp.join(
+            output_dir, "SegmentationClassVisualization", base + ".jpg"
+        )
+    if instance:
+        outputs["ins"] = osp.join(
+            output_dir, "SegmentationObject", base + ".npy"
+        )
+        outputs["insp"] = osp.join(
+            output_dir, "SegmentationObjectPNG", base + ".png"
+        )
+        if viz:
+            outputs["insv"] = osp.join(
+                output_dir, "SegmentationObjectVisualization", base + ".jpg"
+            )
+    return outputs
+
+
+def convert(
+    filename,
+    input_dir,
+    output_dir,
+    labels_file,
+    instance=True,
+    viz=True,
+    force=False,
+):
+    """Convert the label file filename, return True or False if skipped.
+
+    The outputs are skipped if they are newer than filename, labels_file
+    and the image file of filename, unless force.
+    """
+    base = osp.splitext(osp.relpath(filename, input_dir))[0]
+    outputs = output_files(output_dir, base, instance=instance, viz=viz)
+    if not force and batch.is_up_to_date(
+        outputs.values(), [filename, labels_file]
+    ):
+        # only imagePath is needed
+        image_file = osp.join(
+            osp.dirname(filename),
+            LabelFile(filename=filename, lazy=True).imagePath,
+        )
+        if not osp.exists(image_file) or batch.is_up_to_date(
+            outputs.values(), [image_file]
+        ):
+            return False
+
+    class_names, class_name_to_id = load_class_names(labels_file)
+    label_file = LabelFile(filename=filename)
+    img = utils.img_data_to_arr(label_file.imageData)
+    cls, ins = utils.shapes_to_label(
+        img_shape=img.shape,
+        shapes=label_file.shapes,
+        label_name_to_value=class_name_to_id,
+    )
+    ins[cls == -1] = 0  # ignore it.
+
+    for output in outputs.values():
+        if not osp.exists(osp.dirname(output)):
+            try:
+                os.makedirs(osp.dirname(output))
+            except OSError:
+                # created by another worker
+                if not osp.isdir(osp.dirname(output)):
+                    raise
+
+    def save_label(key, lbl, label_names):
+        batch.save_atomic(
+            outputs[key + "p"], functools.partial(utils.lblsave, lbl=lbl)
+        )
+        batch.save_atomic(outputs[key], functools.partial(np.save, arr=lbl))
+        if viz:
+            lblv = imgviz.label2rgb(
+                label=lbl,
+                img=imgviz.rgb2gray(img),
+                label_names=label_names,
+                font_size=15,
+                loc="rb",
+            )
+            batch.save_atomic(
+                outputs[key + "v"],
+                functools.partial(imgviz.io.imsave, arr=lblv),
+            )
+
+    batch.save_atomic(
+        outputs["img"], functools.partial(imgviz.io.imsave, arr=img)
+    )
+    save_label("cls", cls, class_names)
+    if instance:
+        instance_names = [str(i) for i in range(ins.max() + 1)]
+        save_label("ins", ins, instance_names)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert the label files of a directory to a VOC-format "
+        "dataset with class and instance label PNGs. The outputs which are "
+        "newer than their label file, image file and the labels file are "
+        "skipped, so that an interrupted conversion can be resumed.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("input_dir", help="input annotated directory")
+    parser.add_argument("output_dir", help="output dataset directory")
+    parser.add_argument("--labels", help="labels file", required=True)
+    parser.add_argument(
+        "--noviz", help="no visualization", action="store_true"
+    )
+    parser.add_argument(
+        "--noobject", help="no instance label", action="store_true"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of processes, the number of CPUs by default",
+    )
+    parser.add_argument(
+        "--force",
+        help="convert the up-to-date label files again",
+        action="store_true",
+    )
+    args = parser.parse_args()
+
+    class_names, _ = load_class_names(args.labels)
+    logger.info("class_names: {}".format(class_names))
+    if not osp.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+    out_class_names_file = osp.join(args.output_dir, "class_names.txt")
+    with open(out_class_names_file, "w") as f:
+        f.writelines("\n".join(class_names))
+
+    label_files = batch.find_label_files(args.input_dir)
+    converter = functools.partial(
+        convert,
+        input_dir=args.input_dir,
+        output_dir=args.output_dir,
+        labels_file=args.labels,
+        instance=not args.noobject,
+        viz=not args.noviz,
+        force=args.force,
+    )
+    converted = skipped = failed = 0
+    for _, result, error in batch.run(converter, label_files, jobs=args.jobs):
+        if error is not None:
+            failed += 1
+        elif result:
+            converted += 1
+        else:
+            skipped += 1
+    logger.info(
+        "Saved to {}: {} converted, {} up to date, {} failed".format(
+            args.output_dir, converted, skipped, failed
+        )
+    )
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
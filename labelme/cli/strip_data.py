@@ -0,0 +1,157 @@
+import argparse
+import base64
+import collections
+import functools
+import json
+import os
+import os.path as osp
+import sys
+
+import PIL.Image
+
+from labelme import batch
+from labelme.image_store import ImageStore
+from labelme import label_file
+from labelme.label_file import LabelFile
+from labelme.logger import logger
+from labelme import utils
+
+
+def _image_file_size(filename):
+    # the (height, width) of the image as loaded by labelme
+    image_pil = PIL.Image.open(filename)
+    image_pil = utils.apply_exif_orientation(image_pil)
+    width, height = image_pil.size
+    return height, width
+
+
+def strip(filename, image_store=None, dry_run=False):
+    """Remove the image data embedded in the label file filename.
+
+    The image data is only removed if the image file of imagePath exists
+    and has the size of the embedded image, else it is moved to
+    image_store (an ImageStore) and imagePath set to it, if given.
+    Returns (status, the number of bytes saved), status being "stripped",
+    "stored", "no data" or why the data was kept: "missing", "unreadable"
+    or "mismatch".
+    """
+    data = label_file._load_json(filename)
+    if data.get("imageData") is None:
+        return "no data", 0
+
+    image_data = base64.b64decode(data["imageData"])
+    size = utils.img_data_to_height_width(image_data)
+    if data.get("imageHeight") is not None:
+        # imageHeight and imageWidth are kept, so they must be right
+        if size != (data["imageHeight"], data["imageWidth"]):
+            return "mismatch", 0
+
+    image_file = osp.join(osp.dirname(filename), data["imagePath"])
+    if not osp.exists(image_file):
+        status = "missing"
+    else:
+        try:
+            image_file_size = _image_file_size(image_file)
+        except IOError:
+            status = "unreadable"
+        else:
+            status = "stripped" if image_file_size == size else "mismatch"
+    if status != "stripped":
+        if image_store is None:
+            return status, 0
+        status = "stored"
+        if dry_run:
+            image_file = image_store.filename(image_data)
+        else:
+            image_file = image_store.add(image_data)
+        data["imagePath"] = osp.relpath(image_file, osp.dirname(filename))
+
+    data["imageData"] = None
+    old_size = os.stat(filename).st_size
+    if not dry_run:
+        batch.save_atomic(
+            filename, functools.partial(LabelFile._save_json, data=data)
+        )
+        return status, old_size - os.stat(filename).st_size
+    return status, old_size - len(
+        json.dumps(data, **LabelFile._json_options).encode("utf-8")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Remove the image data embedded in the label files of "
+        "directories, which then refer to the image files by imagePath. "
+        "The data is kept if the image file does not exist or has "
+        "another size, unless --image-store is given.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="label files or directories of them"
+    )
+    parser.add_argument(
+        "--image-store",
+        help="directory where the embedded images without image file are "
+        "saved, by the hash of their content",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of processes, the number of CPUs by default",
+    )
+    parser.add_argument(
+        "--dry-run",
+        help="report what would be done without writing",
+        action="store_true",
+    )
+    args = parser.parse_args()
+
+    label_files = []
+    for input in args.inputs:
+        if osp.isdir(input):
+            label_files.extend(batch.find_label_files(input))
+        else:
+            label_files.append(input)
+
+    image_store = None
+    if args.image_store is not None:
+        image_store = ImageStore(args.image_store)
+    stripper = functools.partial(
+        strip, image_store=image_store, dry_run=args.dry_run
+    )
+    statuses = collections.Counter()
+    saved = 0
+    for filename, result, error in batch.run(
+        stripper, label_files, jobs=args.jobs
+    ):
+        if error is not None:
+            statuses["failed"] += 1
+            continue
+        status, saved_bytes = result
+        statuses[status] += 1
+        saved += saved_bytes
+        if status in ["missing", "unreadable", "mismatch"]:
+            logger.warning(
+                "Kept the image data of {}: image file {}".format(
+                    filename, status
+                )
+            )
+    logger.info(
+        "{}{} files, saved {:.1f} MB: {}".format(
+            "(dry run) " if args.dry_run else "",
+            len(label_files),
+            saved / 1e6,
+            ", ".join(
+                "{} {}".format(count, status)
+                for status, count in sorted(statuses.items())
+            ),
+        )
+    )
+    if statuses["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import collections
+import hashlib
+import json
+import os
+import os.path as osp
+import sqlite3
+
+from labelme.label_file import LabelFile
+from labelme.label_file import LabelFileError
+from labelme.logger import logger
+
+
+LabelSummary = collections.namedtuple(
+    "LabelSummary",
+    ["labeled", "labels", "shape_count", "image_height", "image_width"],
+)
+
+UNLABELED = LabelSummary(False, frozenset(), 0, None, None)
+
+
+class DatasetIndex(object):
+    """Summaries of the label files of a dataset, kept in a SQLite file.
+
+    For each labeled image, the labels, shape count and image size of its
+    label file are stored with the mtime and size of the label file, which
+    is only read again once it changed. The image paths are stored relative
+    to root (the directory of the index by default). The whole table is
+    read on the first lookup, so that checking a summary costs a stat of
+    the label file. The index is only a cache: when it can not be opened or
+    written, the summaries are read from the label files.
+    """
+
+    # bump when the table changes, older indices are rebuilt
+    _version = 1
+
+    def __init__(self, path=":memory:", root=None, commit_every=1000):
+        self.path = path
+        self.commit_every = commit_every
+        if root is None and path != ":memory:":
+            root = osp.dirname(path)
+        self._root = root
+        self._pending = 0
+        # key -> (label_mtime, label_size, LabelSummary or the row of the
+        # table if not used yet), see _loadRows
+        self._rows = None
+        try:
+            if path != ":memory:" and not osp.isdir(osp.dirname(path)):
+                os.makedirs(osp.dirname(path))
+            self._conn = self._connect(path)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Failed to open index {}: {}".format(path, e))
+            self._root = None
+            self._conn = self._connect(":memory:")
+
+    @staticmethod
+    def cache_path(dirpath):
+        """Return the index file of the directory dirpath in the user cache.
+
+        It is kept out of the dataset, named by the hash of the absolute
+        path of dirpath.
+        """
+        cache_dir = os.environ.get("XDG_CACHE_HOME")
+        if not cache_dir and os.name == "nt":
+            cache_dir = os.environ.get("LOCALAPPDATA")
+        if not cache_dir:
+            cache_dir = osp.join(osp.expanduser("~"), ".cache")
+        digest = hashlib.sha1(osp.abspath(dirpath).encode("utf-8")).hexdigest()
+        return osp.join(cache_dir, "labelme", "index", digest + ".sqlite3")
+
+    def _connect(self, path):
+        conn = sqlite3.connect(path, timeout=1)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != self._version:
+            conn.execute("DROP TABLE IF EXISTS images")
+            conn.execute(
+                "CREATE TABLE images ("
+                "image TEXT PRIMARY KEY, "
+                "label_mtime REAL, "
+                "label_size INTEGER, "
+                "labels TEXT, "
+                "shape_count INTEGER, "
+                "image_height INTEGER, "
+                "image_width INTEGER)"
+            )
+            conn.execute("PRAGMA user_version = {}".format(self._version))
+            conn.commit()
+        return conn
+
+    def _key(self, image):
+        if self._root is None:
+            return image
+        prefix = osp.join(self._root, "")
+        if image.startswith(prefix):
+            # much cheaper than relpath for the images under the root
+            return image[len(prefix):]
+        try:
+            return osp.relpath(image, self._root)
+        except ValueError:
+            # e.g. on another drive on Windows
+            return image
+
+    def _loadRows(self):
+        self._rows = {}
+        cursor = self._execute(
+            "SELECT image, label_mtime, label_size, labels, shape_count, "
+            "image_height, image_width FROM images"
+        )
+        if cursor is None:
+            return
+        # the summaries are only built when looked up
+        self._rows = dict((row[0], (row[1], row[2], row)) for row in cursor)
+
+    def _execute(self, sql, args=()):
+        try:
+            return self._conn.execute(sql, args)
+        except sqlite3.Error as e:
+            logger.debug("Failed to query index {}: {}".format(self.path, e))
+            return None
+
+    def _write(self, sql, args=()):
+        cursor = self._execute(sql, args)
+        if cursor is None or not cursor.rowcount:
+            return
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    def summary(self, image, label_file):
+        """Return the LabelSummary of image, whose label file is label_file.
+
+        The label file is only read when it changed since it was last
+        summarized.
+        """
+        try:
+            stat = os.stat(label_file)
+        except OSError:
+            self.remove(image)
+            return UNLABELED
+
+        if self._rows is None:
+            self._loadRows()
+        key = self._key(image)
+        row = self._rows.get(key)
+        if row and row[0] == stat.st_mtime and row[1] == stat.st_size:
+            summary = row[2]
+            if not isinstance(summary, LabelSummary):
+                labels, count, height, width = summary[3:]
+                summary = LabelSummary(
+                    True, frozenset(json.loads(labels)), count, height, width
+                )
+                self._rows[key] = (row[0], row[1], summary)
+            return summary
+        return self.update(image, label_file, stat=stat)
+
+    def update(self, image, label_file, summary=None, stat=None):
+        """Record the summary of label_file, read from it if not given."""
+        if stat is None:
+            try:
+                stat = os.stat(label_file)
+            except OSError:
+                self.remove(image)
+                return UNLABELED
+        if summary is None:
+            try:
+                data = LabelFile.load_summary(label_file)
+            except LabelFileError as e:
+                logger.debug(
+                    "Failed to summarize {}: {}".format(label_file, e)
+                )
+                data = dict(labels=set(), shape_count=0)
+            summary = LabelSummary(
+                True,
+                frozenset(data["labels"]),
+                data["shape_count"],
+                data.get("imageHeight"),
+                data.get("imageWidth"),
+            )
+        key = self._key(image)
+        if self._rows is not None:
+            self._rows[key] = (stat.st_mtime, stat.st_size, summary)
+        self._write(
+            "INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                stat.st_mtime,
+                stat.st_size,
+                json.dumps(sorted(summary.labels)),
+                summary.shape_count,
+                summary.image_height,
+                summary.image_width,
+            ),
+        )
+        return summary
+
+    def remove(self, image):
+        key = self._key(image)
+        if self._rows is not None:
+            if key not in self._rows:
+                return
+            del self._rows[key]
+        self._write("DELETE FROM images WHERE image = ?", (key,))
+
+    def commit(self):
+        if not self._pending:
+            return
+        self._pending = 0
+        try:
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.debug("Failed to write index {}: {}".format(self.path, e))
+
+    def close(self):
+        self.commit()
+        self._conn.close()
@@ -0,0 +1,148 @@
+import os
+import os.path as osp
+import time
+
+from qtpy import QtCore
+
+from labelme.label_file import LabelFile
+from labelme.logger import logger
+
+try:
+    from os import scandir
+except ImportError:  # Python 2
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+
+class _DirEntry(object):
+    # the part of os.DirEntry used by scan_images, without os.scandir
+
+    def __init__(self, dirpath, name):
+        self.name = name
+        self.path = osp.join(dirpath, name)
+
+    def is_dir(self):
+        return osp.isdir(self.path)
+
+    def is_symlink(self):
+        return osp.islink(self.path)
+
+
+def _scandir(path):
+    try:
+        if scandir is None:
+            return [_DirEntry(path, name) for name in os.listdir(path)]
+        return list(scandir(path))
+    except OSError as e:
+        # os.walk skips the directories it can not list as well
+        logger.debug("Failed to list {}: {}".format(path, e))
+        return []
+
+
+def scan_images(folder, extensions, output_dir=None, cancelled=None):
+    """Yield (filename, has_label_file) of the images under folder.
+
+    The images are the ones os.walk finds, yielded in the order of their
+    lower-cased paths while the tree is walked, so that the first ones are
+    available long before the whole tree is listed. Whether the label file
+    of an image exists is looked up in the listing of its directory (or of
+    output_dir) instead of stat-ing every label file.
+    """
+    extensions = tuple(ext.lower() for ext in extensions)
+    output_names = None
+    if output_dir:
+        output_names = set(entry.name for entry in _scandir(output_dir))
+
+    def walk(path):
+        if cancelled is not None and cancelled():
+            return
+        entries = _scandir(path)
+        names = output_names
+        if names is None:
+            names = set(entry.name for entry in entries)
+
+        children = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                # like os.walk, don't follow symbolic links to directories
+                if not entry.is_symlink():
+                    # sorts the files of the directory like their paths
+                    children.append((entry.name.lower() + os.sep, entry))
+            elif entry.name.lower().endswith(extensions):
+                children.append((entry.name.lower(), entry))
+        children.sort(key=lambda child: child[0])
+
+        for key, entry in children:
+            if key.endswith(os.sep):
+                for image in walk(entry.path):
+                    yield image
+            else:
+                label_file = osp.splitext(entry.name)[0] + LabelFile.suffix
+                yield entry.path, label_file in names
+
+    return walk(folder)
+
+
+class DirScanner(QtCore.QThread):
+    """Scan a directory for images in a background thread.
+
+    The images are emitted in batches of (filename, has_label_file) in the
+    order of the file list, at least every batch_interval seconds while
+    images are found.
+    """
+
+    # emitted from the scanning thread, delivered in the GUI thread
+    found = QtCore.Signal(list)
+
+    def __init__(
+        self,
+        dirpath,
+        extensions,
+        output_dir=None,
+        batch_size=1000,
+        batch_interval=0.1,
+        parent=None,
+    ):
+        super(DirScanner, self).__init__(parent)
+        self.dirpath = dirpath
+        self.extensions = extensions
+        self.output_dir = output_dir
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self._cancelled = False
+
+    def cancel(self):
+        """Stop scanning, the pending batches are not emitted anymore."""
+        self._cancelled = True
+
+    def isCancelled(self):
+        return self._cancelled
+
+    def run(self):
+        batch = []
+        last_emit = time.time()
+        for image in scan_images(
+            self.dirpath,
+            self.extensions,
+            output_dir=self.output_dir,
+            cancelled=self.isCancelled,
+        ):
+            if self._cancelled:
+                return
+            batch.append(image)
+            now = time.time()
+            if (
+                len(batch) >= self.batch_size
+                or now - last_emit >= self.batch_interval
+            ):
+                self.found.emit(batch)
+                batch = []
+                last_emit = now
+        if batch and not self._cancelled:
+            self.found.emit(batch)
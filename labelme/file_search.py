@@ -0,0 +1,123 @@
+import fnmatch
+import os.path as osp
+import re
+import shlex
+
+
+class FileSearch(object):
+    """Search of the file list, parsed from the text of the search box.
+
+    The text is split into terms (quotes keep spaces), a file is listed if
+    it matches all of them:
+
+    - ``re:PATTERN``: the path matches the regular expression PATTERN.
+    - ``is:labeled``, ``is:unlabeled``: the image has a label file or not.
+    - ``label:NAME``: the label file has a shape labeled NAME.
+    - a glob (with ``*``, ``?`` or ``[``): matches the filename, or the
+      path if it contains a separator.
+    - anything else: substring of the path.
+
+    A term prefixed with ``-`` excludes the files it matches, e.g.
+    ``-label:cat``. Invalid terms are reported in error and match no file.
+    """
+
+    # cheapest first, the later terms only test the remaining files
+    _KINDS = ["substring", "glob", "regex", "labeled", "label"]
+
+    def __init__(self, text):
+        self.text = text
+        self.error = None
+        self._terms = []
+
+        try:
+            tokens = self._split(text)
+        except ValueError:
+            # e.g. unbalanced quotes while typing
+            tokens = text.split()
+        for token in tokens:
+            negated = token.startswith("-") and len(token) > 1
+            if negated:
+                token = token[1:]
+            term = self._parseTerm(token)
+            if term is not None:
+                self._terms.append(term + (negated,))
+        self._terms.sort(key=lambda term: self._KINDS.index(term[0]))
+
+    def __bool__(self):
+        return bool(self._terms) or self.error is not None
+
+    __nonzero__ = __bool__
+
+    @staticmethod
+    def _split(text):
+        # as shlex.split, but keeping the backslashes of regular
+        # expressions and Windows paths
+        lex = shlex.shlex(text, posix=True)
+        lex.whitespace_split = True
+        lex.escape = ""
+        return list(lex)
+
+    def _parseTerm(self, token):
+        if token.startswith("re:"):
+            try:
+                return "regex", re.compile(token[len("re:"):])
+            except re.error as e:
+                self.error = "Invalid regular expression {!r}: {}".format(
+                    token[len("re:"):], e
+                )
+                return None
+        if token in ["is:labeled", "is:unlabeled"]:
+            return "labeled", token == "is:labeled"
+        if token.startswith("label:") and len(token) > len("label:"):
+            return "label", token[len("label:"):]
+        if any(c in token for c in "*?["):
+            regex = fnmatch.translate(token)
+            match_path = "/" in token or osp.sep in token
+            if match_path and not osp.isabs(token):
+                # relative to any directory, e.g. sub/*.jpg
+                regex = r"(?:.*[/\\])?" + regex
+            return "glob", (re.compile(regex), match_path)
+        return "substring", token
+
+    def filter(self, filenames, rows, isLabeled, labelNames):
+        """Return the rows of filenames matching the search, in order.
+
+        isLabeled(row) tells if the image has a label file and
+        labelNames(row) returns the labels in it, only called for the
+        rows still matching the cheaper terms.
+        """
+        if self.error is not None:
+            return []
+        rows = list(rows)
+        for kind, value, negated in self._terms:
+            matching = self._filterTerm(
+                kind, value, filenames, rows, isLabeled, labelNames
+            )
+            if negated:
+                matching = set(matching)
+                rows = [row for row in rows if row not in matching]
+            else:
+                rows = matching
+        return rows
+
+    @staticmethod
+    def _filterTerm(kind, value, filenames, rows, isLabeled, labelNames):
+        if kind == "substring":
+            return [row for row in rows if value in filenames[row]]
+        if kind == "glob":
+            pattern, match_path = value
+            if match_path:
+                return [row for row in rows if pattern.match(filenames[row])]
+            return [
+                row
+                for row in rows
+                if pattern.match(osp.basename(filenames[row]))
+            ]
+        if kind == "regex":
+            return [row for row in rows if value.search(filenames[row])]
+        if kind == "labeled":
+            return [row for row in rows if isLabeled(row) == value]
+        assert kind == "label"
+        return [
+            row for row in rows if isLabeled(row) and value in labelNames(row)
+        ]
@@ -0,0 +1,140 @@
+import collections
+import os.path as osp
+
+from qtpy import QtCore
+from qtpy import QtGui
+
+from labelme.label_file import LabelFile
+from labelme.label_file import LabelFileError
+from labelme.logger import logger
+from labelme import utils
+
+
+def _getmtime(filename):
+    try:
+        return osp.getmtime(filename)
+    except OSError:
+        return None
+
+
+def load_prefetch_entry(filename, label_file):
+    """Load the label file (if any) and decode the image of filename.
+
+    This does the same work as MainWindow.loadFile up to the QImage
+    creation, so it is safe to run outside of the GUI thread.
+    """
+    label_file_mtime = _getmtime(label_file)
+    labelFile = None
+    if label_file_mtime is not None and LabelFile.is_label_file(label_file):
+        labelFile = LabelFile(label_file)
+        imageData = labelFile.imageData
+    else:
+        imageData = LabelFile.load_image_file(filename)
+    if not imageData:
+        return None
+    image = QtGui.QImage.fromData(imageData)
+    if image.isNull():
+        return None
+    return utils.struct(
+        filename=filename,
+        label_file=label_file,
+        label_file_mtime=label_file_mtime,
+        labelFile=labelFile,
+        imageData=imageData,
+        image=image,
+        nbytes=image.byteCount() + len(imageData),
+    )
+
+
+class _PrefetchJob(QtCore.QRunnable):
+    def __init__(self, prefetcher, key):
+        super(_PrefetchJob, self).__init__()
+        self._prefetcher = prefetcher
+        self._key = key
+
+    def run(self):
+        if self._key not in self._prefetcher._wanted:
+            # navigation moved on before the job started
+            self._prefetcher.loaded.emit(self._key, None)
+            return
+        filename, label_file = self._key
+        try:
+            entry = load_prefetch_entry(filename, label_file)
+        except (LabelFileError, IOError, OSError) as e:
+            logger.debug("Failed to prefetch {}: {}".format(filename, e))
+            entry = None
+        self._prefetcher.loaded.emit(self._key, entry)
+
+
+class ImagePrefetcher(QtCore.QObject):
+    """Decode images ahead of time for next/previous navigation.
+
+    Images are decoded in a thread pool and kept as ready-to-display
+    QImages in a LRU cache bounded by max_cache_bytes.
+    """
+
+    # emitted from the worker threads, delivered in the GUI thread
+    loaded = QtCore.Signal(object, object)
+
+    def __init__(self, max_cache_bytes, num_threads=2, parent=None):
+        super(ImagePrefetcher, self).__init__(parent)
+        self.max_cache_bytes = max_cache_bytes
+        self._cache = collections.OrderedDict()
+        self._cache_bytes = 0
+        self._pending = set()
+        self._wanted = set()
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(num_threads)
+        self.loaded.connect(self._onLoaded)
+
+    def prefetch(self, items):
+        """Schedule loading of (filename, label_file) in priority order."""
+        self._wanted = set(items)
+        for key in items:
+            if key in self._cache:
+                self._cache[key] = self._cache.pop(key)  # most recent
+                continue
+            if key in self._pending:
+                continue
+            self._pending.add(key)
+            self._pool.start(_PrefetchJob(self, key))
+
+    def take(self, filename, label_file):
+        """Return the cached entry for filename, or None if unavailable."""
+        key = (filename, label_file)
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if _getmtime(label_file) != entry.label_file_mtime:
+            # label file was modified (or created/removed) meanwhile
+            self._remove(key)
+            return None
+        self._cache[key] = self._cache.pop(key)  # most recent
+        return entry
+
+    def invalidate(self, filename):
+        for key in list(self._cache):
+            if filename in key:
+                self._remove(key)
+
+    def clear(self):
+        self._wanted = set()
+        self._cache.clear()
+        self._cache_bytes = 0
+
+    def _remove(self, key):
+        entry = self._cache.pop(key)
+        self._cache_bytes -= entry.nbytes
+
+    def _onLoaded(self, key, entry):
+        self._pending.discard(key)
+        if entry is None or key not in self._wanted:
+            return
+        if entry.nbytes > self.max_cache_bytes:
+            return
+        if key in self._cache:
+            self._remove(key)
+        self._cache[key] = entry
+        self._cache_bytes += entry.nbytes
+        while self._cache_bytes > self.max_cache_bytes:
+            self._remove(next(iter(self._cache)))
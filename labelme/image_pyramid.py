@@ -0,0 +1,133 @@
+import collections
+import math
+
+from qtpy import QtCore
+from qtpy import QtGui
+
+
+class ImagePyramid(object):
+    """Tiled, multi-resolution view of a pixmap used for painting.
+
+    Level 0 tiles are cut from the full resolution pixmap, level N tiles
+    cover tile_size * 2^N source pixels downsampled to tile_size, from the
+    2x2 tiles of level N-1 so that a tile never scales more than 4 tiles
+    worth of pixels. Tiles are created lazily when they first become
+    visible and kept in a LRU cache bounded by max_cache_bytes.
+    """
+
+    def __init__(self, pixmap, tile_size=512, max_cache_bytes=256 * 2 ** 20):
+        self.pixmap = pixmap
+        self.tile_size = tile_size
+        self.max_cache_bytes = max_cache_bytes
+        self._tiles = collections.OrderedDict()
+        self._cache_bytes = 0
+
+        size = max(pixmap.width(), pixmap.height(), 1)
+        self.max_level = max(0, int(math.ceil(math.log(size, 2))))
+
+    def levelForScale(self, scale):
+        # the finest level which still has at least one source pixel
+        # per screen pixel
+        if scale >= 1:
+            return 0
+        level = int(math.floor(math.log(1.0 / scale, 2)))
+        return min(level, self.max_level)
+
+    def tile(self, level, col, row):
+        key = (level, col, row)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles[key] = self._tiles.pop(key)  # most recent
+            return tile
+
+        if level == 0:
+            tile = self.pixmap.copy(self.tileRect(level, col, row))
+        else:
+            tile = self._downsample(level, col, row)
+
+        self._tiles[key] = tile
+        self._cache_bytes += self._tileBytes(tile)
+        while (
+            self._cache_bytes > self.max_cache_bytes and len(self._tiles) > 1
+        ):
+            _, evicted = self._tiles.popitem(last=False)
+            self._cache_bytes -= self._tileBytes(evicted)
+        return tile
+
+    def _downsample(self, level, col, row):
+        rect = self.tileRect(level, col, row)
+        if level == 1:
+            # the level 0 tiles side by side, without caching them
+            image = self.pixmap.copy(rect)
+        else:
+            image = self._joinChildren(level, col, row)
+        return image.scaled(
+            self._levelLength(rect.width(), level),
+            self._levelLength(rect.height(), level),
+            QtCore.Qt.IgnoreAspectRatio,
+            QtCore.Qt.SmoothTransformation,
+        )
+
+    def _joinChildren(self, level, col, row):
+        # the 2x2 tiles of level - 1 side by side
+        rect = self.tileRect(level, col, row)
+        factor = 2 ** (level - 1)
+        image = QtGui.QPixmap(
+            self._levelLength(rect.width(), level - 1),
+            self._levelLength(rect.height(), level - 1),
+        )
+        image.fill(QtCore.Qt.transparent)
+        painter = QtGui.QPainter(image)
+        painter.setCompositionMode(QtGui.QPainter.CompositionMode_Source)
+        for child_row in [2 * row, 2 * row + 1]:
+            for child_col in [2 * col, 2 * col + 1]:
+                child_rect = self.tileRect(level - 1, child_col, child_row)
+                if child_rect.isEmpty():
+                    continue  # beyond the image
+                painter.drawPixmap(
+                    (child_rect.x() - rect.x()) // factor,
+                    (child_rect.y() - rect.y()) // factor,
+                    self.tile(level - 1, child_col, child_row),
+                )
+        painter.end()
+        return image
+
+    @staticmethod
+    def _levelLength(length, level):
+        # of length source pixels in a tile of level
+        return max(1, int(math.ceil(length / 2.0 ** level)))
+
+    def tileRect(self, level, col, row):
+        """Return the source rect covered by a tile in image coordinates."""
+        extent = self.tile_size * 2 ** level
+        rect = QtCore.QRect(col * extent, row * extent, extent, extent)
+        return rect.intersected(self.pixmap.rect())
+
+    def paint(self, painter, rect, scale):
+        """Paint the tiles intersecting rect (in image coordinates)."""
+        rect = rect.intersected(QtCore.QRectF(self.pixmap.rect()))
+        if rect.isEmpty():
+            return
+        level = self.levelForScale(scale)
+        extent = self.tile_size * 2 ** level
+        col1 = int(rect.left() // extent)
+        col2 = int(math.ceil(rect.right() / extent))
+        row1 = int(rect.top() // extent)
+        row2 = int(math.ceil(rect.bottom() / extent))
+
+        painter.save()
+        # antialiased edges would leave visible seams between the tiles
+        painter.setRenderHint(QtGui.QPainter.Antialiasing, False)
+        for row in range(row1, row2):
+            for col in range(col1, col2):
+                tile = self.tile(level, col, row)
+                painter.drawPixmap(
+                    QtCore.QRectF(self.tileRect(level, col, row)),
+                    tile,
+                    QtCore.QRectF(tile.rect()),
+                )
+        painter.restore()
+
+    @staticmethod
+    def _tileBytes(tile):
+        return tile.width() * tile.height() * max(1, tile.depth() // 8)
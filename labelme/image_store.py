@@ -0,0 +1,45 @@
+import functools
+import hashlib
+import os
+import os.path as osp
+
+from labelme import batch
+from labelme import utils
+
+
+def _write(filename, data):
+    with open(filename, "wb") as f:
+        f.write(data)
+
+
+class ImageStore(object):
+    """Images in a directory, named by the SHA-256 of their content.
+
+    An image is stored once at root/ab/abcd....ext whatever the number of
+    label files referring to it, and a stored file never changes, so that
+    label files can refer to it by path instead of embedding its data.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def filename(self, image_data):
+        """Return the filename of the bytes of an image file in the store."""
+        digest = hashlib.sha256(image_data).hexdigest()
+        format = utils.img_data_to_pil(image_data).format
+        ext = ".jpg" if format == "JPEG" else "." + format.lower()
+        return osp.join(self.root, digest[:2], digest + ext)
+
+    def add(self, image_data):
+        """Store the bytes of an image file and return its filename."""
+        filename = self.filename(image_data)
+        if osp.exists(filename):
+            return filename
+        try:
+            os.makedirs(osp.dirname(filename))
+        except OSError:
+            # created by another process
+            if not osp.isdir(osp.dirname(filename)):
+                raise
+        batch.save_atomic(filename, functools.partial(_write, data=image_data))
+        return filename
@@ -1,21 +1,19 @@
 import base64
 import contextlib
+import functools
+import gc
 import io
 import json
+import os
 import os.path as osp
 
-import PIL.Image
-
+import labelme
 from labelme import __version__
 from labelme.logger import logger
 from labelme import PY2
-from labelme import QT4
 from labelme import utils
 
 
-PIL.Image.MAX_IMAGE_PIXELS = None
-
-
 @contextlib.contextmanager
 def open(name, mode):
     assert mode in ["r", "w"]
@@ -28,6 +26,73 @@ def open(name, mode):
     return
 
 
+def _json_loads_stdlib(data):
+    return json.loads(data.decode("utf-8"))
+
+
+# orjson or ujson parse label files several times faster, if installed
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    try:
+        from ujson import loads as _json_loads
+    except ImportError:
+        _json_loads = _json_loads_stdlib
+
+
+@contextlib.contextmanager
+def _gc_paused():
+    # the many objects created while loading a label file stay alive, the
+    # garbage collections triggered by their allocation would only walk
+    # them (about half of the time of orjson on a file of 10k shapes)
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _load_json(filename):
+    with io.open(filename, "rb") as f:
+        data = f.read()
+    with _gc_paused():
+        return _json_loads(data)
+
+
+def replace(src, dst):
+    """Rename src to dst, replacing dst like os.replace of Python 3."""
+    if hasattr(os, "replace"):
+        os.replace(src, dst)
+        return
+    if os.name == "nt" and osp.exists(dst):
+        # os.rename does not replace on Windows
+        os.remove(dst)
+    os.rename(src, dst)
+
+
+def save_atomic(filename, save):
+    """Call save(tmp_filename) and rename it to filename.
+
+    An interrupted save (e.g. a crash or an interrupted conversion) can not
+    leave a partial file, which would look up to date, and readers never
+    see a partially written file. The temporary file keeps the extension,
+    which tells the format to savers.
+    """
+    tmp_filename = osp.join(
+        osp.dirname(filename),
+        ".tmp-{}-{}".format(os.getpid(), osp.basename(filename)),
+    )
+    try:
+        save(tmp_filename)
+        replace(tmp_filename, filename)
+    except BaseException:
+        if osp.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+
+
 class LabelFileError(Exception):
     pass
 
@@ -36,38 +101,98 @@ class LabelFile(object):
 
     suffix = ".json"
 
-    def __init__(self, filename=None):
+    # keys of the shapes in the file which are not in their other_data
+    _shape_keys = frozenset(
+        ["label", "points", "group_id", "shape_type", "flags", "mask"]
+    )
+
+    # json.dump options of the saved label files
+    _json_options = dict(ensure_ascii=False, indent=2)
+
+    def __init__(self, filename=None, lazy=False):
         self.shapes = []
         self.imagePath = None
         self.imageData = None
         if filename is not None:
-            self.load(filename)
+            self.load(filename, lazy=lazy)
         self.filename = filename
 
+    @property
+    def shapes(self):
+        if self._shape_data is not None:
+            # deferred by load(lazy=True)
+            try:
+                self._shapes = self._load_shapes(self._shape_data)
+            except Exception as e:
+                raise LabelFileError(e)
+            self._shape_data = None
+        return self._shapes
+
+    @shapes.setter
+    def shapes(self, shapes):
+        self._shapes = shapes
+        self._shape_data = None
+
+    @property
+    def imageData(self):
+        if self._image_data_loader is not None:
+            # deferred by load(lazy=True)
+            try:
+                self._imageData = self._image_data_loader()
+            except Exception as e:
+                raise LabelFileError(e)
+            self._image_data_loader = None
+        return self._imageData
+
+    @imageData.setter
+    def imageData(self, imageData):
+        self._imageData = imageData
+        self._image_data_loader = None
+
     @staticmethod
     def load_image_file(filename):
+        # imported on first use as PIL imports numpy, utils.image lifts the
+        # image size limit of PIL
+        import labelme.utils.image  # noqa: F401
+        import PIL.Image
+
         try:
             image_pil = PIL.Image.open(filename)
         except IOError:
             logger.error("Failed opening image file: {}".format(filename))
             return
 
+        ext = osp.splitext(filename)[1].lower()
+        if PY2 and labelme.QT4:
+            format = "PNG"
+        elif ext in [".jpg", ".jpeg"]:
+            format = "JPEG"
+        else:
+            format = "PNG"
+
         # apply orientation to image according to exif
-        image_pil = utils.apply_exif_orientation(image_pil)
+        image_pil_oriented = utils.apply_exif_orientation(image_pil)
+
+        if image_pil_oriented is image_pil and image_pil.format == format:
+            # the file already holds what we would encode, so skip the
+            # decode -> encode round trip (and the JPEG re-compression)
+            image_pil.close()
+            with io.open(filename, "rb") as f:
+                return f.read()
 
         with io.BytesIO() as f:
-            ext = osp.splitext(filename)[1].lower()
-            if PY2 and QT4:
-                format = "PNG"
-            elif ext in [".jpg", ".jpeg"]:
-                format = "JPEG"
-            else:
-                format = "PNG"
-            image_pil.save(f, format=format)
+            image_pil_oriented.save(f, format=format)
             f.seek(0)
             return f.read()
 
-    def load(self, filename):
+    def load(self, filename, lazy=False):
+        """Load the label file filename.
+
+        If lazy, the shapes are converted and the image data read or
+        decoded only when shapes and imageData are first accessed, for the
+        callers which only need e.g. imagePath, flags or otherData. The
+        errors of these steps are then raised on access.
+        """
         keys = [
             "version",
             "imageData",
@@ -77,16 +202,8 @@ class LabelFile(object):
             "imageHeight",
             "imageWidth",
         ]
-        shape_keys = [
-            "label",
-            "points",
-            "group_id",
-            "shape_type",
-            "flags",
-        ]
         try:
-            with open(filename, "r") as f:
-                data = json.load(f)
+            data = _load_json(filename)
             version = data.get("version")
             if version is None:
                 logger.warn(
@@ -103,34 +220,20 @@ class LabelFile(object):
                     )
                 )
 
-            if data["imageData"] is not None:
-                imageData = base64.b64decode(data["imageData"])
-                if PY2 and QT4:
-                    imageData = utils.img_data_to_png_data(imageData)
-            else:
-                # relative path from label file to relative path from cwd
-                imagePath = osp.join(osp.dirname(filename), data["imagePath"])
-                imageData = self.load_image_file(imagePath)
             flags = data.get("flags") or {}
             imagePath = data["imagePath"]
-            self._check_image_height_and_width(
-                base64.b64encode(imageData).decode("utf-8"),
+            image_data_loader = functools.partial(
+                self._load_image_data,
+                filename,
+                data["imageData"],
+                imagePath,
                 data.get("imageHeight"),
                 data.get("imageWidth"),
             )
-            shapes = [
-                dict(
-                    label=s["label"],
-                    points=s["points"],
-                    shape_type=s.get("shape_type", "polygon"),
-                    flags=s.get("flags", {}),
-                    group_id=s.get("group_id"),
-                    other_data={
-                        k: v for k, v in s.items() if k not in shape_keys
-                    },
-                )
-                for s in data["shapes"]
-            ]
+            shape_data = data["shapes"]
+            if not lazy:
+                imageData = image_data_loader()
+                shapes = self._load_shapes(shape_data)
         except Exception as e:
             raise LabelFileError(e)
 
@@ -141,27 +244,91 @@ class LabelFile(object):
 
         # Only replace data after everything is loaded.
         self.flags = flags
-        self.shapes = shapes
+        if lazy:
+            self._shapes = None
+            self._shape_data = shape_data
+            self._imageData = None
+            self._image_data_loader = image_data_loader
+        else:
+            self.shapes = shapes
+            self.imageData = imageData
         self.imagePath = imagePath
-        self.imageData = imageData
         self.filename = filename
         self.otherData = otherData
 
+    @staticmethod
+    def _load_image_data(
+        filename, imageData, imagePath, imageHeight, imageWidth
+    ):
+        if imageData is not None:
+            imageData = base64.b64decode(imageData)
+            if PY2 and labelme.QT4:
+                imageData = utils.img_data_to_png_data(imageData)
+        else:
+            # relative path from label file to relative path from cwd
+            imagePath = osp.join(osp.dirname(filename), imagePath)
+            imageData = LabelFile.load_image_file(imagePath)
+        LabelFile._check_image_height_and_width(
+            imageData, imageHeight, imageWidth
+        )
+        return imageData
+
+    @classmethod
+    def _load_shapes(cls, shape_data):
+        with _gc_paused():
+            return [cls._load_shape(s) for s in shape_data]
+
+    @classmethod
+    def _load_shape(cls, s):
+        shape = dict(
+            label=s["label"],
+            points=s["points"],
+            shape_type=s.get("shape_type", "polygon"),
+            flags=s.get("flags", {}),
+            group_id=s.get("group_id"),
+            other_data={
+                k: v for k, v in s.items() if k not in cls._shape_keys
+            },
+        )
+        if shape["shape_type"] == "mask":
+            # run-length encoded in the file, see utils.mask_to_rle
+            shape["mask"] = utils.rle_to_mask(s["mask"])
+        return shape
+
+    @staticmethod
+    def load_summary(filename):
+        """Return the labels, shape count and image size of filename.
+
+        The shapes are not converted like in load, so that summarizing
+        many label files stays cheap.
+        """
+        try:
+            data = _load_json(filename)
+            return dict(
+                labels=set(s["label"] for s in data["shapes"]),
+                shape_count=len(data["shapes"]),
+                imageHeight=data.get("imageHeight"),
+                imageWidth=data.get("imageWidth"),
+            )
+        except Exception as e:
+            raise LabelFileError(e)
+
     @staticmethod
     def _check_image_height_and_width(imageData, imageHeight, imageWidth):
-        img_arr = utils.img_b64_to_arr(imageData)
-        if imageHeight is not None and img_arr.shape[0] != imageHeight:
+        # only the image header is read, no need to decode the pixels
+        height, width = utils.img_data_to_height_width(imageData)
+        if imageHeight is not None and height != imageHeight:
             logger.error(
                 "imageHeight does not match with imageData or imagePath, "
                 "so getting imageHeight from actual image."
             )
-            imageHeight = img_arr.shape[0]
-        if imageWidth is not None and img_arr.shape[1] != imageWidth:
+            imageHeight = height
+        if imageWidth is not None and width != imageWidth:
             logger.error(
                 "imageWidth does not match with imageData or imagePath, "
                 "so getting imageWidth from actual image."
             )
-            imageWidth = img_arr.shape[1]
+            imageWidth = width
         return imageHeight, imageWidth
 
     def save(
@@ -176,14 +343,21 @@ class LabelFile(object):
         flags=None,
     ):
         if imageData is not None:
-            imageData = base64.b64encode(imageData).decode("utf-8")
             imageHeight, imageWidth = self._check_image_height_and_width(
                 imageData, imageHeight, imageWidth
             )
+            imageData = base64.b64encode(imageData).decode("utf-8")
         if otherData is None:
             otherData = {}
         if flags is None:
             flags = {}
+        shapes = [
+            dict(shape, mask=utils.mask_to_rle(shape["mask"]))
+            if shape.get("shape_type") == "mask"
+            and not isinstance(shape["mask"], dict)
+            else shape
+            for shape in shapes
+        ]
         data = dict(
             version=__version__,
             flags=flags,
@@ -197,12 +371,18 @@ class LabelFile(object):
             assert key not in data
             data[key] = value
         try:
-            with open(filename, "w") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            save_atomic(
+                filename, functools.partial(self._save_json, data=data)
+            )
             self.filename = filename
         except Exception as e:
             raise LabelFileError(e)
 
+    @staticmethod
+    def _save_json(filename, data):
+        with open(filename, "w") as f:
+            json.dump(data, f, **LabelFile._json_options)
+
     @staticmethod
     def is_label_file(filename):
         return osp.splitext(filename)[1].lower() == LabelFile.suffix
@@ -0,0 +1,86 @@
+import collections
+import threading
+
+from qtpy import QtCore
+
+from labelme.label_file import LabelFile
+from labelme.logger import logger
+
+
+class _SaveJob(QtCore.QRunnable):
+    def __init__(self, writer, filename):
+        super(_SaveJob, self).__init__()
+        self._writer = writer
+        self._filename = filename
+
+    def run(self):
+        with self._writer._lock:
+            # the latest save of the file, queued since this job started
+            kwargs, context = self._writer._pending.pop(self._filename)
+            self._writer._writing = self._filename
+        error = None
+        try:
+            LabelFile().save(filename=self._filename, **kwargs)
+        except Exception as e:
+            # e.g. LabelFileError, reported in the GUI thread
+            logger.error("Failed to save {}: {}".format(self._filename, e))
+            error = str(e)
+        with self._writer._lock:
+            self._writer._writing = None
+            self._writer._results.append((self._filename, context, error))
+        self._writer._done.emit()
+
+
+class LabelWriter(QtCore.QObject):
+    """Save label files in a background thread.
+
+    The files are written one at a time in the order they are saved, by
+    LabelFile.save, which replaces the file atomically. A file saved again
+    before it was written is only written once, with the latest data.
+    saved(filename, context) or failed(filename, error) are emitted in the
+    GUI thread once it is written, context being the one given to save.
+    """
+
+    saved = QtCore.Signal(str, object)
+    failed = QtCore.Signal(str, str)
+
+    # emitted from the writer thread, delivered in the GUI thread
+    _done = QtCore.Signal()
+
+    def __init__(self, parent=None):
+        super(LabelWriter, self).__init__(parent)
+        self._lock = threading.Lock()
+        # filename -> (kwargs of LabelFile.save, context), not written yet
+        self._pending = collections.OrderedDict()
+        self._writing = None
+        self._results = []
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._done.connect(self._deliver)
+
+    def save(self, filename, context=None, **kwargs):
+        """Queue LabelFile.save(filename, **kwargs)."""
+        with self._lock:
+            queued = filename in self._pending
+            self._pending[filename] = (kwargs, context)
+        if not queued:
+            self._pool.start(_SaveJob(self, filename))
+
+    def isPending(self, filename):
+        """Return True if filename is queued or being written."""
+        with self._lock:
+            return filename in self._pending or filename == self._writing
+
+    def flush(self):
+        """Wait until the queued files are written and emit their signals."""
+        self._pool.waitForDone()
+        self._deliver()
+
+    def _deliver(self):
+        with self._lock:
+            results, self._results = self._results, []
+        for filename, context, error in results:
+            if error is None:
+                self.saved.emit(filename, context)
+            else:
+                self.failed.emit(filename, error)
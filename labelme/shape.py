@@ -1,16 +1,17 @@
 import copy
 import math
 
+try:
+    from collections.abc import MutableSequence
+except ImportError:  # Python 2
+    from collections import MutableSequence
+
 import numpy as np
 from qtpy import QtCore
 from qtpy import QtGui
 from qtpy.QtGui import QPolygonF
 
-import labelme.utils
-
-
-# TODO(unknown):
-# - [opt] Store paths instead of creating new ones at each paint.
+from labelme.utils import mask_origin
 
 
 DEFAULT_LINE_COLOR = QtGui.QColor(0, 255, 0, 128)  # bf hovering
@@ -21,6 +22,62 @@ DEFAULT_VERTEX_FILL_COLOR = QtGui.QColor(0, 255, 0, 255)  # hovering
 DEFAULT_HVERTEX_FILL_COLOR = QtGui.QColor(255, 255, 255, 255)  # hovering
 
 
+class _ShapePoints(MutableSequence):
+    """The points of a Shape as a list of QPointF.
+
+    Changes write through to the array storing the points of the shape.
+    """
+
+    def __init__(self, shape):
+        self._shape = shape
+
+    def __len__(self):
+        return len(self._shape)
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [
+                QtCore.QPointF(x, y)
+                for x, y in self._shape.pointsArray()[key].tolist()
+            ]
+        return self._shape[key]
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            points = self[:]
+            points[key] = value
+            self._shape.points = points
+        else:
+            self._shape[key] = value
+
+    def __delitem__(self, key):
+        if isinstance(key, slice):
+            key = list(range(len(self)))[key]
+        self._shape.removePoint(key)
+
+    def insert(self, i, point):
+        # as list.insert, e.g. append inserts at len(self)
+        if i < 0:
+            i = max(0, i + len(self))
+        self._shape.insertPoint(min(i, len(self)), point)
+
+    def __eq__(self, other):
+        if isinstance(other, _ShapePoints):
+            other = other[:]
+        return self[:] == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self[:])
+
+
 class Shape(object):
 
     P_SQUARE, P_ROUND = 0, 1
@@ -54,6 +111,7 @@ class Shape(object):
         self.shape_type = shape_type
         self.flags = flags
         self.other_data = {}
+        self.mask = None
 
         self._highlightIndex = None
         self._highlightMode = self.NEAR_VERTEX
@@ -78,6 +136,28 @@ class Shape(object):
         self.rotating_points = None
         self.rotating_center = None
 
+    @property
+    def points(self):
+        """The points as a list of QPointF, changes of which write through.
+
+        The points are stored as a float64 (N, 2) array, which
+        pointsArray returns without creating a QPointF for each point.
+        """
+        return _ShapePoints(self)
+
+    @points.setter
+    def points(self, value):
+        if isinstance(value, _ShapePoints):
+            value = value[:]
+        if isinstance(value, np.ndarray):
+            points = np.array(value, dtype=np.float64)
+        else:
+            points = np.array(
+                [[p.x(), p.y()] for p in value], dtype=np.float64
+            )
+        self._points = points.reshape(-1, 2)
+        self._invalidate()
+
     @property
     def shape_type(self):
         return self._shape_type
@@ -94,38 +174,75 @@ class Shape(object):
             "circle",
             "linestrip",
             "resizingshape",
+            "mask",
         ]:
             raise ValueError("Unexpected shape_type: {}".format(value))
         self._shape_type = value
+        self._invalidate()
+
+    @property
+    def mask(self):
+        """The bool mask of a shape of shape_type=mask.
+
+        Its points are the top left and bottom right corners of the mask,
+        which is moved with them but never edited.
+        """
+        return self._mask
+
+    @mask.setter
+    def mask(self, value):
+        self._mask = None if value is None else np.asarray(value, dtype=bool)
+        self._mask_image = None
+
+    def _invalidate(self):
+        # drop the paths cached from the points, to be called on every
+        # change of the points, shape_type or closed state
+        self._path = None
+        self._line_path = None
+        self._vrtx_path = None
+        self._vrtx_path_key = None
+        self._bounding_rect = None
 
     def close(self):
         self._closed = True
+        self._invalidate()
 
     def addPoint(self, point):
-        if self.points and point == self.points[0]:
+        if len(self) and point == self[0]:
             self.close()
         else:
-            self.points.append(point)
+            self._points = np.concatenate(
+                [self._points, [[point.x(), point.y()]]]
+            )
+            self._invalidate()
 
     def canAddPoint(self):
         return self.shape_type in ["polygon", "linestrip"]
 
     def popPoint(self):
-        if self.points:
-            return self.points.pop()
+        if len(self):
+            point = self[-1]
+            self._points = self._points[:-1].copy()
+            self._invalidate()
+            return point
         return None
 
     def insertPoint(self, i, point):
-        self.points.insert(i, point)
+        self._points = np.insert(
+            self._points, i, [point.x(), point.y()], axis=0
+        )
+        self._invalidate()
 
     def removePoint(self, i):
-        self.points.pop(i)
+        self._points = np.delete(self._points, i, axis=0)
+        self._invalidate()
 
     def isClosed(self):
         return self._closed
 
     def setOpen(self):
         self._closed = False
+        self._invalidate()
 
     def getRectFromLine(self, pt1, pt2):
         x1, y1 = pt1.x(), pt1.y()
@@ -173,8 +290,50 @@ class Shape(object):
             painter.drawPath(vrtx_path)
             painter.fillPath(vrtx_path, self.vertex_fill_color)
 
+    def paintMask(self, painter):
+        if self.mask is None or not len(self):
+            return
+        if self.fill:
+            color = (
+                self.select_fill_color if self.selected else self.fill_color
+            )
+        else:
+            color = self.line_color
+        x, y = mask_origin(self._points)
+        height, width = self.mask.shape
+        painter.save()
+        # the pixels of the mask stay square when zoomed in
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform, False)
+        painter.drawImage(
+            QtCore.QRectF(x, y, width, height), self.makeMaskImage(color)
+        )
+        painter.restore()
+        if self.selected or self.fill:
+            pen = QtGui.QPen(
+                self.select_line_color if self.selected else self.line_color
+            )
+            pen.setWidth(max(1, int(round(2.0 / self.scale))))
+            painter.setPen(pen)
+            painter.drawPath(self.makeLinePath())
+
+    def makeMaskImage(self, color):
+        """Return the (cached) image of the mask drawn with color."""
+        key = color.rgba()
+        if self._mask_image is not None and self._mask_image[0] == key:
+            return self._mask_image[1]
+        height, width = self.mask.shape
+        pixels = np.zeros((height, width), dtype=np.uint32)
+        pixels[self.mask] = key
+        image = QtGui.QImage(
+            pixels.data, width, height, width * 4, QtGui.QImage.Format_ARGB32
+        ).copy()  # not to share the memory of pixels
+        self._mask_image = (key, image)
+        return image
+
     def paint(self, painter):
-        if self.points:
+        if self.shape_type == "mask":
+            self.paintMask(painter)
+        elif len(self):
             color = (
                 self.select_line_color if self.selected else self.line_color
             )
@@ -183,44 +342,22 @@ class Shape(object):
             pen.setWidth(max(1, int(round(2.0 / self.scale))))
             painter.setPen(pen)
 
-            line_path = QtGui.QPainterPath()
-            vrtx_path = QtGui.QPainterPath()
+            line_path = self.makeLinePath()
+            vrtx_path = self.makeVertexPath()
+
+            if (
+                self.shape_type == "resizingshape"
+                and len(self) == 2
+                and self.inner_points is not None
+            ):
+                # paint inner shape
+                self.paintInnerShape(painter)
+                self.fill = False
 
-            if self.shape_type in ["rectangle", "resizingshape"]:
-                assert len(self.points) in [1, 2]
-                if len(self.points) == 2:
-                    rectangle = self.getRectFromLine(*self.points)
-                    line_path.addRect(rectangle)
-                    # paint inner shape
-                    if self.shape_type == "resizingshape" and self.inner_points is not None:
-                        self.paintInnerShape(painter)
-                        self.fill = False
-                for i in range(len(self.points)):
-                    self.drawVertex(vrtx_path, i)
-            elif self.shape_type == "circle":
-                assert len(self.points) in [1, 2]
-                if len(self.points) == 2:
-                    rectangle = self.getCircleRectFromLine(self.points)
-                    line_path.addEllipse(rectangle)
-                for i in range(len(self.points)):
-                    self.drawVertex(vrtx_path, i)
-            elif self.shape_type == "linestrip":
-                line_path.moveTo(self.points[0])
-                for i, p in enumerate(self.points):
-                    line_path.lineTo(p)
-                    self.drawVertex(vrtx_path, i)
+            if self._highlightIndex is not None:
+                self._vertex_fill_color = self.hvertex_fill_color
             else:
-                line_path.moveTo(self.points[0])
-                # Uncommenting the following line will draw 2 paths
-                # for the 1st vertex, and make it non-filled, which
-                # may be desirable.
-                # self.drawVertex(vrtx_path, 0)
-
-                for i, p in enumerate(self.points):
-                    line_path.lineTo(p)
-                    self.drawVertex(vrtx_path, i)
-                if self.isClosed():
-                    line_path.lineTo(self.points[0])
+                self._vertex_fill_color = self.vertex_fill_color
 
             painter.drawPath(line_path)
             painter.drawPath(vrtx_path)
@@ -233,6 +370,61 @@ class Shape(object):
                 )
                 painter.fillPath(line_path, color)
 
+    def makeLinePath(self):
+        """Return the (cached) path of the outline drawn by paint."""
+        if self._line_path is not None:
+            return self._line_path
+
+        points = self.points[:]
+        line_path = QtGui.QPainterPath()
+        if self.shape_type in ["rectangle", "resizingshape", "mask"]:
+            assert len(points) in [1, 2]
+            if len(points) == 2:
+                rectangle = self.getRectFromLine(*points)
+                line_path.addRect(rectangle)
+        elif self.shape_type == "circle":
+            assert len(points) in [1, 2]
+            if len(points) == 2:
+                rectangle = self.getCircleRectFromLine(points)
+                line_path.addEllipse(rectangle)
+        elif self.shape_type == "linestrip":
+            line_path.moveTo(points[0])
+            for p in points:
+                line_path.lineTo(p)
+        else:
+            line_path.moveTo(points[0])
+            # Uncommenting the following line will draw 2 paths
+            # for the 1st vertex, and make it non-filled, which
+            # may be desirable.
+            # self.drawVertex(vrtx_path, 0)
+
+            for p in points:
+                line_path.lineTo(p)
+            if self.isClosed():
+                line_path.lineTo(points[0])
+        self._line_path = line_path
+        return line_path
+
+    def makeVertexPath(self):
+        """Return the (cached) path of the vertices drawn by paint."""
+        # vertex size depends on the zoom and the highlighted vertex
+        key = (
+            self.scale,
+            self.point_size,
+            self.point_type,
+            self._highlightIndex,
+            self._highlightMode,
+        )
+        if self._vrtx_path is not None and self._vrtx_path_key == key:
+            return self._vrtx_path
+
+        vrtx_path = QtGui.QPainterPath()
+        for i in range(len(self)):
+            self.drawVertex(vrtx_path, i)
+        self._vrtx_path = vrtx_path
+        self._vrtx_path_key = key
+        return vrtx_path
+
     def drawInnerVertex(self, path, point):
         d = self.point_size / self.scale
         path.addEllipse(point, d / 2.0, d / 2.0)
@@ -240,7 +432,7 @@ class Shape(object):
     def drawVertex(self, path, i):
         d = self.point_size / self.scale
         shape = self.point_type
-        point = self.points[i]
+        point = self[i]
         if i == self._highlightIndex:
             size, shape = self._highlightSettings[self._highlightMode]
             d *= size
@@ -255,28 +447,62 @@ class Shape(object):
         else:
             assert False, "unsupported vertex shape"
 
+    def pointsArray(self):
+        """Return the points as a float64 array of shape (N, 2).
+
+        This is the storage of the shape, so it must not be modified.
+        """
+        return self._points
+
     def nearestVertex(self, point, epsilon):
-        min_distance = float("inf")
-        min_i = None
-        for i, p in enumerate(self.points):
-            dist = labelme.utils.distance(p - point)
-            if dist <= epsilon and dist < min_distance:
-                min_distance = dist
-                min_i = i
-        return min_i
+        points = self.pointsArray()
+        if len(points) == 0 or self.shape_type == "mask":
+            return None
+        dist = np.sqrt(
+            ((points - [point.x(), point.y()]) ** 2).sum(axis=1)
+        )
+        # argmin returns the first of equally near vertices
+        i = int(np.argmin(dist))
+        if dist[i] <= epsilon:
+            return i
+        return None
 
     def nearestEdge(self, point, epsilon):
-        min_distance = float("inf")
-        post_i = None
-        for i in range(len(self.points)):
-            line = [self.points[i - 1], self.points[i]]
-            dist = labelme.utils.distancetoline(point, line)
-            if dist <= epsilon and dist < min_distance:
-                min_distance = dist
-                post_i = i
-        return post_i
+        # edge i goes from vertex i - 1 to vertex i, see distancetoline
+        p2 = self.pointsArray()
+        if len(p2) == 0 or self.shape_type == "mask":
+            return None
+        p1 = np.roll(p2, 1, axis=0)
+        p3 = np.array([point.x(), point.y()])
+        v = p2 - p1
+        length = np.sqrt((v ** 2).sum(axis=1))
+        before_p1 = ((p3 - p1) * v).sum(axis=1) < 0
+        after_p2 = ((p3 - p2) * -v).sum(axis=1) < 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dist = (
+                np.abs(v[:, 0] * (p1 - p3)[:, 1] - v[:, 1] * (p1 - p3)[:, 0])
+                / length
+            )
+        dist = np.where(
+            after_p2, np.sqrt(((p3 - p2) ** 2).sum(axis=1)), dist
+        )
+        dist = np.where(
+            before_p1, np.sqrt(((p3 - p1) ** 2).sum(axis=1)), dist
+        )
+        # degenerated edges never match, as with distancetoline
+        dist[np.isnan(dist)] = np.inf
+        i = int(np.argmin(dist))
+        if dist[i] <= epsilon:
+            return i
+        return None
 
     def containsPoint(self, point):
+        if self.shape_type == "mask" and self.mask is not None:
+            x0, y0 = mask_origin(self._points)
+            x = int(math.floor(point.x())) - x0
+            y = int(math.floor(point.y())) - y0
+            height, width = self.mask.shape
+            return 0 <= x < width and 0 <= y < height and bool(self.mask[y, x])
         return self.makePath().contains(point)
 
     def getCircleRectFromLine(self, line):
@@ -290,30 +516,43 @@ class Shape(object):
         return rectangle
 
     def makePath(self):
-        if self.shape_type in ["rectangle", "resizingshape"]:
+        if self._path is not None:
+            return self._path
+        points = self.points[:]
+        if self.shape_type in ["rectangle", "resizingshape", "mask"]:
             path = QtGui.QPainterPath()
-            if len(self.points) == 2:
-                rectangle = self.getRectFromLine(*self.points)
+            if len(points) == 2:
+                rectangle = self.getRectFromLine(*points)
                 path.addRect(rectangle)
         elif self.shape_type == "circle":
             path = QtGui.QPainterPath()
-            if len(self.points) == 2:
-                rectangle = self.getCircleRectFromLine(self.points)
+            if len(points) == 2:
+                rectangle = self.getCircleRectFromLine(points)
                 path.addEllipse(rectangle)
         else:
-            path = QtGui.QPainterPath(self.points[0])
-            for p in self.points[1:]:
+            path = QtGui.QPainterPath(points[0])
+            for p in points[1:]:
                 path.lineTo(p)
+        self._path = path
         return path
 
     def boundingRect(self):
-        return self.makePath().boundingRect()
+        if self._bounding_rect is None:
+            rect = self.makePath().boundingRect()
+            if rect.isNull() and len(self):
+                # the path of a single point has a null rect at the origin
+                x, y = self._points.min(axis=0)
+                rect = QtCore.QRectF(x, y, 0, 0)
+            self._bounding_rect = rect
+        return QtCore.QRectF(self._bounding_rect)
 
     def moveBy(self, offset):
-        self.points = [p + offset for p in self.points]
+        self._points = self._points + [offset.x(), offset.y()]
+        self._invalidate()
 
     def moveVertexBy(self, i, offset):
-        self.points[i] = self.points[i] + offset
+        self._points[i] += [offset.x(), offset.y()]
+        self._invalidate()
 
     def highlightVertex(self, i, action):
         self._highlightIndex = i
@@ -323,16 +562,55 @@ class Shape(object):
         self._highlightIndex = None
 
     def copy(self):
-        return copy.deepcopy(self)
+        # cheaper than deepcopy, which would copy every attribute
+        # including the colors; the cached paths are never modified
+        # in place so they can be shared until either shape changes,
+        # copy.copy drops them like pickling (see __getstate__)
+        shape = copy.copy(self)
+        for key in self._cache_keys:
+            setattr(shape, key, getattr(self, key))
+        shape._points = self._points.copy()
+        shape.flags = copy.deepcopy(self.flags)
+        shape.other_data = copy.deepcopy(self.other_data)
+        for key in ["inner_points", "last_inner_points"]:
+            value = getattr(self, key)
+            if value is not None:
+                setattr(shape, key, value.copy())
+        for key in ["resizing_box_points", "rotating_points"]:
+            value = getattr(self, key)
+            if value is not None:
+                setattr(shape, key, list(value))
+        return shape
+
+    # the paths and images cached from the points and mask
+    _cache_keys = [
+        "_path",
+        "_line_path",
+        "_vrtx_path",
+        "_vrtx_path_key",
+        "_bounding_rect",
+        "_mask_image",
+    ]
+
+    def __getstate__(self):
+        # QPainterPath can not be deep-copied or pickled
+        state = self.__dict__.copy()
+        for key in self._cache_keys:
+            state[key] = None
+        return state
 
     def __len__(self):
-        return len(self.points)
+        return len(self._points)
 
     def __getitem__(self, key):
-        return self.points[key]
+        if isinstance(key, slice):
+            return self.points[key]
+        x, y = self._points[key].tolist()
+        return QtCore.QPointF(x, y)
 
     def __setitem__(self, key, value):
-        self.points[key] = value
+        self._points[key] = [value.x(), value.y()]
+        self._invalidate()
 
     def start_resizing_basicshape(self, inner_points=None):
         self.shape_type = "resizingshape"
@@ -344,13 +622,13 @@ class Shape(object):
 
     def stop_resizing_basicshape(self):
         self.shape_type = "polygon"
-        self.resizing_box_points = self.points
-        self.points = [QtCore.QPointF(p[0], p[1]) for p in self.last_inner_points]
+        self.resizing_box_points = self.points[:]  # not the view
+        self.points = self.last_inner_points
 
     def start_resizing_polygon(self):
         if self.shape_type == "polygon":
             self.shape_type = "resizingshape"
-            self.inner_points = np.array([[p.x(), p.y()] for p in self.points])
+            self.inner_points = self._points.copy()
             self.last_inner_points = self.inner_points.copy()
 
             x1, y1 = self.last_inner_points.min(axis=0)
@@ -364,10 +642,10 @@ class Shape(object):
         if self.shape_type == "resizingshape":
             self.shape_type = "polygon"
             if self.last_inner_points is not None:
-                self.points = [QtCore.QPointF(p[0], p[1]) for p in self.last_inner_points]
+                self.points = self.last_inner_points
 
     def startRotatePolygon(self):
-        self.rotating_points = self.points.copy()
+        self.rotating_points = self.points[:]
         # points = np.array([[p.x(), p.y()] for p in self.points])
         # x1, y1 = points.min(axis=0)
         # x2, y2 = points.max(axis=0)
@@ -0,0 +1,189 @@
+import numpy as np
+
+from labelme import utils
+
+
+def get_shape_state(shape):
+    """Return the editable state of shape, see set_shape_state."""
+    state = dict(
+        label=shape.label,
+        group_id=shape.group_id,
+        flags=None if shape.flags is None else dict(shape.flags),
+        shape_type=shape.shape_type,
+        points=shape.pointsArray().copy(),
+        closed=shape.isClosed(),
+    )
+    for key in ["inner_points", "last_inner_points"]:
+        value = getattr(shape, key)
+        state[key] = None if value is None else value.copy()
+    state["resizing_box_points"] = (
+        None
+        if shape.resizing_box_points is None
+        else list(shape.resizing_box_points)
+    )
+    return state
+
+
+def set_shape_state(shape, state):
+    shape.label = state["label"]
+    shape.group_id = state["group_id"]
+    shape.flags = None if state["flags"] is None else dict(state["flags"])
+    shape.shape_type = state["shape_type"]
+    shape.points = state["points"]
+    if state["closed"]:
+        shape.close()
+    else:
+        shape.setOpen()
+    for key in ["inner_points", "last_inner_points"]:
+        value = state[key]
+        setattr(shape, key, None if value is None else value.copy())
+    shape.resizing_box_points = (
+        None
+        if state["resizing_box_points"] is None
+        else list(state["resizing_box_points"])
+    )
+
+
+def _changes(added=(), removed=(), modified=(), reordered=False):
+    return utils.struct(
+        added=list(added),
+        removed=list(removed),
+        modified=list(modified),
+        reordered=reordered,
+    )
+
+
+def shape_states_equal(state1, state2):
+    for key in state1:
+        value1, value2 = state1[key], state2[key]
+        if isinstance(value1, np.ndarray) or isinstance(value2, np.ndarray):
+            if value1 is None or value2 is None:
+                return False
+            if not np.array_equal(value1, value2):
+                return False
+        elif value1 != value2:
+            return False
+    return True
+
+
+class AddShapes(object):
+    """Shapes inserted at the given indices of canvas.shapes."""
+
+    def __init__(self, items):
+        # [(index, shape)] in ascending index order
+        self.items = sorted(items, key=lambda item: item[0])
+
+    def undo(self, canvas):
+        shapes = [shape for _, shape in self.items]
+        canvas.removeShapes(shapes)
+        return _changes(removed=shapes)
+
+    def redo(self, canvas):
+        canvas.insertShapes(self.items)
+        shapes = [shape for _, shape in self.items]
+        return _changes(added=shapes)
+
+
+class RemoveShapes(AddShapes):
+    """Shapes removed from the given indices of canvas.shapes."""
+
+    def undo(self, canvas):
+        return super(RemoveShapes, self).redo(canvas)
+
+    def redo(self, canvas):
+        return super(RemoveShapes, self).undo(canvas)
+
+
+class ModifyShapes(object):
+    """Shapes edited in place, e.g. moved, rotated or relabeled."""
+
+    def __init__(self, changes):
+        # [(shape, state_before, state_after)]
+        self.changes = changes
+
+    def undo(self, canvas):
+        return self._apply(canvas, 1)
+
+    def redo(self, canvas):
+        return self._apply(canvas, 2)
+
+    def _apply(self, canvas, i):
+        shapes = []
+        for change in self.changes:
+            shape = change[0]
+            set_shape_state(shape, change[i])
+            canvas.shapeIndex.update(shape)
+            shapes.append(shape)
+        return _changes(modified=shapes)
+
+
+class ReplaceShapes(object):
+    """canvas.shapes replaced by another list, e.g. reordered."""
+
+    def __init__(self, before, after):
+        self.before = list(before)
+        self.after = list(after)
+
+    def undo(self, canvas):
+        return self._apply(canvas, self.after, self.before)
+
+    def redo(self, canvas):
+        return self._apply(canvas, self.before, self.after)
+
+    def _apply(self, canvas, current, shapes):
+        canvas.shapes = list(shapes)
+        canvas.shapeIndex.rebuild(canvas.shapes)
+        kept = set(shapes)
+        removed = [shape for shape in current if shape not in kept]
+        kept = set(current)
+        added = [shape for shape in shapes if shape not in kept]
+        return _changes(added=added, removed=removed, reordered=True)
+
+
+class ShapeHistory(object):
+    """Undo/redo stack of the edits of the canvas shapes.
+
+    Instead of snapshots of the whole scene, each entry only records what
+    an edit changed: the added/removed shapes or the states of the
+    modified shapes before and after the edit.
+    """
+
+    def __init__(self, max_depth=10):
+        self.max_depth = max_depth
+        self._undo = []
+        self._redo = []
+
+    def canUndo(self):
+        return bool(self._undo)
+
+    def canRedo(self):
+        return bool(self._redo)
+
+    def push(self, command):
+        self._undo.append(command)
+        if len(self._undo) > self.max_depth:
+            del self._undo[: len(self._undo) - self.max_depth]
+        self._redo = []
+
+    def pop(self):
+        """Forget the last command without undoing it."""
+        self._redo = []
+        return self._undo.pop()
+
+    def undo(self, canvas):
+        if not self._undo:
+            return None
+        command = self._undo.pop()
+        self._redo.append(command)
+        return command.undo(canvas)
+
+    def redo(self, canvas):
+        if not self._redo:
+            return None
+        command = self._redo.pop()
+        self._undo.append(command)
+        return command.redo(canvas)
+
+    def clear(self):
+        self._undo = []
+        self._redo = []
@@ -0,0 +1,142 @@
+import collections
+import itertools
+import math
+
+
+class ShapeIndex(object):
+    """Uniform grid over the bounding rects of the canvas shapes.
+
+    Used to find the shapes which may be under the cursor without testing
+    every shape. Each shape keeps the order in which it was inserted, so
+    that query results can be returned top-most (last drawn) first like
+    iterating over reversed(canvas.shapes). Shapes spanning more than
+    max_cells cells are not put in the grid and are always returned as
+    candidates instead.
+    """
+
+    def __init__(self, cell_size=128, max_cells=1024):
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self._counter = itertools.count()
+        self._cells = collections.defaultdict(set)
+        self._large = set()
+        # shape -> (order, rect, cells)
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, shape):
+        return shape in self._entries
+
+    def clear(self):
+        self._counter = itertools.count()
+        self._cells.clear()
+        self._large.clear()
+        self._entries.clear()
+
+    def rebuild(self, shapes):
+        self.clear()
+        for shape in shapes:
+            self.insert(shape)
+
+    def insert(self, shape):
+        """Add shape on top of the previously inserted ones."""
+        self._add(shape, next(self._counter))
+
+    def remove(self, shape):
+        entry = self._entries.pop(shape, None)
+        if entry is None:
+            return
+        _, _, cells = entry
+        if cells is None:
+            self._large.discard(shape)
+            return
+        for cell in cells:
+            members = self._cells[cell]
+            members.discard(shape)
+            if not members:
+                del self._cells[cell]
+
+    def update(self, shape):
+        """Re-index shape after its points changed, keeping its order.
+
+        Shapes which are not indexed (e.g. the shadow copies of shapes
+        being moved) are ignored.
+        """
+        entry = self._entries.get(shape)
+        if entry is None:
+            return
+        self.remove(shape)
+        self._add(shape, entry[0])
+
+    def query(self, point, margin=0):
+        """Return the shapes whose bounding rect (grown by margin) contains
+        point, top-most first."""
+        x, y = point.x(), point.y()
+        candidates = set(self._large)
+        col1, row1 = self._cell(x - margin, y - margin)
+        col2, row2 = self._cell(x + margin, y + margin)
+        for col in range(col1, col2 + 1):
+            for row in range(row1, row2 + 1):
+                candidates.update(self._cells.get((col, row), ()))
+
+        found = []
+        for shape in candidates:
+            order, (x1, y1, x2, y2), _ = self._entries[shape]
+            if (
+                x1 - margin <= x <= x2 + margin
+                and y1 - margin <= y <= y2 + margin
+            ):
+                found.append((order, shape))
+        found.sort(key=lambda item: item[0], reverse=True)
+        return [shape for _, shape in found]
+
+    def queryRect(self, rect, margin=0):
+        """Return the shapes whose bounding rect (grown by margin)
+        intersects rect, bottom-most (first drawn) first."""
+        x1, y1 = rect.left() - margin, rect.top() - margin
+        x2, y2 = rect.right() + margin, rect.bottom() + margin
+        col1, row1 = self._cell(x1, y1)
+        col2, row2 = self._cell(x2, y2)
+        if (col2 - col1 + 1) * (row2 - row1 + 1) > len(self._entries):
+            # cheaper to test every shape than to visit every cell
+            candidates = self._entries
+        else:
+            candidates = set(self._large)
+            for col in range(col1, col2 + 1):
+                for row in range(row1, row2 + 1):
+                    candidates.update(self._cells.get((col, row), ()))
+
+        found = []
+        for shape in candidates:
+            order, (sx1, sy1, sx2, sy2), _ = self._entries[shape]
+            if sx1 <= x2 and x1 <= sx2 and sy1 <= y2 and y1 <= sy2:
+                found.append((order, shape))
+        found.sort(key=lambda item: item[0])
+        return [shape for _, shape in found]
+
+    def _add(self, shape, order):
+        rect = shape.boundingRect()
+        x1, y1 = rect.left(), rect.top()
+        x2, y2 = rect.right(), rect.bottom()
+        col1, row1 = self._cell(x1, y1)
+        col2, row2 = self._cell(x2, y2)
+        if (col2 - col1 + 1) * (row2 - row1 + 1) > self.max_cells:
+            cells = None
+            self._large.add(shape)
+        else:
+            cells = [
+                (col, row)
+                for col in range(col1, col2 + 1)
+                for row in range(row1, row2 + 1)
+            ]
+            for cell in cells:
+                self._cells[cell].add(shape)
+        self._entries[shape] = (order, (x1, y1, x2, y2), cells)
+
+    def _cell(self, x, y):
+        return (
+            int(math.floor(x / self.cell_size)),
+            int(math.floor(y / self.cell_size)),
+        )
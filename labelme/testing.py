@@ -1,7 +1,7 @@
+import base64
 import json
 import os.path as osp
 
-import imgviz
 import labelme.utils
 
 
@@ -16,11 +16,12 @@ def assert_labelfile_sanity(filename):
         parent_dir = osp.dirname(filename)
         img_file = osp.join(parent_dir, data["imagePath"])
         assert osp.exists(img_file)
-        img = imgviz.io.imread(img_file)
+        with open(img_file, "rb") as f:
+            img_data = f.read()
     else:
-        img = labelme.utils.img_b64_to_arr(imageData)
+        img_data = base64.b64decode(imageData)
 
-    H, W = img.shape[:2]
+    H, W = labelme.utils.img_data_to_height_width(img_data)
     assert H == data["imageHeight"]
     assert W == data["imageWidth"]
 
@@ -1,27 +1,62 @@
 # flake8: noqa
 
-from ._io import lblsave
-
-from .image import apply_exif_orientation
-from .image import img_arr_to_b64
-from .image import img_b64_to_arr
-from .image import img_data_to_arr
-from .image import img_data_to_pil
-from .image import img_data_to_png_data
-from .image import img_pil_to_data
-
-from .shape import labelme_shapes_to_label
-from .shape import masks_to_bboxes
-from .shape import polygons_to_mask
-from .shape import shape_to_mask
-from .shape import shapes_to_label
-
-from .qt import newIcon
-from .qt import newButton
-from .qt import newAction
-from .qt import addActions
-from .qt import labelValidator
-from .qt import struct
-from .qt import distance
-from .qt import distancetoline
-from .qt import fmtShortcut
+import importlib
+import sys
+
+
+# name -> submodule defining it, imported on first use (PEP 562) so that
+# e.g. LabelFile does not import Qt, which only the GUI helpers need
+_exports = {
+    "lblsave": "_io",
+    "apply_exif_orientation": "image",
+    "img_arr_to_b64": "image",
+    "img_b64_to_arr": "image",
+    "img_data_to_arr": "image",
+    "img_data_to_height_width": "image",
+    "img_data_to_pil": "image",
+    "img_data_to_png_data": "image",
+    "img_pil_to_data": "image",
+    "labelme_shapes_to_label": "shape",
+    "mask_origin": "shape",
+    "mask_to_rle": "shape",
+    "masks_to_bboxes": "shape",
+    "polygons_to_mask": "shape",
+    "rle_to_mask": "shape",
+    "shape_area": "shape",
+    "shape_bbox": "shape",
+    "shape_to_cropped_mask": "shape",
+    "shape_to_mask": "shape",
+    "shapes_to_label": "shape",
+    "shapes_to_masks": "shape",
+    "newIcon": "qt",
+    "newButton": "qt",
+    "newAction": "qt",
+    "addActions": "qt",
+    "labelValidator": "qt",
+    "struct": "qt",
+    "distance": "qt",
+    "distancetoline": "qt",
+    "fmtShortcut": "qt",
+}
+
+
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name)
+        )
+    module = importlib.import_module("." + _exports[name], __name__)
+    value = getattr(module, name)
+    globals()[name] = value  # __getattr__ is not called for it again
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports))
+
+
+if sys.version_info < (3, 7):
+    # no module __getattr__ (PEP 562)
+    for _name in _exports:
+        __getattr__(_name)
+    del _name
@@ -7,6 +7,9 @@ import PIL.Image
 import PIL.ImageOps
 
 
+PIL.Image.MAX_IMAGE_PIXELS = None
+
+
 def img_data_to_pil(img_data):
     f = io.BytesIO()
     f.write(img_data)
@@ -20,6 +23,13 @@ def img_data_to_arr(img_data):
     return img_arr
 
 
+def img_data_to_height_width(img_data):
+    # PIL.Image.open only parses the header, pixels are decoded lazily
+    img_pil = img_data_to_pil(img_data)
+    width, height = img_pil.size
+    return height, width
+
+
 def img_b64_to_arr(img_b64):
     img_data = base64.b64decode(img_b64)
     img_arr = img_data_to_arr(img_data)
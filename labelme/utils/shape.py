@@ -4,6 +4,7 @@ import uuid
 import numpy as np
 import PIL.Image
 import PIL.ImageDraw
+import six
 
 from labelme.logger import logger
 
@@ -16,42 +17,286 @@ def polygons_to_mask(img_shape, polygons, shape_type=None):
     return shape_to_mask(img_shape, points=polygons, shape_type=shape_type)
 
 
-def shape_to_mask(
-    img_shape, points, shape_type=None, line_width=10, point_size=5
+def _counts_to_string(counts):
+    # LEB128-like encoding of the differences of the counts, as the
+    # rleToString of the COCO API
+    chars = []
+    for i, x in enumerate(counts):
+        if i > 2:
+            x -= counts[i - 2]
+        more = True
+        while more:
+            c = x & 0x1F
+            x >>= 5
+            more = x != -1 if c & 0x10 else x != 0
+            if more:
+                c |= 0x20
+            chars.append(chr(c + 48))
+    return "".join(chars)
+
+
+def _string_to_counts(string):
+    # inverse of _counts_to_string, as the rleFrString of the COCO API
+    counts = []
+    p = 0
+    while p < len(string):
+        x = 0
+        k = 0
+        more = True
+        while more:
+            c = ord(string[p]) - 48
+            x |= (c & 0x1F) << (5 * k)
+            more = c & 0x20
+            p += 1
+            k += 1
+            if not more and c & 0x10:
+                x |= -1 << (5 * k)
+        if len(counts) > 2:
+            x += counts[-2]
+        counts.append(x)
+    return counts
+
+
+def mask_to_rle(mask):
+    """Return the COCO run-length encoding of the bool mask.
+
+    The encoding is {"size": [height, width], "counts": str}, the runs of
+    the column-major pixels (starting with a run of False) in the
+    compressed string format of pycocotools.mask.encode.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    height, width = mask.shape
+    pixels = mask.ravel(order="F")
+    if pixels.size == 0:
+        counts = []
+    else:
+        # pixels where the value changes
+        changes = np.flatnonzero(pixels[1:] != pixels[:-1]) + 1
+        counts = np.diff(np.r_[0, changes, pixels.size]).tolist()
+        if pixels[0]:
+            counts.insert(0, 0)
+    return dict(size=[height, width], counts=_counts_to_string(counts))
+
+
+def rle_to_mask(rle):
+    """Return the bool mask of the COCO run-length encoding rle.
+
+    The counts can be compressed (str or bytes) or not (list of int).
+    """
+    height, width = rle["size"]
+    counts = rle["counts"]
+    if isinstance(counts, six.binary_type):
+        counts = counts.decode()
+    if isinstance(counts, six.string_types):
+        counts = _string_to_counts(counts)
+    if sum(counts) != height * width:
+        raise ValueError(
+            "RLE counts sum to {} for a mask of size {}x{}".format(
+                sum(counts), height, width
+            )
+        )
+    values = np.arange(len(counts)) % 2 == 1
+    return np.repeat(values, counts).reshape((height, width), order="F")
+
+
+def mask_origin(points):
+    """Return the (x, y) image pixel of the first pixel of a mask shape.
+
+    The points of a mask shape are the corners of the mask, they are
+    rounded (half up, the same for every position) when it was moved by a
+    fraction of pixel.
+    """
+    x, y = np.asarray(points, dtype=float).reshape(-1, 2).min(axis=0)
+    return int(math.floor(x + 0.5)), int(math.floor(y + 0.5))
+
+
+def _draw_shape(
+    draw, points, shape_type, fill, line_width, point_size, mask=None
 ):
-    mask = np.zeros(img_shape[:2], dtype=np.uint8)
-    mask = PIL.Image.fromarray(mask)
-    draw = PIL.ImageDraw.Draw(mask)
     xy = [tuple(point) for point in points]
-    if shape_type == "circle":
+    if shape_type == "mask":
+        assert mask is not None, "Shape of shape_type=mask must have a mask"
+        if isinstance(mask, dict):
+            mask = rle_to_mask(mask)
+        draw.bitmap(mask_origin(xy), PIL.Image.fromarray(mask), fill=fill)
+    elif shape_type == "circle":
         assert len(xy) == 2, "Shape of shape_type=circle must have 2 points"
         (cx, cy), (px, py) = xy
         d = math.sqrt((cx - px) ** 2 + (cy - py) ** 2)
-        draw.ellipse([cx - d, cy - d, cx + d, cy + d], outline=1, fill=1)
+        draw.ellipse([cx - d, cy - d, cx + d, cy + d], outline=fill, fill=fill)
     elif shape_type == "rectangle":
         assert len(xy) == 2, "Shape of shape_type=rectangle must have 2 points"
-        draw.rectangle(xy, outline=1, fill=1)
+        draw.rectangle(xy, outline=fill, fill=fill)
     elif shape_type == "line":
         assert len(xy) == 2, "Shape of shape_type=line must have 2 points"
-        draw.line(xy=xy, fill=1, width=line_width)
+        draw.line(xy=xy, fill=fill, width=line_width)
     elif shape_type == "linestrip":
-        draw.line(xy=xy, fill=1, width=line_width)
+        draw.line(xy=xy, fill=fill, width=line_width)
     elif shape_type == "point":
         assert len(xy) == 1, "Shape of shape_type=point must have 1 points"
         cx, cy = xy[0]
         r = point_size
-        draw.ellipse([cx - r, cy - r, cx + r, cy + r], outline=1, fill=1)
+        draw.ellipse([cx - r, cy - r, cx + r, cy + r], outline=fill, fill=fill)
     else:
         assert len(xy) > 2, "Polygon must have points more than 2"
-        draw.polygon(xy=xy, outline=1, fill=1)
+        draw.polygon(xy=xy, outline=fill, fill=fill)
+
+
+def shape_to_mask(
+    img_shape,
+    points,
+    shape_type=None,
+    line_width=10,
+    point_size=5,
+    mask=None,
+):
+    """Return the bool mask of the shape in an image of img_shape.
+
+    mask is the mask (bool array or RLE) of a shape of shape_type=mask.
+    """
+    shape_mask = mask
+    mask = np.zeros(img_shape[:2], dtype=np.uint8)
+    mask = PIL.Image.fromarray(mask)
+    draw = PIL.ImageDraw.Draw(mask)
+    _draw_shape(
+        draw, points, shape_type, 1, line_width, point_size, mask=shape_mask
+    )
     mask = np.array(mask, dtype=bool)
     return mask
 
 
+def shape_bbox(points, shape_type=None, line_width=10, point_size=5):
+    """Return the (y1, x1, y2, x2) bbox of the shape from its geometry.
+
+    Lines are grown by half of line_width and points are circles of radius
+    point_size, like they are drawn by shape_to_mask.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if shape_type == "circle":
+        (cx, cy), (px, py) = points
+        r = math.sqrt((cx - px) ** 2 + (cy - py) ** 2)
+    elif shape_type == "point":
+        ((cx, cy),) = points
+        r = point_size
+    else:
+        (x1, y1), (x2, y2) = points.min(axis=0), points.max(axis=0)
+        if shape_type in ["line", "linestrip"]:
+            r = line_width / 2.0
+            return y1 - r, x1 - r, y2 + r, x2 + r
+        return y1, x1, y2, x2
+    return cy - r, cx - r, cy + r, cx + r
+
+
+def shape_area(points, shape_type=None, mask=None):
+    """Return the area of the shape from its geometry.
+
+    Lines and points have no area, see shape_to_cropped_mask for the area
+    in pixels of the mask. The area of a mask shape is its pixel count.
+    """
+    if shape_type == "mask":
+        if isinstance(mask, dict):
+            mask = rle_to_mask(mask)
+        return float(np.count_nonzero(mask))
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if shape_type == "circle":
+        (cx, cy), (px, py) = points
+        return math.pi * ((cx - px) ** 2 + (cy - py) ** 2)
+    elif shape_type == "rectangle":
+        (x1, y1), (x2, y2) = points
+        return abs((x2 - x1) * (y2 - y1))
+    elif shape_type in ["line", "linestrip", "point"]:
+        return 0.0
+    # shoelace formula
+    x, y = points[:, 0], points[:, 1]
+    return abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2.0
+
+
+def shape_to_cropped_mask(
+    img_shape,
+    points,
+    shape_type=None,
+    line_width=10,
+    point_size=5,
+    mask=None,
+):
+    """Return the mask of shape_to_mask cropped to its bbox, and the bbox.
+
+    The bbox is (y1, x1, y2, x2) with shape_to_mask(...)[y1:y2, x1:x2] the
+    returned mask, which is False elsewhere. The shape is only drawn in
+    the rows of its bbox, so the cost does not depend on the image height.
+    The mask is empty and the bbox (0, 0, 0, 0) if the shape has no pixel
+    in the image.
+    """
+    shape_mask = mask
+    height, width = img_shape[:2]
+    y1, x1, y2, x2 = shape_bbox(points, shape_type, line_width, point_size)
+    # covers the pixels PIL draws for coordinates rounded outwards
+    margin = 2
+    y1 = max(int(math.floor(y1)) - margin, 0)
+    y2 = min(int(math.ceil(y2)) + margin + 1, height)
+    if y1 >= y2 or x2 < -margin or x1 > width + margin:
+        return np.zeros((0, 0), dtype=bool), (0, 0, 0, 0)
+
+    # PIL computes the edges of polygons with single precision x, so only
+    # the rows are cropped: moving the shape by whole rows draws the same
+    # pixels, moving it by columns may not.
+    mask = PIL.Image.new("L", (width, y2 - y1), 0)
+    points = [(x, y - y1) for x, y in points]
+    _draw_shape(
+        PIL.ImageDraw.Draw(mask),
+        points,
+        shape_type,
+        1,
+        line_width,
+        point_size,
+        mask=shape_mask,
+    )
+    mask = np.array(mask, dtype=bool)
+
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0:
+        return np.zeros((0, 0), dtype=bool), (0, 0, 0, 0)
+    cols = np.flatnonzero(mask.any(axis=0))
+    r1, r2 = rows[0], rows[-1] + 1
+    c1, c2 = cols[0], cols[-1] + 1
+    bbox = (int(y1 + r1), int(c1), int(y1 + r2), int(c2))
+    return mask[r1:r2, c1:c2], bbox
+
+
+def shapes_to_masks(img_shape, shapes, line_width=10, point_size=5):
+    """Return the (N, H, W) bool masks of the N shapes.
+
+    Each shape is drawn in its bbox and copied into the stack, instead of
+    allocating a mask of the image size for each shape.
+    """
+    height, width = img_shape[:2]
+    masks = np.zeros((len(shapes), height, width), dtype=bool)
+    for mask, shape in zip(masks, shapes):
+        crop, (y1, x1, y2, x2) = shape_to_cropped_mask(
+            img_shape,
+            shape["points"],
+            shape.get("shape_type", None),
+            line_width=line_width,
+            point_size=point_size,
+            mask=shape.get("mask"),
+        )
+        mask[y1:y2, x1:x2] = crop
+    return masks
+
+
 def shapes_to_label(img_shape, shapes, label_name_to_value):
-    cls = np.zeros(img_shape[:2], dtype=np.int32)
-    ins = np.zeros_like(cls)
-    instances = []
+    """Return the class and instance labels of shapes.
+
+    The shapes are drawn in order, each over the previous ones, with their
+    instance id directly into the instance label, so that only the pixels
+    of each shape are touched. The class label is then looked up from the
+    instance of each pixel, as an instance has a single class.
+    """
+    height, width = img_shape[:2]
+    ins = PIL.Image.new("I", (width, height), 0)
+    draw = PIL.ImageDraw.Draw(ins)
+    instance_ids = {}
+    instance_cls_ids = [0]  # background
     for shape in shapes:
         points = shape["points"]
         label = shape["label"]
@@ -63,15 +308,23 @@ def shapes_to_label(img_shape, shapes, label_name_to_value):
         cls_name = label
         instance = (cls_name, group_id)
 
-        if instance not in instances:
-            instances.append(instance)
-        ins_id = instances.index(instance) + 1
-        cls_id = label_name_to_value[cls_name]
+        if instance not in instance_ids:
+            instance_cls_ids.append(label_name_to_value[cls_name])
+            instance_ids[instance] = len(instance_ids) + 1
+        ins_id = instance_ids[instance]
 
-        mask = shape_to_mask(img_shape[:2], points, shape_type)
-        cls[mask] = cls_id
-        ins[mask] = ins_id
+        _draw_shape(
+            draw,
+            points,
+            shape_type,
+            ins_id,
+            line_width=10,
+            point_size=5,
+            mask=shape.get("mask"),
+        )
 
+    ins = np.array(ins, dtype=np.int32)
+    cls = np.asarray(instance_cls_ids, dtype=np.int32)[ins]
     return cls, ins
 
 
@@ -94,7 +347,15 @@ def labelme_shapes_to_label(img_shape, shapes):
     return lbl, label_name_to_value
 
 
-def masks_to_bboxes(masks):
+def masks_to_bboxes(masks, chunk_size=None):
+    """Return the (N, 4) float32 (y1, x1, y2, x2) bboxes of (N, H, W) masks.
+
+    The bboxes are computed from the rows and columns of each mask having
+    a pixel, for all masks at once. With chunk_size, chunk_size masks are
+    processed at a time, so that a stack not fitting in memory (e.g. a
+    np.memmap) is read only one chunk at a time. The bbox of an empty mask
+    is (0, 0, 0, 0).
+    """
     if masks.ndim != 3:
         raise ValueError(
             "masks.ndim must be 3, but it is {}".format(masks.ndim)
@@ -103,10 +364,20 @@ def masks_to_bboxes(masks):
         raise ValueError(
             "masks.dtype must be bool type, but it is {}".format(masks.dtype)
         )
-    bboxes = []
-    for mask in masks:
-        where = np.argwhere(mask)
-        (y1, x1), (y2, x2) = where.min(0), where.max(0) + 1
-        bboxes.append((y1, x1, y2, x2))
-    bboxes = np.asarray(bboxes, dtype=np.float32)
+    if chunk_size is None:
+        chunk_size = max(len(masks), 1)
+    height, width = masks.shape[1:]
+    bboxes = np.zeros((len(masks), 4), dtype=np.float32)
+    for i in range(0, len(masks), chunk_size):
+        chunk = masks[i : i + chunk_size]
+        rows = chunk.any(axis=2)
+        cols = chunk.any(axis=1)
+        # argmax returns the first True
+        y1 = rows.argmax(axis=1)
+        y2 = height - rows[:, ::-1].argmax(axis=1)
+        x1 = cols.argmax(axis=1)
+        x2 = width - cols[:, ::-1].argmax(axis=1)
+        chunk_bboxes = np.stack([y1, x1, y2, x2], axis=1)
+        chunk_bboxes[~rows.any(axis=1)] = 0
+        bboxes[i : i + chunk_size] = chunk_bboxes
     return bboxes
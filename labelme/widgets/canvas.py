@@ -1,9 +1,20 @@
+import math
+
 from qtpy import QtCore
 from qtpy import QtGui
 from qtpy import QtWidgets
 
 from labelme import QT5
+from labelme.image_pyramid import ImagePyramid
 from labelme.shape import Shape
+from labelme.shape_history import AddShapes
+from labelme.shape_history import get_shape_state
+from labelme.shape_history import ModifyShapes
+from labelme.shape_history import RemoveShapes
+from labelme.shape_history import ReplaceShapes
+from labelme.shape_history import shape_states_equal
+from labelme.shape_history import ShapeHistory
+from labelme.shape_index import ShapeIndex
 import labelme.utils
 
 from .rotate_label_dlg import RotateLabelDlg
@@ -19,6 +30,9 @@ CURSOR_DRAW = QtCore.Qt.CrossCursor
 CURSOR_MOVE = QtCore.Qt.ClosedHandCursor
 CURSOR_GRAB = QtCore.Qt.OpenHandCursor
 
+# images larger than this are painted tile by tile from an ImagePyramid
+TILED_PAINTING_MIN_PIXELS = 4096 * 4096
+
 
 class Canvas(QtWidgets.QWidget):
 
@@ -41,6 +55,7 @@ class Canvas(QtWidgets.QWidget):
     def __init__(self, *args, **kwargs):
         self.epsilon = kwargs.pop("epsilon", 10.0)
         self.double_click = kwargs.pop("double_click", "close")
+        self.num_backups = kwargs.pop("num_backups", 10)
         if self.double_click not in [None, "close"]:
             raise ValueError(
                 "Unexpected value for double_click event: {}".format(
@@ -51,7 +66,11 @@ class Canvas(QtWidgets.QWidget):
         # Initialise local state.
         self.mode = self.EDIT
         self.shapes = []
-        self.shapesBackups = []
+        # spatial index over self.shapes for hit-testing
+        self.shapeIndex = ShapeIndex()
+        self.shapesHistory = ShapeHistory(max_depth=self.num_backups)
+        # shapes being edited with the mouse -> their state before
+        self._editedShapes = {}
         self.current = None
         self.selectedShapes = []  # save the selected shapes here
         self.selectedShapesCopy = []
@@ -66,6 +85,7 @@ class Canvas(QtWidgets.QWidget):
         self.offsets = QtCore.QPoint(), QtCore.QPoint()
         self.scale = 1.0
         self.pixmap = QtGui.QPixmap()
+        self.pyramid = None
         self.visible = {}
         self._hideBackround = False
         self.hideBackround = False
@@ -113,30 +133,71 @@ class Canvas(QtWidgets.QWidget):
             raise ValueError("Unsupported createMode: %s" % value)
         self._createMode = value
 
-    def storeShapes(self):
-        shapesBackup = []
-        for shape in self.shapes:
-            shapesBackup.append(shape.copy())
-        if len(self.shapesBackups) >= 10:
-            self.shapesBackups = self.shapesBackups[-9:]
-        self.shapesBackups.append(shapesBackup)
+    def insertShapes(self, items):
+        """Insert shapes at the given indices, [(index, shape)] ascending."""
+        on_top = True
+        for index, shape in items:
+            on_top = on_top and index >= len(self.shapes)
+            self.shapes.insert(index, shape)
+        if on_top:
+            for _, shape in items:
+                self.shapeIndex.insert(shape)
+        else:
+            self.shapeIndex.rebuild(self.shapes)
+
+    def removeShapes(self, shapes):
+        for shape in shapes:
+            self.shapes.remove(shape)
+            self.shapeIndex.remove(shape)
+
+    def beginShapesEdit(self, shapes):
+        """Remember the state of shapes before editing them in place."""
+        for shape in shapes:
+            if shape not in self._editedShapes:
+                self._editedShapes[shape] = get_shape_state(shape)
+
+    def endShapesEdit(self):
+        """Record the edits since beginShapesEdit, return True if any."""
+        changes = []
+        for shape, before in self._editedShapes.items():
+            if shape not in self.shapeIndex:
+                continue  # not on the canvas anymore
+            after = get_shape_state(shape)
+            if not shape_states_equal(before, after):
+                changes.append((shape, before, after))
+        self._editedShapes = {}
+        if changes:
+            self.shapesHistory.push(ModifyShapes(changes))
+        return bool(changes)
 
     @property
     def isShapeRestorable(self):
-        if len(self.shapesBackups) < 2:
-            return False
-        return True
+        return self.shapesHistory.canUndo()
+
+    @property
+    def isShapeRedoable(self):
+        return self.shapesHistory.canRedo()
 
     def restoreShape(self):
+        """Undo the last edit, return the added/removed/modified shapes."""
         if not self.isShapeRestorable:
-            return
-        self.shapesBackups.pop()  # latest
-        shapesBackup = self.shapesBackups.pop()
-        self.shapes = shapesBackup
-        self.selectedShapes = []
-        for shape in self.shapes:
-            shape.selected = False
-        self.repaint()
+            return None
+        return self._applyHistory(self.shapesHistory.undo)
+
+    def redoShape(self):
+        if not self.isShapeRedoable:
+            return None
+        return self._applyHistory(self.shapesHistory.redo)
+
+    def _applyHistory(self, func):
+        self._editedShapes = {}
+        self.deSelectShape()
+        self.unHighlight()
+        changes = func(self)
+        # the shapes are not selected anymore, so neither resizable
+        self.cleanResizableStatus()
+        self.update()
+        return changes
 
     def enterEvent(self, ev):
         self.overrideCursor(self._cursor)
@@ -166,7 +227,7 @@ class Canvas(QtWidgets.QWidget):
     def unHighlight(self):
         if self.hShape:
             self.hShape.highlightClear()
-            self.update()
+            self.updateShapes([self.hShape])
         self.prevhShape = self.hShape
         self.prevhVertex = self.hVertex
         self.prevhEdge = self.hEdge
@@ -190,11 +251,13 @@ class Canvas(QtWidgets.QWidget):
 
         # Polygon drawing.
         if self.drawing():
+            rects = [self.paintedRect(self.line)]
             self.line.shape_type = self.createMode
 
             self.overrideCursor(CURSOR_DRAW)
             if not self.current:
                 return
+            rects.append(self.paintedRect(self.current))
 
             if self.outOfPixmap(pos):
                 # Don't allow the user to draw outside the pixmap.
@@ -225,7 +288,7 @@ class Canvas(QtWidgets.QWidget):
             elif self.createMode == "point":
                 self.line.points = [self.current[0]]
                 self.line.close()
-            self.repaint()
+            self.updateShapes([self.current, self.line], rects)
             self.current.highlightClear()
             return
 
@@ -233,25 +296,28 @@ class Canvas(QtWidgets.QWidget):
         if QtCore.Qt.RightButton & ev.buttons():
             if self.selectedShapesCopy and self.prevPoint:
                 self.overrideCursor(CURSOR_MOVE)
+                rects = [self.paintedRect(s) for s in self.selectedShapesCopy]
                 self.boundedMoveShapes(self.selectedShapesCopy, pos)
-                self.repaint()
+                self.updateShapes(self.selectedShapesCopy, rects)
             elif self.selectedShapes:
                 self.selectedShapesCopy = [
                     s.copy() for s in self.selectedShapes
                 ]
-                self.repaint()
+                self.updateShapes(self.selectedShapesCopy)
             return
 
         # Polygon/Vertex moving.
         if QtCore.Qt.LeftButton & ev.buttons():
             if self.selectedVertex():
+                rects = [self.paintedRect(self.hShape)]
                 self.boundedMoveVertex(pos)
-                self.repaint()
+                self.updateShapes([self.hShape], rects)
                 self.movingShape = True
             elif self.selectedShapes and self.prevPoint:
                 self.overrideCursor(CURSOR_MOVE)
+                rects = [self.paintedRect(s) for s in self.selectedShapes]
                 self.boundedMoveShapes(self.selectedShapes, pos)
-                self.repaint()
+                self.updateShapes(self.selectedShapes, rects)
                 self.movingShape = True
             return
 
@@ -260,7 +326,9 @@ class Canvas(QtWidgets.QWidget):
         # - Highlight vertex
         # Update shape/vertex fill and tooltip value accordingly.
         self.setToolTip(self.tr("Image"))
-        for shape in reversed([s for s in self.shapes if self.isVisible(s)]):
+        hovered = self.hShape
+        candidates = self.shapeIndex.query(pos, self.epsilon / self.scale)
+        for shape in [s for s in candidates if self.isVisible(s)]:
             # Look for a nearby vertex to highlight. If that fails,
             # check if we happen to be inside a shape.
             index = shape.nearestVertex(pos, self.epsilon / self.scale)
@@ -275,7 +343,7 @@ class Canvas(QtWidgets.QWidget):
                 self.overrideCursor(CURSOR_POINT)
                 self.setToolTip(self.tr("Click & drag to move point"))
                 self.setStatusTip(self.toolTip())
-                self.update()
+                self.updateShapes([hovered, shape])
                 break
             elif shape.containsPoint(pos):
                 if self.selectedVertex():
@@ -289,7 +357,7 @@ class Canvas(QtWidgets.QWidget):
                 )
                 self.setStatusTip(self.toolTip())
                 self.overrideCursor(CURSOR_GRAB)
-                self.update()
+                self.updateShapes([hovered, shape])
                 break
         else:  # Nothing found, clear highlights, reset state.
             self.unHighlight()
@@ -302,12 +370,15 @@ class Canvas(QtWidgets.QWidget):
         point = self.prevMovePoint
         if shape is None or index is None or point is None:
             return
+        self.beginShapesEdit([shape])
         shape.insertPoint(index, point)
+        self.shapeIndex.update(shape)
+        if self.endShapesEdit():
+            self.shapeMoved.emit()
         shape.highlightVertex(index, shape.MOVE_VERTEX)
         self.hShape = shape
         self.hVertex = index
         self.hEdge = None
-        self.movingShape = True
 
     def removeSelectedPoint(self):
         shape = self.prevhShape
@@ -315,12 +386,15 @@ class Canvas(QtWidgets.QWidget):
         if shape is None or point is None:
             return
         index = shape.nearestVertex(point, self.epsilon)
+        self.beginShapesEdit([shape])
         shape.removePoint(index)
+        self.shapeIndex.update(shape)
+        if self.endShapesEdit():
+            self.shapeMoved.emit()
         # shape.highlightVertex(index, shape.MOVE_VERTEX)
         self.hShape = shape
         self.hVertex = None
         self.hEdge = None
-        self.movingShape = True  # Save changes
 
     def mousePressEvent(self, ev):
         self.rotateDlg.close()
@@ -338,7 +412,7 @@ class Canvas(QtWidgets.QWidget):
                         if self.current.isClosed():
                             self.finalise()
                     elif self.createMode in ["rectangle", "circle", "line"]:
-                        assert len(self.current.points) == 1
+                        assert len(self.current) == 1
                         self.current.points = self.line.points
                         self.finalise()
                     elif self.createMode == "linestrip":
@@ -347,9 +421,10 @@ class Canvas(QtWidgets.QWidget):
                         if int(ev.modifiers()) == QtCore.Qt.ControlModifier:
                             self.finalise()
                     elif self.createMode == "resizingshape":
-                        assert len(self.current.points) == 1
+                        assert len(self.current) == 1
                         self.current.points = self.line.points
                         self.current.inner_points = self.line.inner_points
+                        self.updateInnerPoints(self.line)
                         self.current.last_inner_points = self.line.last_inner_points
                         self.current.stop_resizing_basicshape()
                         self.finalise()
@@ -377,13 +452,18 @@ class Canvas(QtWidgets.QWidget):
 
                 self.setTopShapeResizable()
 
-                self.repaint()
+                edited = list(self.selectedShapes)
+                if self.selectedVertex():
+                    edited.append(self.hShape)
+                self.beginShapesEdit(edited)
+
+                self.update()
         elif ev.button() == QtCore.Qt.RightButton: # and self.editing():
             self.cleanResizableStatus()
             group_mode = int(ev.modifiers()) == QtCore.Qt.ControlModifier
             self.selectShapePoint(pos, multiple_selection_mode=group_mode)
             self.prevPoint = pos
-            self.repaint()
+            self.update()
 
     def mouseReleaseEvent(self, ev):
         if ev.button() == QtCore.Qt.RightButton:
@@ -394,8 +474,8 @@ class Canvas(QtWidgets.QWidget):
                 and self.selectedShapesCopy
             ):
                 # Cancel the move by deleting the shadow copy.
+                self.updateShapes(self.selectedShapesCopy)
                 self.selectedShapesCopy = []
-                self.repaint()
         elif ev.button() == QtCore.Qt.LeftButton and self.selectedShapes:
             self.overrideCursor(CURSOR_GRAB)
             if (
@@ -412,31 +492,33 @@ class Canvas(QtWidgets.QWidget):
                 # Delete point if: left-click + SHIFT on a point
                 self.removeSelectedPoint()
 
-        if self.movingShape and self.hShape:
-            index = self.shapes.index(self.hShape)
-            if (
-                self.shapesBackups[-1][index].points
-                != self.shapes[index].points
-            ):
-                self.storeShapes()
+        if self.movingShape:
+            if self.endShapesEdit():
                 self.shapeMoved.emit()
-
             self.movingShape = False
+        self._editedShapes = {}
 
     def endMove(self, copy):
         assert self.selectedShapes and self.selectedShapesCopy
         assert len(self.selectedShapesCopy) == len(self.selectedShapes)
         if copy:
+            items = []
             for i, shape in enumerate(self.selectedShapesCopy):
+                items.append((len(self.shapes), shape))
                 self.shapes.append(shape)
+                self.shapeIndex.insert(shape)
                 self.selectedShapes[i].selected = False
                 self.selectedShapes[i] = shape
+            self.shapesHistory.push(AddShapes(items))
         else:
+            self.beginShapesEdit(self.selectedShapes)
             for i, shape in enumerate(self.selectedShapesCopy):
-                self.selectedShapes[i].points = shape.points
+                self.selectedShapes[i].points = shape.pointsArray()
+                self.shapeIndex.update(self.selectedShapes[i])
+                self.updateInnerPoints(self.selectedShapes[i])
+            self.endShapesEdit()
         self.selectedShapesCopy = []
-        self.repaint()
-        self.storeShapes()
+        self.update()
         return True
 
     def hideBackroundShapes(self, value):
@@ -445,7 +527,7 @@ class Canvas(QtWidgets.QWidget):
             # Only hide other shapes if there is a current selection.
             # Otherwise the user will not be able to select a shape.
             self.setHiding(True)
-            self.repaint()
+            self.update()
 
     def setHiding(self, enable=True):
         self._hideBackround = self.hideBackround if enable else False
@@ -475,7 +557,7 @@ class Canvas(QtWidgets.QWidget):
             index, shape = self.hVertex, self.hShape
             shape.highlightVertex(index, shape.MOVE_VERTEX)
         else:
-            for shape in reversed(self.shapes):
+            for shape in self.shapeIndex.query(point):
                 if self.isVisible(shape) and shape.containsPoint(point):
                     self.calculateOffsets(shape, point)
                     self.setHiding()
@@ -503,6 +585,8 @@ class Canvas(QtWidgets.QWidget):
         if self.outOfPixmap(pos):
             pos = self.intersectionPoint(point, pos)
         shape.moveVertexBy(index, pos - point)
+        self.shapeIndex.update(shape)
+        self.updateInnerPoints(shape)
 
     def boundedMoveShapes(self, shapes, pos):
         if self.outOfPixmap(pos):
@@ -525,10 +609,21 @@ class Canvas(QtWidgets.QWidget):
         if dp:
             for shape in shapes:
                 shape.moveBy(dp)
+                self.shapeIndex.update(shape)
+                self.updateInnerPoints(shape)
             self.prevPoint = pos
             return True
         return False
 
+    def updateInnerPoints(self, shape):
+        # the inner shape of a resizing shape follows its box when painted,
+        # which may happen after the edit is recorded
+        if (
+            shape.shape_type == "resizingshape"
+            and shape.inner_points is not None
+        ):
+            shape.updateInnerPoints()
+
     def deSelectShape(self):
         if self.selectedShapes:
             self.setHiding(False)
@@ -538,10 +633,12 @@ class Canvas(QtWidgets.QWidget):
     def deleteSelected(self):
         deleted_shapes = []
         if self.selectedShapes:
+            items = [(self.shapes.index(s), s) for s in self.selectedShapes]
             for shape in self.selectedShapes:
                 self.shapes.remove(shape)
+                self.shapeIndex.remove(shape)
                 deleted_shapes.append(shape)
-            self.storeShapes()
+            self.shapesHistory.push(RemoveShapes(items))
             self.selectedShapes = []
             self.update()
         return deleted_shapes
@@ -576,9 +673,23 @@ class Canvas(QtWidgets.QWidget):
         p.scale(self.scale, self.scale)
         p.translate(self.offsetToCenter())
 
-        p.drawPixmap(0, 0, self.pixmap)
+        # the exposed area in image coordinates, usually only the dirty
+        # region of the shapes being edited
+        exposed = p.transform().inverted()[0].mapRect(
+            QtCore.QRectF(event.rect())
+        )
+        if self.pyramid is None:
+            p.drawPixmap(0, 0, self.pixmap)
+        else:
+            # only paint the tiles of the exposed (visible) area
+            self.pyramid.paint(p, exposed, self.scale)
         Shape.scale = self.scale
-        for shape in self.shapes:
+        # self.shapes in drawing order, skipping the ones painted outside
+        # of the exposed area
+        shapes = self.shapeIndex.queryRect(
+            exposed, self.paintMargin() / self.scale
+        )
+        for shape in shapes:
             if (shape.selected or not self._hideBackround) and self.isVisible(
                 shape
             ):
@@ -595,7 +706,7 @@ class Canvas(QtWidgets.QWidget):
             self.fillDrawing()
             and self.createMode == "polygon"
             and self.current is not None
-            and len(self.current.points) >= 2
+            and len(self.current) >= 2
         ):
             drawing_shape = self.current.copy()
             drawing_shape.addPoint(self.line[1])
@@ -604,6 +715,30 @@ class Canvas(QtWidgets.QWidget):
 
         p.end()
 
+    def paintMargin(self):
+        # the vertices (up to 4 * point_size wide when highlighted) and
+        # the pen are painted over the outline of the shapes
+        return 2 * Shape.point_size + int(math.ceil(self.scale)) + 2
+
+    def paintedRect(self, shape):
+        """Return the area of the widget where shape is painted."""
+        if shape is None or not len(shape):
+            return QtCore.QRect()
+        s = self.scale
+        offset = QtCore.QPointF(self.offsetToCenter())
+        rect = shape.boundingRect().translated(offset)
+        rect = QtCore.QRectF(
+            rect.x() * s, rect.y() * s, rect.width() * s, rect.height() * s
+        )
+        margin = self.paintMargin()
+        return rect.toAlignedRect().adjusted(-margin, -margin, margin, margin)
+
+    def updateShapes(self, shapes, rects=()):
+        """Schedule a repaint of shapes and of the given (old) rects only."""
+        for rect in list(rects) + [self.paintedRect(s) for s in shapes]:
+            if not rect.isEmpty():
+                self.update(rect)
+
     def transformPos(self, point):
         """Convert from widget-logical coordinates to painter-logical ones."""
         return point / self.scale - self.offsetToCenter()
@@ -624,8 +759,9 @@ class Canvas(QtWidgets.QWidget):
     def finalise(self):
         assert self.current
         self.current.close()
+        self.shapesHistory.push(AddShapes([(len(self.shapes), self.current)]))
         self.shapes.append(self.current)
-        self.storeShapes()
+        self.shapeIndex.insert(self.current)
         self.current = None
         self.setHiding(False)
         self.newShape.emit()
@@ -745,18 +881,17 @@ class Canvas(QtWidgets.QWidget):
         assert text
         self.shapes[-1].label = text
         self.shapes[-1].flags = flags
-        self.shapesBackups.pop()
-        self.storeShapes()
         return self.shapes[-1]
 
     def undoLastLine(self):
         assert self.shapes
         self.current = self.shapes.pop()
+        self.shapeIndex.remove(self.current)
         self.current.setOpen()
         if self.createMode in ["polygon", "linestrip"]:
             self.line.points = [self.current[-1], self.current[0]]
         elif self.createMode in ["rectangle", "line", "circle"]:
-            self.current.points = self.current.points[0:1]
+            self.current.points = self.current.pointsArray()[:1]
         elif self.createMode == "point":
             self.current = None
         elif self.createMode == "resizingshape":
@@ -772,29 +907,40 @@ class Canvas(QtWidgets.QWidget):
         else:
             self.current = None
             self.drawingPolygon.emit(False)
-        self.repaint()
+        self.update()
 
     def loadPixmap(self, pixmap, clear_shapes=True):
         self.pixmap = pixmap
+        self.pyramid = None
+        if pixmap.width() * pixmap.height() > TILED_PAINTING_MIN_PIXELS:
+            self.pyramid = ImagePyramid(pixmap)
         if clear_shapes:
             self.shapes = []
-        self.repaint()
+            self.shapeIndex.clear()
+            self.shapesHistory.clear()
+        self.update()
 
     def loadShapes(self, shapes, replace=True):
+        before = self.shapes
         if replace:
             self.shapes = list(shapes)
         else:
-            self.shapes.extend(shapes)
-        self.storeShapes()
+            self.shapes = self.shapes + list(shapes)
+        self.shapeIndex.rebuild(self.shapes)
+        if before != self.shapes:
+            # e.g. reordered in the label list or kept from the previous
+            # image, the shapes of a new image are not an edit (see
+            # MainWindow.loadFile)
+            self.shapesHistory.push(ReplaceShapes(before, self.shapes))
         self.current = None
         self.hShape = None
         self.hVertex = None
         self.hEdge = None
-        self.repaint()
+        self.update()
 
     def setShapeVisible(self, shape, value):
         self.visible[shape] = value
-        self.repaint()
+        self.updateShapes([shape])
 
     def overrideCursor(self, cursor):
         self.restoreCursor()
@@ -807,13 +953,16 @@ class Canvas(QtWidgets.QWidget):
     def resetState(self):
         self.restoreCursor()
         self.pixmap = None
-        self.shapesBackups = []
+        self.pyramid = None
+        self.shapesHistory.clear()
         self.update()
 
     def cleanResizableStatus(self, pos=None):
         if pos is None:
             for shape in self.shapes:
-                shape.stop_resizing_polygon()
+                if shape.shape_type == "resizingshape":
+                    shape.stop_resizing_polygon()
+                    self.shapeIndex.update(shape)
 
         else:
             for shape in self.shapes:
@@ -821,10 +970,12 @@ class Canvas(QtWidgets.QWidget):
                         not shape.containsPoint(pos) and \
                         shape.nearestVertex(pos, self.epsilon/self.scale) is None:
                     shape.stop_resizing_polygon()
+                    self.shapeIndex.update(shape)
 
     def setTopShapeResizable(self):
         for shape in self.selectedShapes:
             shape.start_resizing_polygon()
+            self.shapeIndex.update(shape)
             # only set the top shape to resizing status
             break
 
@@ -842,8 +993,11 @@ class Canvas(QtWidgets.QWidget):
         if len(self.selectedShapes) == 1:
             shape = self.selectedShapes[0]
             if shape.shape_type == "polygon":
+                self.beginShapesEdit([shape])
+                rects = [self.paintedRect(shape)]
                 shape.rotatePolygon(clockwise, angle)
-                self.repaint()
+                self.shapeIndex.update(shape)
+                self.updateShapes([shape], rects)
                 # to save rotation change
-                self.storeShapes()
+                self.endShapesEdit()
                 self.shapeMoved.emit()
@@ -0,0 +1,240 @@
+from qtpy import QtCore
+from qtpy.QtCore import Qt
+from qtpy import QtWidgets
+
+
+class FileListModel(QtCore.QAbstractListModel):
+    """Filenames of the file list and whether they have a label file.
+
+    The filenames are kept in a list with a filename -> index dict, so that
+    finding a file or its neighbours does not depend on the number of
+    files. Unless given when adding the files, whether a file has a label
+    file is only checked (with hasLabelFile) when it is needed.
+
+    A search (see labelme.file_search.FileSearch) limits the rows to the
+    matching files, the other ones are kept to be shown again when the
+    search changes.
+    """
+
+    def __init__(self, hasLabelFile=None, labelNames=None, parent=None):
+        super(FileListModel, self).__init__(parent)
+        self.hasLabelFile = hasLabelFile
+        self.labelNames = labelNames
+        self._search = None
+        self._filenames = []
+        self._indices = {}
+        # True/False, or None if not checked yet
+        self._checked = []
+        # indices of the listed files and their rows, None if all are
+        self._visible = None
+        self._rows = None
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        if self._visible is None:
+            return len(self._filenames)
+        return len(self._visible)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        i = self._index(index.row())
+        if role in [Qt.DisplayRole, Qt.ToolTipRole]:
+            return self._filenames[i]
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if self._isChecked(i) else Qt.Unchecked
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def _index(self, row):
+        if self._visible is None:
+            return row
+        return self._visible[row]
+
+    def _isChecked(self, i):
+        checked = self._checked[i]
+        if checked is None:
+            checked = bool(
+                self.hasLabelFile and self.hasLabelFile(self._filenames[i])
+            )
+            self._checked[i] = checked
+        return checked
+
+    def _labelNames(self, i):
+        if self.labelNames is None:
+            return set()
+        return self.labelNames(self._filenames[i])
+
+    def _filter(self, indices):
+        return self._search.filter(
+            self._filenames, indices, self._isChecked, self._labelNames
+        )
+
+    def filenames(self):
+        """Return the listed filenames."""
+        if self._visible is None:
+            return list(self._filenames)
+        return [self._filenames[i] for i in self._visible]
+
+    def filename(self, row):
+        return self._filenames[self._index(row)]
+
+    def row(self, filename):
+        """Return the row of filename, or -1 if it is not listed."""
+        i = self._indices.get(filename, -1)
+        if i < 0 or self._rows is None:
+            return i
+        return self._rows.get(i, -1)
+
+    def isChecked(self, row):
+        return self._isChecked(self._index(row))
+
+    def setChecked(self, filename, checked):
+        i = self._indices.get(filename)
+        if i is None:
+            return
+        self._checked[i] = checked
+        row = self.row(filename)
+        if row >= 0:
+            index = self.index(row)
+            # the roles argument is Qt5 only
+            self.dataChanged.emit(index, index)
+
+    def addFiles(self, filenames, checked=None):
+        """Append the filenames which are not in the list yet.
+
+        checked tells for each file whether it has a label file, it is
+        looked up when needed if not given.
+        """
+        if checked is None:
+            checked = [None] * len(filenames)
+        first = len(self._filenames)
+        for filename, value in zip(filenames, checked):
+            if filename in self._indices:
+                continue
+            self._indices[filename] = len(self._filenames)
+            self._filenames.append(filename)
+            self._checked.append(value)
+        added = range(first, len(self._filenames))
+        if self._visible is not None:
+            added = self._filter(added)
+        if not added:
+            return
+
+        row = self.rowCount()
+        self.beginInsertRows(QtCore.QModelIndex(), row, row + len(added) - 1)
+        if self._visible is not None:
+            for i in added:
+                self._rows[i] = len(self._visible)
+                self._visible.append(i)
+        self.endInsertRows()
+
+    def setSearch(self, search):
+        """List only the files matching search, all of them if None."""
+        self.beginResetModel()
+        self._search = search if search else None
+        self._updateVisible()
+        self.endResetModel()
+
+    def _updateVisible(self):
+        if self._search is None:
+            self._visible = None
+            self._rows = None
+            return
+        self._visible = self._filter(range(len(self._filenames)))
+        self._rows = {i: row for row, i in enumerate(self._visible)}
+
+    def clear(self):
+        self.beginResetModel()
+        self._filenames = []
+        self._indices = {}
+        self._checked = []
+        self._updateVisible()
+        self.endResetModel()
+
+
+class FileListWidget(QtWidgets.QListView):
+
+    itemSelectionChanged = QtCore.Signal()
+
+    def __init__(self, hasLabelFile=None, labelNames=None):
+        super(FileListWidget, self).__init__()
+        self._emitSelectionChanged = True
+        self.setModel(
+            FileListModel(hasLabelFile=hasLabelFile, labelNames=labelNames)
+        )
+        # don't measure every row of a large list
+        self.setUniformItemSizes(True)
+        self.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.selectionModel().selectionChanged.connect(
+            self.itemSelectionChangedEvent
+        )
+
+    def __len__(self):
+        return self.model().rowCount()
+
+    def __contains__(self, filename):
+        return self.model().row(filename) >= 0
+
+    def itemSelectionChangedEvent(self, selected, deselected):
+        if self._emitSelectionChanged:
+            self.itemSelectionChanged.emit()
+
+    def count(self):
+        return len(self)
+
+    def filenames(self):
+        return self.model().filenames()
+
+    def filename(self, row):
+        return self.model().filename(row)
+
+    def row(self, filename):
+        return self.model().row(filename)
+
+    def addFiles(self, filenames, checked=None):
+        self.model().addFiles(filenames, checked)
+
+    def setChecked(self, filename, checked):
+        self.model().setChecked(filename, checked)
+
+    def isChecked(self, filename):
+        row = self.row(filename)
+        return row >= 0 and self.model().isChecked(row)
+
+    def currentRow(self):
+        index = self.currentIndex()
+        return index.row() if index.isValid() else -1
+
+    def setCurrentRow(self, row):
+        self.setCurrentIndex(self.model().index(row))
+
+    def setSearch(self, search):
+        """Filter the listed files, keeping the current file selected."""
+        filename = None
+        if self.currentRow() >= 0:
+            filename = self.filename(self.currentRow())
+        self.model().setSearch(search)
+        row = self.row(filename)
+        if row >= 0:
+            # selecting the file again does not open it again
+            self._emitSelectionChanged = False
+            try:
+                self.setCurrentRow(row)
+            finally:
+                self._emitSelectionChanged = True
+
+    def selectedFilenames(self):
+        return [
+            self.model().filename(index.row())
+            for index in self.selectedIndexes()
+        ]
+
+    def clear(self):
+        self.model().clear()
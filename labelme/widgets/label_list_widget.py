@@ -166,9 +166,16 @@ class LabelListWidget(QtWidgets.QListView):
         self.model().setItem(self.model().rowCount(), 0, item)
         item.setSizeHint(self.itemDelegate().sizeHint(None, None))
 
+    def insertItem(self, row, item):
+        if not isinstance(item, LabelListWidgetItem):
+            raise TypeError("item must be LabelListWidgetItem")
+        self.model().insertRow(row, item)
+        item.setSizeHint(self.itemDelegate().sizeHint(None, None))
+
     def removeItem(self, item):
         index = self.model().indexFromItem(item)
-        self.model().removeRows(index.row(), 1)
+        # takeRow instead of removeRows, which signals a dropped item
+        return self.model().takeRow(index.row())[0]
 
     def selectItem(self, item):
         index = self.model().indexFromItem(item)
@@ -35,6 +35,7 @@ def get_install_requires():
         "Pillow>=2.8.0",
         "PyYAML",
         "qtpy",
+        "six",
         "termcolor",
     ]
 
@@ -129,6 +130,8 @@ def main():
         author_email="www.kentaro.wada@gmail.com",
         url="https://github.com/wkentaro/labelme",
         install_requires=get_install_requires(),
+        # faster loading of the label files
+        extras_require={"fast": ["orjson"]},
         license="GPLv3",
         keywords="Image Annotation, Machine Learning",
         classifiers=[
@@ -149,8 +152,11 @@ def main():
                 "labelme=labelme.__main__:main",
                 "labelme_draw_json=labelme.cli.draw_json:main",
                 "labelme_draw_label_png=labelme.cli.draw_label_png:main",
+                "labelme_export_coco=labelme.cli.export_coco:main",
+                "labelme_export_voc=labelme.cli.export_voc:main",
                 "labelme_json_to_dataset=labelme.cli.json_to_dataset:main",
                 "labelme_on_docker=labelme.cli.on_docker:main",
+                "labelme_strip_data=labelme.cli.strip_data:main",
             ],
         },
         data_files=[("share/man/man1", ["docs/man/labelme.1"])],
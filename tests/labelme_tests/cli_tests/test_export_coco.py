@@ -0,0 +1,165 @@
+import json
+import os.path as osp
+import shutil
+import sys
+
+import numpy as np
+import pytest
+
+from labelme.cli import export_coco
+from labelme.cli import export_voc
+from labelme import utils
+
+
+here = osp.dirname(osp.abspath(__file__))
+data_dir = osp.join(here, "../data")
+labels_file = osp.join(
+    here, "../../../examples/instance_segmentation/labels.txt"
+)
+
+
+def _export(monkeypatch, tmpdir):
+    input_dir = str(tmpdir.join("annotated"))
+    shutil.copytree(osp.join(data_dir, "annotated"), input_dir)
+
+    # a mask shape and a polygon of the same instance
+    label_file = osp.join(input_dir, "2011_000003.json")
+    with open(label_file) as f:
+        data = json.load(f)
+    mask = np.zeros((30, 40), dtype=bool)
+    mask[5:25, 10:30] = True
+    mask[10:15, 15:20] = False
+    data["shapes"].append(
+        dict(
+            label="person",
+            points=[[100, 50], [139, 79]],
+            group_id=9,
+            shape_type="mask",
+            flags={},
+            mask=utils.mask_to_rle(mask),
+        )
+    )
+    data["shapes"].append(
+        dict(
+            label="person",
+            points=[[135, 60], [160, 60], [160, 90]],
+            group_id=9,
+            shape_type="polygon",
+            flags={},
+        )
+    )
+    with open(label_file, "w") as f:
+        json.dump(data, f)
+
+    output_dir = str(tmpdir.join("coco"))
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "labelme_export_coco",
+            input_dir,
+            output_dir,
+            "--labels",
+            labels_file,
+            "--noviz",
+            "--jobs",
+            "1",
+        ],
+    )
+    export_coco.main()
+    return input_dir, osp.join(output_dir, "annotations.json")
+
+
+def _expected_mask(img_shape, shapes):
+    expected = np.zeros(img_shape, dtype=bool)
+    for shape in shapes:
+        expected |= utils.shape_to_mask(
+            img_shape,
+            shape["points"],
+            shape["shape_type"],
+            mask=shape.get("mask"),
+        )
+    return expected
+
+
+def test_export_coco(tmpdir, monkeypatch):
+    input_dir, ann_file = _export(monkeypatch, tmpdir)
+    with open(ann_file) as f:
+        coco = json.load(f)
+
+    assert sorted(coco) == [
+        "annotations",
+        "categories",
+        "images",
+        "info",
+        "licenses",
+        "type",
+    ]
+    class_names, class_name_to_id = export_voc.load_class_names(labels_file)
+    assert [c["name"] for c in coco["categories"]] == class_names
+    assert [c["id"] for c in coco["categories"]] == list(
+        range(len(class_names))
+    )
+    assert [image["id"] for image in coco["images"]] == [0, 1, 2]
+    assert [
+        osp.basename(image["file_name"]) for image in coco["images"]
+    ] == ["2011_000003.jpg", "2011_000006.jpg", "2011_000025.jpg"]
+    assert [a["id"] for a in coco["annotations"]] == list(
+        range(len(coco["annotations"]))
+    )
+    image_ids = set(image["id"] for image in coco["images"])
+    for annotation in coco["annotations"]:
+        assert annotation["image_id"] in image_ids
+        assert annotation["category_id"] in class_name_to_id.values()
+        # instances, even when run-length encoded
+        assert annotation["iscrowd"] == 0
+
+    image = coco["images"][0]
+    annotations = [
+        a for a in coco["annotations"] if a["image_id"] == image["id"]
+    ]
+    rle_annotations = [
+        a for a in annotations if isinstance(a["segmentation"], dict)
+    ]
+    # only the instance with a mask shape
+    assert len(rle_annotations) == 1
+    annotation = rle_annotations[0]
+    assert annotation["category_id"] == class_name_to_id["person"]
+    segmentation = annotation["segmentation"]
+    assert segmentation["size"] == [image["height"], image["width"]]
+    assert isinstance(segmentation["counts"], str)
+
+    with open(osp.join(input_dir, "2011_000003.json")) as f:
+        shapes = [s for s in json.load(f)["shapes"] if s["group_id"] == 9]
+    expected = _expected_mask((image["height"], image["width"]), shapes)
+    np.testing.assert_array_equal(utils.rle_to_mask(segmentation), expected)
+    assert annotation["area"] == np.count_nonzero(expected)
+    ys, xs = np.where(expected)
+    assert annotation["bbox"] == [
+        xs.min(),
+        ys.min(),
+        xs.max() + 1 - xs.min(),
+        ys.max() + 1 - ys.min(),
+    ]
+
+    for annotation in annotations:
+        if annotation not in rle_annotations:
+            assert isinstance(annotation["segmentation"], list)
+            for polygon in annotation["segmentation"]:
+                assert len(polygon) % 2 == 0
+
+
+def test_export_coco_pycocotools(tmpdir, monkeypatch):
+    pycocotools_coco = pytest.importorskip("pycocotools.coco")
+
+    _, ann_file = _export(monkeypatch, tmpdir)
+    coco = pycocotools_coco.COCO(ann_file)
+    for annotation in coco.dataset["annotations"]:
+        mask = coco.annToMask(annotation)
+        image = coco.imgs[annotation["image_id"]]
+        assert mask.shape == (image["height"], image["width"])
+        if isinstance(annotation["segmentation"], dict):
+            np.testing.assert_array_equal(
+                mask, utils.rle_to_mask(annotation["segmentation"])
+            )
+            assert annotation["area"] == mask.sum()
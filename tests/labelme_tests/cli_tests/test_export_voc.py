@@ -0,0 +1,106 @@
+import os
+import os.path as osp
+import shutil
+import sys
+
+import numpy as np
+import PIL.Image
+
+from labelme.cli import export_voc
+
+
+here = osp.dirname(osp.abspath(__file__))
+data_dir = osp.join(here, "../data")
+
+
+def _export(monkeypatch, input_dir, output_dir, labels_file):
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "labelme_export_voc",
+            input_dir,
+            output_dir,
+            "--labels",
+            labels_file,
+            "--noviz",
+            "--jobs",
+            "1",
+        ],
+    )
+    export_voc.main()
+
+
+def _mtimes(output_dir):
+    mtimes = {}
+    for root, dirs, files in os.walk(output_dir):
+        for file in files:
+            if file == "class_names.txt":
+                continue  # always written
+            filename = osp.join(root, file)
+            mtimes[filename] = os.stat(filename).st_mtime
+    return mtimes
+
+
+def _touch(filename, mtime):
+    os.utime(filename, (mtime, mtime))
+
+
+def test_export_voc(tmpdir, monkeypatch):
+    input_dir = str(tmpdir.join("annotated"))
+    shutil.copytree(osp.join(data_dir, "annotated"), input_dir)
+    output_dir = str(tmpdir.join("voc"))
+    labels_file = osp.join(
+        here, "../../../examples/semantic_segmentation/labels.txt"
+    )
+
+    _export(monkeypatch, input_dir, output_dir, labels_file)
+
+    class_names, _ = export_voc.load_class_names(labels_file)
+    with open(osp.join(output_dir, "class_names.txt")) as f:
+        assert f.read().split("\n") == class_names
+    bases = ["2011_000003", "2011_000006", "2011_000025"]
+    for base in bases:
+        outputs = export_voc.output_files(output_dir, base, viz=False)
+        for output in outputs.values():
+            assert osp.exists(output)
+        img = PIL.Image.open(osp.join(input_dir, base + ".jpg"))
+        cls = np.load(outputs["cls"])
+        ins = np.load(outputs["ins"])
+        assert cls.shape == ins.shape == (img.height, img.width)
+        assert cls.min() >= -1 and cls.max() < len(class_names)
+        assert (cls > 0).any()
+        assert (ins[cls == -1] == 0).all()
+        np.testing.assert_array_equal(
+            np.asarray(PIL.Image.open(outputs["clsp"])),
+            cls.astype(np.uint8),  # -1 is saved as 255
+        )
+    assert not [f for f in os.listdir(output_dir) if f.startswith(".tmp-")]
+
+    # the inputs are older than the outputs, which are not rewritten
+    mtime = min(_mtimes(output_dir).values())
+    for filename in os.listdir(input_dir):
+        _touch(osp.join(input_dir, filename), mtime - 10)
+
+    # all up to date
+    mtimes = _mtimes(output_dir)
+    _export(monkeypatch, input_dir, output_dir, labels_file)
+    assert _mtimes(output_dir) == mtimes
+
+    # the modified label file and image file are converted again
+    _touch(osp.join(input_dir, "2011_000003.json"), mtime + 10)
+    _touch(osp.join(input_dir, "2011_000006.jpg"), mtime + 10)
+    _export(monkeypatch, input_dir, output_dir, labels_file)
+    modified = [
+        filename
+        for filename, mtime in _mtimes(output_dir).items()
+        if mtimes[filename] != mtime
+    ]
+    assert modified
+    for filename in modified:
+        base = osp.splitext(osp.basename(filename))[0]
+        assert base in ["2011_000003", "2011_000006"]
+    for base in ["2011_000003", "2011_000006"]:
+        outputs = export_voc.output_files(output_dir, base, viz=False)
+        for output in outputs.values():
+            assert output in modified
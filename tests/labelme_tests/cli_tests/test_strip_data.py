@@ -0,0 +1,133 @@
+import json
+import os.path as osp
+import shutil
+import sys
+
+import pytest
+
+from labelme.cli import strip_data
+from labelme.image_store import ImageStore
+from labelme import label_file as label_file_module
+from labelme.label_file import LabelFile
+
+
+here = osp.dirname(osp.abspath(__file__))
+data_dir = osp.join(here, "../data")
+
+
+def _read(filename):
+    with open(filename, "rb") as f:
+        return f.read()
+
+
+@pytest.fixture
+def annotated_dir(tmpdir):
+    # apc2016_obj3.json embeds apc2016_obj3.jpg, its imagePath being the
+    # label file itself
+    annotated_dir = str(tmpdir.join("annotated"))
+    shutil.copytree(osp.join(data_dir, "annotated_with_data"), annotated_dir)
+    filename = osp.join(annotated_dir, "apc2016_obj3.json")
+    with open(filename) as f:
+        data = json.load(f)
+    data["imagePath"] = "apc2016_obj3.jpg"
+    with open(osp.join(annotated_dir, "with_image_file.json"), "w") as f:
+        json.dump(data, f)
+    data["imagePath"] = "other.jpg"
+    shutil.copy(
+        osp.join(data_dir, "raw/2011_000003.jpg"),
+        osp.join(annotated_dir, "other.jpg"),
+    )
+    with open(osp.join(annotated_dir, "with_other_image_file.json"), "w") as f:
+        json.dump(data, f)
+    return annotated_dir
+
+
+def test_strip(annotated_dir):
+    filename = osp.join(annotated_dir, "with_image_file.json")
+    expected = LabelFile(filename)
+
+    assert strip_data.strip(filename, dry_run=True)[0] == "stripped"
+    assert LabelFile(filename).imageData == expected.imageData
+
+    status, saved = strip_data.strip(filename)
+    assert status == "stripped"
+    assert saved > 0
+    with open(filename) as f:
+        data = json.load(f)
+    assert data["imageData"] is None
+    assert data["imageHeight"] == 907
+    assert data["imageWidth"] == 1210
+
+    label_file = LabelFile(filename)
+    assert label_file.imagePath == "apc2016_obj3.jpg"
+    assert label_file.imageData == _read(
+        osp.join(annotated_dir, "apc2016_obj3.jpg")
+    )
+    assert label_file.shapes == expected.shapes
+
+    assert strip_data.strip(filename) == ("no data", 0)
+
+
+def test_strip_kept(annotated_dir):
+    for name, status in [
+        ("apc2016_obj3.json", "unreadable"),
+        ("with_other_image_file.json", "mismatch"),
+    ]:
+        filename = osp.join(annotated_dir, name)
+        content = _read(filename)
+        assert strip_data.strip(filename) == (status, 0)
+        assert _read(filename) == content
+
+
+def test_strip_image_store(annotated_dir, tmpdir):
+    image_store = ImageStore(str(tmpdir.join("store")))
+    filename = osp.join(annotated_dir, "apc2016_obj3.json")
+    expected = LabelFile(filename)
+
+    assert strip_data.strip(filename, image_store)[0] == "stored"
+    image_file = image_store.filename(expected.imageData)
+    assert _read(image_file) == expected.imageData
+
+    label_file = LabelFile(filename)
+    assert osp.samefile(
+        osp.join(annotated_dir, label_file.imagePath), image_file
+    )
+    assert label_file.imageData == expected.imageData
+    assert label_file.shapes == expected.shapes
+
+
+def test_main(annotated_dir, monkeypatch):
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["labelme_strip_data", annotated_dir, "--jobs", "1"],
+    )
+    strip_data.main()
+    for name, stripped in [
+        ("apc2016_obj3.json", False),
+        ("with_image_file.json", True),
+        ("with_other_image_file.json", False),
+    ]:
+        with open(osp.join(annotated_dir, name)) as f:
+            assert (json.load(f)["imageData"] is None) == stripped
+
+
+def test_strip_label_file_format(annotated_dir, monkeypatch):
+    filename = osp.join(annotated_dir, "with_image_file.json")
+    loads = []
+    json_loads = label_file_module._json_loads
+    monkeypatch.setattr(
+        label_file_module,
+        "_json_loads",
+        lambda data: loads.append(data) or json_loads(data),
+    )
+    assert strip_data.strip(filename, dry_run=True)[0] == "stripped"
+    assert strip_data.strip(filename)[0] == "stripped"
+    assert len(loads) == 2
+
+    # in the format of LabelFile.save
+    with open(filename) as f:
+        data = json.load(f)
+    expected_file = osp.join(annotated_dir, "expected.json")
+    LabelFile._save_json(expected_file, data)
+    assert _read(filename) == _read(expected_file)
@@ -4,6 +4,7 @@ import tempfile
 
 import labelme.app
 import labelme.config
+import labelme.label_file
 import labelme.testing
 
 
@@ -99,6 +100,88 @@ def test_MainWindow_annotate_jpg(qtbot):
     ]
     win.loadLabels(shapes)
     win.saveFile()
+    win.labelWriter.flush()  # written in background
 
     labelme.testing.assert_labelfile_sanity(out_file)
     shutil.rmtree(tmp_dir)
+
+
+def _win_auto_save(qtbot, tmpdir):
+    directory = str(tmpdir.join("raw"))
+    shutil.copytree(osp.join(data_dir, "raw"), directory)
+    config = labelme.config.get_default_config()
+    config["auto_save"] = True
+    config["auto_save_timing"] = dict(idle_ms=50, max_latency_ms=5000)
+    win = labelme.app.MainWindow(config=config, filename=directory)
+    qtbot.addWidget(win)
+    _win_show_and_wait_imageData(qtbot, win)
+    writes = []
+    win.labelWriter.saved.connect(lambda filename, _: writes.append(filename))
+    return win, writes
+
+
+def _edit(win, x):
+    win.loadLabels(
+        [
+            dict(
+                label="whole",
+                group_id=None,
+                points=[(x, 100), (x, 238), (400, 238), (400, 100)],
+                shape_type="polygon",
+                flags={},
+                other_data={},
+            )
+        ]
+    )
+    win.setDirty()
+
+
+def _label_file(win):
+    return osp.splitext(win.imagePath)[0] + ".json"
+
+
+def _saved_x(label_file):
+    label_file = labelme.label_file.LabelFile(label_file)
+    return label_file.shapes[-1]["points"][0][0]
+
+
+def test_MainWindow_autoSave(qtbot, tmpdir):
+    win, writes = _win_auto_save(qtbot, tmpdir)
+
+    # saved once when the edits pause
+    for x in range(100, 120):
+        _edit(win, x)
+        qtbot.wait(5)
+    qtbot.waitUntil(lambda: len(writes) > 0)
+    qtbot.wait(200)
+    win.labelWriter.flush()
+    assert writes == [_label_file(win)]
+    assert not win.dirty
+    assert _saved_x(writes[0]) == 119
+
+    # saved right away before switching or closing the file
+    _edit(win, 130)
+    assert win.mayContinue()
+    assert not win.dirty
+    win.labelWriter.flush()
+    assert len(writes) == 2
+    assert _saved_x(writes[1]) == 130
+
+    _edit(win, 140)
+    label_file = _label_file(win)
+    win.close()
+    assert _saved_x(label_file) == 140
+
+
+def test_MainWindow_autoSave_turned_off(qtbot, tmpdir):
+    win, writes = _win_auto_save(qtbot, tmpdir)
+    win._config["auto_save"] = False
+
+    _edit(win, 100)
+    win.actions.saveAuto.setChecked(False)
+    qtbot.wait(200)
+    win.labelWriter.flush()
+    assert not writes
+    assert win.dirty
+    win.setClean()
+    win.close()
@@ -0,0 +1,97 @@
+import json
+import os
+import os.path as osp
+import shutil
+
+from labelme.dataset_index import DatasetIndex
+from labelme.dataset_index import LabelSummary
+from labelme.dataset_index import UNLABELED
+from labelme.label_file import LabelFile
+
+
+here = osp.dirname(osp.abspath(__file__))
+data_dir = osp.join(here, "data")
+
+
+def _dataset(tmpdir):
+    root = str(tmpdir.join("dataset"))
+    shutil.copytree(osp.join(data_dir, "annotated"), root)
+    image = osp.join(root, "2011_000003.jpg")
+    return root, image, osp.join(root, "2011_000003.json")
+
+
+def _count_loads(monkeypatch):
+    loads = []
+    load_summary = LabelFile.load_summary
+
+    def counting_load_summary(filename):
+        loads.append(filename)
+        return load_summary(filename)
+
+    monkeypatch.setattr(LabelFile, "load_summary", counting_load_summary)
+    return loads
+
+
+def test_DatasetIndex(tmpdir, monkeypatch):
+    root, image, label_file = _dataset(tmpdir)
+    loads = _count_loads(monkeypatch)
+    path = str(tmpdir.join("cache", "index.sqlite3"))
+    index = DatasetIndex(path, root=root)
+    summary = index.summary(image, label_file)
+    assert summary == LabelSummary(
+        True, frozenset(["__ignore__", "bottle", "person"]), 5, 338, 500
+    )
+    assert index.summary(image, label_file) == summary
+    assert loads == [label_file]
+    index.close()
+    assert os.listdir(root) == os.listdir(osp.join(data_dir, "annotated"))
+
+    # reopened, the label file is not read again
+    index = DatasetIndex(path, root=root)
+    assert index.summary(image, label_file) == summary
+    assert loads == [label_file]
+
+    # read again once modified
+    with open(label_file) as f:
+        data = json.load(f)
+    data["shapes"] = data["shapes"][:1]
+    with open(label_file, "w") as f:
+        json.dump(data, f)
+    mtime = os.stat(label_file).st_mtime
+    os.utime(label_file, (mtime + 10, mtime + 10))
+    summary = index.summary(image, label_file)
+    assert summary.shape_count == 1
+    assert summary.labels == frozenset([data["shapes"][0]["label"]])
+    assert len(loads) == 2
+
+    # given by the saver
+    summary = LabelSummary(True, frozenset(["cat"]), 1, 338, 500)
+    index.update(image, label_file, summary=summary)
+    index.close()
+    index = DatasetIndex(path, root=root)
+    assert index.summary(image, label_file) == summary
+    assert len(loads) == 2
+
+    os.remove(label_file)
+    assert index.summary(image, label_file) == UNLABELED
+    index.close()
+
+
+def test_DatasetIndex_cache_path(tmpdir, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmpdir))
+    path = DatasetIndex.cache_path("dataset")
+    assert path == DatasetIndex.cache_path(osp.abspath("dataset"))
+    assert path != DatasetIndex.cache_path("other")
+    assert path.startswith(osp.join(str(tmpdir), "labelme", ""))
+    # the directories are created
+    DatasetIndex(path).close()
+    assert osp.exists(path)
+
+
+def test_DatasetIndex_unwritable(tmpdir):
+    root, image, label_file = _dataset(tmpdir)
+    # the directory of the index is a file
+    path = osp.join(label_file, "index.sqlite3")
+    index = DatasetIndex(path, root=root)
+    assert index.summary(image, label_file).labeled
+    index.close()
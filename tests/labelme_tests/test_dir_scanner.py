@@ -0,0 +1,100 @@
+import os
+import os.path as osp
+
+import pytest
+
+from labelme import dir_scanner
+from labelme.dir_scanner import DirScanner
+from labelme.dir_scanner import scan_images
+
+
+def _touch(filename):
+    if not osp.exists(osp.dirname(filename)):
+        os.makedirs(osp.dirname(filename))
+    open(filename, "w").close()
+
+
+@pytest.fixture
+def image_dir(tmpdir):
+    root = str(tmpdir.join("images"))
+    for name in [
+        "b.jpg",
+        "A.png",
+        "A.json",
+        "c.txt",
+        "sub/d.JPG",
+        "sub/d.json",
+        "sub/deeper/e.jpg",
+        "sub2/f.jpg",
+    ]:
+        _touch(osp.join(root, name))
+    return root
+
+
+def _scan(root, **kwargs):
+    return [
+        (osp.relpath(filename, root), has_label_file)
+        for filename, has_label_file in scan_images(
+            root, [".jpg", ".png"], **kwargs
+        )
+    ]
+
+
+expected = [
+    ("A.png", True),
+    ("b.jpg", False),
+    (osp.join("sub", "d.JPG"), True),
+    (osp.join("sub", "deeper", "e.jpg"), False),
+    (osp.join("sub2", "f.jpg"), False),
+]
+
+
+def test_scan_images(image_dir, monkeypatch):
+    assert _scan(image_dir) == expected
+    # without os.scandir
+    monkeypatch.setattr(dir_scanner, "scandir", None)
+    assert _scan(image_dir) == expected
+
+
+def test_scan_images_output_dir(image_dir, tmpdir):
+    output_dir = str(tmpdir.join("output"))
+    _touch(osp.join(output_dir, "b.json"))
+    _touch(osp.join(output_dir, "e.json"))
+    assert _scan(image_dir, output_dir=output_dir) == [
+        ("A.png", False),
+        ("b.jpg", True),
+        (osp.join("sub", "d.JPG"), False),
+        (osp.join("sub", "deeper", "e.jpg"), True),
+        (osp.join("sub2", "f.jpg"), False),
+    ]
+
+
+def test_scan_images_cancelled(image_dir):
+    assert _scan(image_dir, cancelled=lambda: True) == []
+    found = []
+    for image in scan_images(
+        image_dir, [".jpg", ".png"], cancelled=lambda: len(found) >= 2
+    ):
+        found.append(image)
+    # the directories are not walked anymore once cancelled
+    assert len(found) == 2
+
+
+def test_DirScanner(image_dir):
+    scanner = DirScanner(
+        image_dir, [".jpg", ".png"], batch_size=2, batch_interval=60
+    )
+    batches = []
+    scanner.found.connect(batches.append)
+    scanner.run()  # in this thread
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [
+        (osp.relpath(filename, image_dir), has_label_file)
+        for batch in batches
+        for filename, has_label_file in batch
+    ] == expected
+
+    scanner.cancel()
+    batches = []
+    scanner.run()
+    assert batches == []
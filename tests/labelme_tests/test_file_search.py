@@ -0,0 +1,99 @@
+import os.path as osp
+
+from labelme.file_search import FileSearch
+
+
+filenames = [
+    osp.join("data", "cat", "1.jpg"),
+    osp.join("data", "cat", "2.PNG"),
+    osp.join("data", "dog", "3.jpg"),
+    osp.join("data", "dog and cat", "4.jpg"),
+    osp.join("other", "5.jpg"),
+]
+labels = {0: {"cat"}, 2: {"dog"}, 3: {"cat", "dog"}}
+
+
+def _search(text):
+    search = FileSearch(text)
+    rows = search.filter(
+        filenames,
+        range(len(filenames)),
+        isLabeled=lambda row: row in labels,
+        labelNames=lambda row: labels[row],
+    )
+    return [osp.basename(filenames[row]) for row in rows]
+
+
+def test_FileSearch_empty():
+    for text in ["", "  "]:
+        assert not FileSearch(text)
+        assert _search(text) == ["1.jpg", "2.PNG", "3.jpg", "4.jpg", "5.jpg"]
+
+
+def test_FileSearch_path():
+    assert FileSearch("cat")
+    assert _search("cat") == ["1.jpg", "2.PNG", "4.jpg"]
+    assert _search("cat dog") == ["4.jpg"]
+    assert _search('"dog and"') == ["4.jpg"]
+    assert _search("*.jpg") == ["1.jpg", "3.jpg", "4.jpg", "5.jpg"]
+    assert _search("*.png") == []
+    assert _search(osp.join("dog", "*")) == ["3.jpg"]
+    assert _search(r"re:[0-9]\.(jpg|PNG)$ re:^data") == [
+        "1.jpg",
+        "2.PNG",
+        "3.jpg",
+        "4.jpg",
+    ]
+
+
+def test_FileSearch_labels():
+    assert _search("is:labeled") == ["1.jpg", "3.jpg", "4.jpg"]
+    assert _search("is:unlabeled") == ["2.PNG", "5.jpg"]
+    assert _search("label:cat") == ["1.jpg", "4.jpg"]
+    assert _search("label:cat label:dog") == ["4.jpg"]
+    assert _search("label:bird") == []
+    assert _search("label:cat dog") == ["4.jpg"]
+
+
+def test_FileSearch_negation():
+    assert _search("-cat") == ["3.jpg", "5.jpg"]
+    assert _search("-label:cat") == ["2.PNG", "3.jpg", "5.jpg"]
+    assert _search("is:labeled -label:dog") == ["1.jpg"]
+    assert _search("data -*.jpg") == ["2.PNG"]
+    assert _search("-re:^data") == ["5.jpg"]
+    assert _search("-") == []  # a substring, as in no file
+
+
+def test_FileSearch_error():
+    search = FileSearch("re:( cat")
+    assert search and search.error
+    assert _search("re:( cat") == []
+    # unbalanced quotes while typing
+    assert FileSearch('"dog and').error is None
+
+
+def test_FileSearch_backslash():
+    assert _search(r"re:^data\W\w+\s\w+\scat\W\d\.jpg$") == ["4.jpg"]
+    assert _search(r're:"dog and cat.\d\.jpg"') == ["4.jpg"]
+    assert _search(r"re:\d\.jpg -re:[0-9]\.JPG") == [
+        "1.jpg",
+        "3.jpg",
+        "4.jpg",
+        "5.jpg",
+    ]
+
+    windows_filenames = [r"C:\data\1.jpg", r"C:\data\2.png", r"D:\3.jpg"]
+    for text, expected in [
+        (r"C:\data\*.jpg", [0]),
+        (r"C:\data", [0, 1]),
+        (r'"C:\data\2.png"', [1]),
+    ]:
+        search = FileSearch(text)
+        assert search.error is None
+        rows = search.filter(
+            windows_filenames,
+            range(len(windows_filenames)),
+            isLabeled=lambda row: False,
+            labelNames=lambda row: set(),
+        )
+        assert list(rows) == expected
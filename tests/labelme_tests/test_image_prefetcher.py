@@ -0,0 +1,68 @@
+import os
+import os.path as osp
+import shutil
+
+from labelme.image_prefetcher import ImagePrefetcher
+from labelme.image_prefetcher import load_prefetch_entry
+
+
+here = osp.dirname(osp.abspath(__file__))
+data_dir = osp.join(here, "data")
+
+
+def _items(tmpdir):
+    items = []
+    for name in ["2011_000003", "2011_000006", "2011_000025"]:
+        filename = osp.join(str(tmpdir), name + ".jpg")
+        label_file = osp.join(str(tmpdir), name + ".json")
+        shutil.copy(osp.join(data_dir, "annotated", name + ".jpg"), filename)
+        shutil.copy(
+            osp.join(data_dir, "annotated", name + ".json"), label_file
+        )
+        items.append((filename, label_file))
+    return items
+
+
+def _prefetch(qtbot, prefetcher, items):
+    prefetcher.prefetch(items)
+    qtbot.waitUntil(lambda: not prefetcher._pending)
+
+
+def test_ImagePrefetcher_take(qtbot, tmpdir):
+    a, b, c = _items(tmpdir)
+    prefetcher = ImagePrefetcher(max_cache_bytes=2**30)
+    assert prefetcher.take(*a) is None
+    _prefetch(qtbot, prefetcher, [a, b])
+    entry = prefetcher.take(*a)
+    assert entry.filename == a[0]
+    assert entry.labelFile.imagePath == "2011_000003.jpg"
+    assert not entry.image.isNull()
+    assert prefetcher.take(*c) is None
+
+    prefetcher.invalidate(a[1])
+    assert prefetcher.take(*a) is None
+    assert prefetcher.take(*b) is not None
+
+
+def test_ImagePrefetcher_lru(qtbot, tmpdir):
+    a, b, c = _items(tmpdir)
+    nbytes = max(load_prefetch_entry(*item).nbytes for item in [a, b, c])
+    # room for 2 images
+    prefetcher = ImagePrefetcher(max_cache_bytes=2 * nbytes + nbytes // 2)
+    _prefetch(qtbot, prefetcher, [a, b])
+    prefetcher.take(*a)  # b is now the least recently used
+    _prefetch(qtbot, prefetcher, [c])
+    assert prefetcher.take(*b) is None
+    assert prefetcher.take(*a) is not None
+    assert prefetcher.take(*c) is not None
+
+
+def test_ImagePrefetcher_label_file_modified(qtbot, tmpdir):
+    a, b, c = _items(tmpdir)
+    prefetcher = ImagePrefetcher(max_cache_bytes=2**30)
+    _prefetch(qtbot, prefetcher, [a, b])
+    mtime = osp.getmtime(a[1])
+    os.utime(a[1], (mtime + 10, mtime + 10))
+    os.remove(b[1])
+    assert prefetcher.take(*a) is None
+    assert prefetcher.take(*b) is None
@@ -0,0 +1,58 @@
+import numpy as np
+from qtpy import QtCore
+from qtpy import QtGui
+
+from labelme.image_pyramid import ImagePyramid
+
+
+def _image_to_array(image):
+    image = image.convertToFormat(QtGui.QImage.Format_RGB32)
+    ptr = image.constBits()
+    ptr.setsize(image.byteCount())
+    arr = np.array(ptr).reshape(image.height(), image.bytesPerLine() // 4, 4)
+    # BGRA in memory
+    return arr[:, : image.width(), 2::-1].astype(float)
+
+
+def test_ImagePyramid_tile(qtbot):
+    height, width = 300, 500
+    y, x = np.mgrid[:height, :width]
+    arr = np.dstack([x * 255 // width, y * 255 // height, (x + y) % 256])
+    arr = arr.astype(np.uint8)
+    image = QtGui.QImage(
+        arr.tobytes(), width, height, width * 3, QtGui.QImage.Format_RGB888
+    )
+    pixmap = QtGui.QPixmap.fromImage(image)
+    pyramid = ImagePyramid(pixmap, tile_size=64)
+
+    for level in range(pyramid.max_level + 1):
+        factor = 2 ** level
+        expected = _image_to_array(
+            image.scaled(
+                int(np.ceil(width / factor)),
+                int(np.ceil(height / factor)),
+                transformMode=QtCore.Qt.SmoothTransformation,
+            )
+        )
+        extent = 64 * factor
+        for row in range(int(np.ceil(height / extent))):
+            for col in range(int(np.ceil(width / extent))):
+                rect = pyramid.tileRect(level, col, row)
+                tile = _image_to_array(pyramid.tile(level, col, row).toImage())
+                assert tile.shape[:2] == (
+                    int(np.ceil(rect.height() / factor)),
+                    int(np.ceil(rect.width() / factor)),
+                )
+                if level == 0:
+                    y1, x1 = rect.y(), rect.x()
+                    assert (
+                        tile == arr[y1 : y1 + 64, x1 : x1 + 64]
+                    ).all()
+                    continue
+                # scaled by 2 at each level vs directly, which differ most
+                # on the few pixels of the coarsest levels
+                y1, x1 = row * 64, col * 64
+                diff = np.abs(
+                    tile[..., :2] - expected[y1 : y1 + 64, x1 : x1 + 64, :2]
+                )
+                assert diff.mean() < 6
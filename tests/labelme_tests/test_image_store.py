@@ -0,0 +1,39 @@
+import hashlib
+import os
+import os.path as osp
+
+from labelme.image_store import ImageStore
+
+
+here = osp.dirname(osp.abspath(__file__))
+data_dir = osp.join(here, "data")
+
+
+def _read(filename):
+    with open(filename, "rb") as f:
+        return f.read()
+
+
+def test_ImageStore(tmpdir):
+    root = str(tmpdir.join("store"))
+    store = ImageStore(root)
+    image_data = _read(osp.join(data_dir, "raw/2011_000003.jpg"))
+
+    filename = store.filename(image_data)
+    digest = hashlib.sha256(image_data).hexdigest()
+    assert filename == osp.join(root, digest[:2], digest + ".jpg")
+    assert not osp.exists(root)
+
+    assert store.add(image_data) == filename
+    assert _read(filename) == image_data
+    mtime = os.stat(filename).st_mtime
+    # stored once
+    assert store.add(image_data) == filename
+    assert os.stat(filename).st_mtime == mtime
+    assert ImageStore(root).add(image_data) == filename
+    assert os.listdir(osp.dirname(filename)) == [osp.basename(filename)]
+
+    other_image_data = _read(osp.join(data_dir, "raw/2011_000006.jpg"))
+    other_filename = store.add(other_image_data)
+    assert other_filename != filename
+    assert _read(other_filename) == other_image_data
@@ -0,0 +1,96 @@
+import glob
+import os
+import os.path as osp
+
+import pytest
+
+from labelme import label_file as label_file_module
+from labelme.label_file import LabelFile
+from labelme.label_file import LabelFileError
+from labelme.label_file import save_atomic
+
+
+here = osp.dirname(osp.abspath(__file__))
+data_dir = osp.join(here, "data")
+
+
+def _label_files():
+    return sorted(glob.glob(osp.join(data_dir, "annotated*/*.json")))
+
+
+def test_load_lazy():
+    for filename in _label_files():
+        label_file = LabelFile(filename)
+        lazy_label_file = LabelFile(filename, lazy=True)
+        assert lazy_label_file.imagePath == label_file.imagePath
+        assert lazy_label_file.shapes == label_file.shapes
+        assert lazy_label_file.imageData == label_file.imageData
+
+
+def test_load_lazy_error(tmpdir):
+    filename = osp.join(str(tmpdir), "label.json")
+    with open(filename, "w") as f:
+        f.write(
+            '{"shapes": [], "imagePath": "missing.jpg", "imageData": null}'
+        )
+    with pytest.raises(LabelFileError):
+        LabelFile(filename)
+    label_file = LabelFile(filename, lazy=True)
+    assert label_file.imagePath == "missing.jpg"
+    assert label_file.shapes == []
+    with pytest.raises(LabelFileError):
+        label_file.imageData
+
+
+def test_load_json_backend(monkeypatch):
+    for filename in _label_files():
+        label_file = LabelFile(filename)
+        monkeypatch.setattr(
+            label_file_module,
+            "_json_loads",
+            label_file_module._json_loads_stdlib,
+        )
+        assert LabelFile(filename).shapes == label_file.shapes
+        monkeypatch.undo()
+
+
+def test_load_save_without_decoding(monkeypatch, tmpdir):
+    import PIL.ImageFile
+
+    def load(self):
+        raise AssertionError("the image pixels must not be decoded")
+
+    # only the image headers are needed for imageHeight and imageWidth
+    monkeypatch.setattr(PIL.ImageFile.ImageFile, "load", load)
+    for filename in _label_files():
+        label_file = LabelFile(filename)
+        assert label_file.imageData
+        out_file = osp.join(str(tmpdir), osp.basename(filename))
+        label_file.save(
+            filename=out_file,
+            shapes=label_file.shapes,
+            imagePath=label_file.imagePath,
+            imageData=label_file.imageData,
+            imageHeight=None,
+            imageWidth=None,
+        )
+        assert LabelFile(out_file).imageData == label_file.imageData
+
+
+def test_save_atomic(tmpdir):
+    filename = osp.join(str(tmpdir), "label.json")
+
+    def save(tmp_filename, content):
+        assert osp.splitext(tmp_filename)[1] == ".json"
+        with open(tmp_filename, "w") as f:
+            f.write(content)
+        if content == "partial":
+            raise IOError("interrupted")
+
+    save_atomic(filename, lambda f: save(f, "saved"))
+    save_atomic(filename, lambda f: save(f, "replaced"))
+    with pytest.raises(IOError):
+        save_atomic(filename, lambda f: save(f, "partial"))
+    with open(filename) as f:
+        assert f.read() == "replaced"
+    assert os.listdir(str(tmpdir)) == ["label.json"]
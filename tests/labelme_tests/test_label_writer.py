@@ -0,0 +1,42 @@
+import json
+import os
+import os.path as osp
+
+from labelme.label_writer import LabelWriter
+
+
+def test_LabelWriter(qtbot, tmpdir):
+    writer = LabelWriter()
+    saved = []
+    failed = []
+    writer.saved.connect(lambda filename, context: saved.append(context))
+    writer.failed.connect(lambda filename, error: failed.append(filename))
+
+    filename = osp.join(str(tmpdir), "label.json")
+    for i in range(10):
+        writer.save(
+            filename,
+            context=i,
+            shapes=[],
+            imagePath="image.jpg",
+            imageHeight=i,
+            imageWidth=i,
+        )
+    writer.flush()
+    assert not writer.isPending(filename)
+    # saved at least once, with the latest data
+    assert saved and saved[-1] == 9
+    with open(filename) as f:
+        assert json.load(f)["imageHeight"] == 9
+    assert os.listdir(str(tmpdir)) == ["label.json"]
+
+    missing = osp.join(str(tmpdir), "missing", "label.json")
+    writer.save(
+        missing,
+        shapes=[],
+        imagePath="image.jpg",
+        imageHeight=1,
+        imageWidth=1,
+    )
+    writer.flush()
+    assert failed == [missing]
@@ -0,0 +1,143 @@
+import numpy as np
+from qtpy import QtCore
+
+from labelme.shape import Shape
+from labelme import utils
+
+
+def _shape(points):
+    shape = Shape(shape_type="polygon")
+    shape.points = [QtCore.QPointF(x, y) for x, y in points]
+    return shape
+
+
+def test_Shape_points():
+    shape = _shape([(0, 0), (10, 0), (10, 10)])
+    points = shape.points
+    assert len(points) == 3
+    assert points == [
+        QtCore.QPointF(0, 0),
+        QtCore.QPointF(10, 0),
+        QtCore.QPointF(10, 10),
+    ]
+    assert points[-1] == QtCore.QPointF(10, 10)
+    assert [p.x() for p in points] == [0, 10, 10]
+    assert shape.boundingRect() == QtCore.QRectF(0, 0, 10, 10)
+
+    # changes write through and invalidate the cached paths
+    points[1] = QtCore.QPointF(20, 0)
+    points.append(QtCore.QPointF(0, 30))
+    assert shape.boundingRect() == QtCore.QRectF(0, 0, 20, 30)
+    points.insert(0, QtCore.QPointF(-5, -5))
+    del points[-1]
+    assert shape.pointsArray().tolist() == [
+        [-5, -5],
+        [0, 0],
+        [20, 0],
+        [10, 10],
+    ]
+    points[1:3] = [QtCore.QPointF(1, 1)]
+    del points[:1]
+    assert shape.pointsArray().tolist() == [[1, 1], [10, 10]]
+
+    other = _shape([])
+    other.points = shape.points
+    assert other.points == shape.points
+    other.points[0] = QtCore.QPointF(2, 2)
+    assert other.points != shape.points
+
+
+def test_Shape_copy():
+    shape = _shape([(0, 0), (10, 0), (10, 10)])
+    path = shape.makePath()
+    copied = shape.copy()
+    assert copied.makePath() is path  # cached paths are shared
+    copied.moveBy(QtCore.QPointF(5, 5))
+    assert copied.makePath() is not path
+    assert shape.makePath() is path
+    assert copied.boundingRect() == QtCore.QRectF(5, 5, 10, 10)
+    assert shape.boundingRect() == QtCore.QRectF(0, 0, 10, 10)
+    assert np.array_equal(
+        copied.pointsArray() - shape.pointsArray(), np.full((3, 2), 5)
+    )
+
+
+def test_Shape_rotatePolygon():
+    shape = _shape([(0, 0), (20, 0), (20, 10)])
+    shape.startRotatePolygon()
+    assert shape.rotating_center == (10, 5)
+    shape.rotatePolygon(True, 180)
+    assert shape.pointsArray().tolist() == [[20, 10], [0, 10], [0, 0]]
+    # from the points at the start, not the rotated ones
+    shape.rotatePolygon(False, 90)
+    assert shape.pointsArray().tolist() == [[5, 15], [5, -5], [15, -5]]
+    shape.rotatePolygon(True, 0)
+    assert shape.pointsArray().tolist() == [[0, 0], [20, 0], [20, 10]]
+
+
+def test_Shape_resizing_basicshape():
+    inner_points = np.array([[0, 0], [10, 0], [5, 10]], dtype=float)
+    shape = Shape(shape_type="polygon")
+    shape.start_resizing_basicshape(inner_points)
+    shape.points = [QtCore.QPointF(100, 100), QtCore.QPointF(120, 140)]
+    shape.updateInnerPoints()
+    shape.stop_resizing_basicshape()
+    assert shape.shape_type == "polygon"
+    assert shape.pointsArray().tolist() == [[100, 100], [120, 100], [110, 140]]
+    assert shape.resizing_box_points == [
+        QtCore.QPointF(100, 100),
+        QtCore.QPointF(120, 140),
+    ]
+
+    # started again from the corner of the resize box
+    shape.start_resizing_basicshape()
+    assert shape.shape_type == "resizingshape"
+    assert shape.pointsArray().tolist() == [[100, 100]]
+
+
+def _nearestVertex(shape, point, epsilon):
+    # Shape.nearestVertex before it was vectorized
+    min_distance = float("inf")
+    min_i = None
+    for i, p in enumerate(shape.points):
+        dist = utils.distance(p - point)
+        if dist <= epsilon and dist < min_distance:
+            min_distance = dist
+            min_i = i
+    return min_i
+
+
+def _nearestEdge(shape, point, epsilon):
+    # Shape.nearestEdge before it was vectorized
+    min_distance = float("inf")
+    post_i = None
+    for i in range(len(shape.points)):
+        line = [shape.points[i - 1], shape.points[i]]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dist = utils.distancetoline(point, line)
+        if dist <= epsilon and dist < min_distance:
+            min_distance = dist
+            post_i = i
+    return post_i
+
+
+def test_Shape_nearestVertex_nearestEdge():
+    random = np.random.RandomState(0)
+    for _ in range(50):
+        # on a small grid, for vertices at the same place (zero-length
+        # edges) and points at the same distance of several of them
+        num_points = random.randint(1, 8)
+        shape = _shape(random.randint(0, 6, (num_points, 2)).tolist())
+        if random.uniform() < 0.5:
+            shape.close()
+        for _ in range(10):
+            # also beyond the ends of the edges
+            x, y = random.randint(-4, 20, 2) / 2.0
+            point = QtCore.QPointF(x, y)
+            for epsilon in [0, 1, 100]:
+                assert shape.nearestVertex(point, epsilon) == _nearestVertex(
+                    shape, point, epsilon
+                )
+                assert shape.nearestEdge(point, epsilon) == _nearestEdge(
+                    shape, point, epsilon
+                )
@@ -0,0 +1,61 @@
+from qtpy import QtCore
+
+from labelme.shape import Shape
+from labelme.shape_history import AddShapes
+from labelme.shape_history import RemoveShapes
+from labelme.widgets.canvas import Canvas
+
+
+def _shape(x):
+    shape = Shape(label=str(x), shape_type="rectangle")
+    shape.points = [QtCore.QPointF(x, 0), QtCore.QPointF(x + 10, 10)]
+    return shape
+
+
+def test_ShapeHistory(qtbot):
+    canvas = Canvas(num_backups=3)
+    a, b, c = _shape(0), _shape(20), _shape(40)
+
+    # e.g. the shapes kept from the previous image
+    canvas.loadShapes([a], replace=False)
+    assert canvas.restoreShape() is not None
+    assert canvas.shapes == []
+    canvas.redoShape()
+    assert canvas.shapes == [a]
+    canvas.loadShapes([a])
+    assert canvas.shapesHistory.canUndo() and not canvas.isShapeRedoable
+
+    canvas.beginShapesEdit([a])
+    a.moveBy(QtCore.QPointF(5, 0))
+    assert canvas.endShapesEdit()
+    canvas.restoreShape()
+    assert a.pointsArray().tolist() == [[0, 0], [10, 10]]
+    canvas.redoShape()
+    assert a.pointsArray().tolist() == [[5, 0], [15, 10]]
+
+    canvas.insertShapes([(1, b), (2, c)])
+    canvas.shapesHistory.push(AddShapes([(1, b), (2, c)]))
+    canvas.removeShapes([a, c])
+    canvas.shapesHistory.push(RemoveShapes([(0, a), (2, c)]))
+    assert canvas.shapes == [b]
+    canvas.restoreShape()
+    assert canvas.shapes == [a, b, c]
+    assert canvas.shapeIndex.query(QtCore.QPointF(45, 5)) == [c]
+    canvas.restoreShape()
+    assert canvas.shapes == [a]
+
+    # only the last num_backups edits are kept
+    canvas.restoreShape()
+    assert not canvas.isShapeRestorable
+    assert a.pointsArray().tolist() == [[0, 0], [10, 10]]
+    for _ in range(3):
+        canvas.redoShape()
+    assert canvas.shapes == [b]
+    assert not canvas.isShapeRedoable
+
+    # a new edit drops the redo stack
+    canvas.restoreShape()
+    canvas.loadShapes([c, b, a])
+    assert not canvas.isShapeRedoable
+    canvas.restoreShape()
+    assert canvas.shapes == [a, b, c]
@@ -0,0 +1,76 @@
+import numpy as np
+from qtpy import QtCore
+
+from labelme.shape import Shape
+from labelme.shape_index import ShapeIndex
+
+
+def _random_shape(random_state):
+    shape = Shape(shape_type="polygon")
+    center = random_state.uniform(0, 1000, size=2)
+    # a few shapes spanning more than max_cells cells
+    size = random_state.choice([5, 50, 500], p=[0.45, 0.45, 0.1])
+    shape.points = center + random_state.uniform(-size, size, size=(4, 2))
+    return shape
+
+
+def _intersects(rect1, rect2):
+    return (
+        rect1.left() <= rect2.right()
+        and rect2.left() <= rect1.right()
+        and rect1.top() <= rect2.bottom()
+        and rect2.top() <= rect1.bottom()
+    )
+
+
+def _check_queries(index, shapes, random_state):
+    margin = 3
+    for x, y in random_state.uniform(-10, 1010, size=(200, 2)):
+        point = QtCore.QPointF(x, y)
+        expected = [
+            shape
+            for shape in reversed(shapes)
+            if shape.boundingRect()
+            .adjusted(-margin, -margin, margin, margin)
+            .contains(point)
+        ]
+        assert index.query(point, margin=margin) == expected
+
+        rect = QtCore.QRectF(x, y, *random_state.uniform(0, 200, size=2))
+        expected = [
+            shape
+            for shape in shapes
+            if _intersects(
+                shape.boundingRect().adjusted(
+                    -margin, -margin, margin, margin
+                ),
+                rect,
+            )
+        ]
+        assert index.queryRect(rect, margin=margin) == expected
+
+
+def test_ShapeIndex():
+    random_state = np.random.RandomState(0)
+    shapes = [_random_shape(random_state) for _ in range(300)]
+    index = ShapeIndex(cell_size=32, max_cells=64)
+    index.rebuild(shapes)
+    assert len(index) == len(shapes)
+    _check_queries(index, shapes, random_state)
+
+    for shape in shapes[::3]:
+        shape.moveBy(QtCore.QPointF(*random_state.uniform(-100, 100, 2)))
+        index.update(shape)
+    _check_queries(index, shapes, random_state)
+
+    for shape in shapes[1::3]:
+        index.remove(shape)
+        assert shape not in index
+    shapes = [shape for shape in shapes if shape in index]
+    shape = _random_shape(random_state)
+    shapes.append(shape)
+    index.insert(shape)
+    _check_queries(index, shapes, random_state)
+
+    index.update(Shape())  # not indexed
+    assert len(index) == len(shapes)
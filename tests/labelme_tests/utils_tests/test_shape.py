@@ -1,5 +1,12 @@
+import base64
+import math
+import os.path as osp
+
+import numpy as np
+
 from .util import get_img_and_data
 
+from labelme.label_file import LabelFile
 from labelme.utils import shape as shape_module
 
 
@@ -22,3 +29,227 @@ def test_shape_to_mask():
         points = shape["points"]
         mask = shape_module.shape_to_mask(img.shape[:2], points)
         assert mask.shape == img.shape[:2]
+
+
+def _random_shapes(img_shape, num_shapes, seed=0):
+    # of every type, some partly or fully outside of the image
+    random = np.random.RandomState(seed)
+    height, width = img_shape
+    shape_types = ["polygon", "rectangle", "circle", "line"]
+    shape_types += ["linestrip", "point", "mask"]
+    shapes = []
+    for i in range(num_shapes):
+        shape_type = shape_types[i % len(shape_types)]
+        cx = random.uniform(-20, width + 20)
+        cy = random.uniform(-20, height + 20)
+        r = random.uniform(1, 40)
+        mask = None
+        if shape_type == "polygon":
+            angles = np.sort(random.uniform(0, 2 * math.pi, 6))
+            points = np.c_[cx + r * np.cos(angles), cy + r * np.sin(angles)]
+        elif shape_type == "rectangle":
+            points = [[cx - r, cy - r / 2], [cx + r, cy + r / 2]]
+        elif shape_type == "circle":
+            points = [[cx, cy], [cx + r, cy]]
+        elif shape_type in ["line", "linestrip"]:
+            num_points = 2 if shape_type == "line" else 4
+            points = np.c_[cx, cy] + random.uniform(-r, r, (num_points, 2))
+        elif shape_type == "point":
+            points = [[cx, cy]]
+        else:
+            mask = random.uniform(size=(int(r), int(r) + 3)) < 0.5
+            x1, y1 = int(cx), int(cy)
+            points = [
+                [x1, y1],
+                [x1 + mask.shape[1] - 1, y1 + mask.shape[0] - 1],
+            ]
+        shapes.append(
+            dict(
+                points=np.asarray(points, dtype=float).tolist(),
+                shape_type=shape_type,
+                mask=mask,
+            )
+        )
+    return shapes
+
+
+def _shape_to_mask(img_shape, shape):
+    return shape_module.shape_to_mask(
+        img_shape, shape["points"], shape["shape_type"], mask=shape["mask"]
+    )
+
+
+def test_shape_to_cropped_mask():
+    img_shape = (120, 160)
+    for shape in _random_shapes(img_shape, 300):
+        expected = _shape_to_mask(img_shape, shape)
+        mask, bbox = shape_module.shape_to_cropped_mask(
+            img_shape, shape["points"], shape["shape_type"], mask=shape["mask"]
+        )
+        ys, xs = np.where(expected)
+        if ys.size == 0:
+            assert mask.size == 0
+            assert bbox == (0, 0, 0, 0)
+            continue
+        # cropped to the pixels of the shape
+        assert bbox == (ys.min(), xs.min(), ys.max() + 1, xs.max() + 1)
+        y1, x1, y2, x2 = bbox
+        np.testing.assert_array_equal(mask, expected[y1:y2, x1:x2])
+
+
+def test_shapes_to_masks():
+    img_shape = (120, 160)
+    shapes = _random_shapes(img_shape, 100)
+    masks = shape_module.shapes_to_masks(img_shape, shapes)
+    assert masks.shape == (len(shapes),) + img_shape
+    for mask, shape in zip(masks, shapes):
+        np.testing.assert_array_equal(mask, _shape_to_mask(img_shape, shape))
+    assert (
+        shape_module.shapes_to_masks(img_shape, []).shape == (0,) + img_shape
+    )
+
+
+def test_shape_bbox():
+    img_shape = (120, 160)
+    for shape in _random_shapes(img_shape, 300):
+        y1, x1, y2, x2 = shape_module.shape_bbox(
+            shape["points"], shape["shape_type"]
+        )
+        ys, xs = np.where(_shape_to_mask(img_shape, shape))
+        if ys.size == 0:
+            continue
+        # the pixels drawn for the rounded coordinates
+        assert math.floor(y1) - 1 <= ys.min() and ys.max() <= y2 + 1
+        assert math.floor(x1) - 1 <= xs.min() and xs.max() <= x2 + 1
+
+
+def test_shape_area():
+    img_shape = (120, 160)
+    for shape in _random_shapes(img_shape, 300, seed=1):
+        area = shape_module.shape_area(
+            shape["points"], shape["shape_type"], mask=shape["mask"]
+        )
+        mask = _shape_to_mask(img_shape, shape)
+        if shape["shape_type"] == "mask":
+            assert area == np.count_nonzero(shape["mask"])
+            # the same for its RLE
+            rle = shape_module.mask_to_rle(shape["mask"])
+            assert shape_module.shape_area(None, "mask", mask=rle) == area
+            continue
+        if shape["shape_type"] in ["line", "linestrip", "point"]:
+            assert area == 0
+            continue
+        y1, x1, y2, x2 = shape_module.shape_bbox(
+            shape["points"], shape["shape_type"]
+        )
+        inside = (
+            y1 >= 0 and x1 >= 0 and y2 < img_shape[0] and x2 < img_shape[1]
+        )
+        if not inside or area < 400:
+            continue
+        # the outline pixels are drawn too
+        assert area <= np.count_nonzero(mask) <= area * 1.15
+
+
+def _masks_to_bboxes_where(masks):
+    bboxes = np.zeros((len(masks), 4), dtype=np.float32)
+    for i, mask in enumerate(masks):
+        ys, xs = np.where(mask)
+        if ys.size:
+            bboxes[i] = ys.min(), xs.min(), ys.max() + 1, xs.max() + 1
+    return bboxes
+
+
+def test_masks_to_bboxes():
+    random = np.random.RandomState(0)
+    masks = np.zeros((20, 30, 40), dtype=bool)
+    for mask in masks[:12]:
+        y1, y2 = np.sort(random.randint(0, 31, 2))
+        x1, x2 = np.sort(random.randint(0, 41, 2))
+        mask[y1:y2, x1:x2] = random.uniform(size=(y2 - y1, x2 - x1)) < 0.3
+    masks[12, 0, 0] = True
+    masks[13, -1, -1] = True
+    masks[14, 5, 39] = True
+    masks[15] = True
+    # and empty masks
+    masks = masks[random.permutation(len(masks))]
+
+    expected = _masks_to_bboxes_where(masks)
+    for chunk_size in [None, 1, 3, 7, 20, 100]:
+        bboxes = shape_module.masks_to_bboxes(masks, chunk_size=chunk_size)
+        assert bboxes.dtype == np.float32
+        np.testing.assert_array_equal(bboxes, expected)
+
+    for chunk_size in [None, 4]:
+        bboxes = shape_module.masks_to_bboxes(masks[:0], chunk_size=chunk_size)
+        assert bboxes.shape == (0, 4)
+
+
+def test_mask_to_rle_round_trip():
+    random = np.random.RandomState(0)
+    masks = [random.uniform(size=(30, 40)) < p for p in [0.05, 0.5, 0.95]]
+    masks += [np.zeros((30, 40), dtype=bool), np.ones((30, 40), dtype=bool)]
+    for y, x in [(0, 0), (29, 39), (12, 0), (0, 39)]:
+        mask = np.zeros((30, 40), dtype=bool)
+        mask[y, x] = True
+        masks.append(mask)
+    masks += [np.ones((1, 1), dtype=bool), np.zeros((0, 0), dtype=bool)]
+    for mask in masks:
+        rle = shape_module.mask_to_rle(mask)
+        assert rle["size"] == list(mask.shape)
+        np.testing.assert_array_equal(shape_module.rle_to_mask(rle), mask)
+
+
+def test_mask_to_rle_coco():
+    # encoded by pycocotools.mask.encode
+    mask1 = np.zeros((4, 5), dtype=bool)
+    mask1[1:3, 1:4] = True
+    mask2 = np.zeros((50, 3), dtype=bool)
+    mask2[5:45, 0] = True
+    mask2[20:22, 1] = True
+    mask2[:, 2] = True
+    for mask, counts, uncompressed_counts in [
+        (mask1, "5220003", [5, 2, 2, 2, 2, 2, 5]),
+        (mask2, "5X1i0jN3`1", [5, 40, 25, 2, 28, 50]),
+        (np.zeros((3, 3), dtype=bool), "9", [9]),
+        (np.ones((3, 3), dtype=bool), "09", [0, 9]),
+        (np.ones((1, 1), dtype=bool), "01", [0, 1]),
+    ]:
+        rle = shape_module.mask_to_rle(mask)
+        assert rle == dict(size=list(mask.shape), counts=counts)
+        for rle_counts in [counts, counts.encode(), uncompressed_counts]:
+            rle = dict(size=list(mask.shape), counts=rle_counts)
+            np.testing.assert_array_equal(shape_module.rle_to_mask(rle), mask)
+
+
+def test_mask_shape_label_file(tmpdir):
+    img, data = get_img_and_data()
+    mask = np.zeros((30, 40), dtype=bool)
+    mask[5:25, 10:30] = True
+    mask[10:15, 15:20] = False
+    shape = dict(
+        label="mask",
+        points=[[10, 20], [49, 49]],
+        group_id=None,
+        shape_type="mask",
+        flags={},
+        mask=mask,
+    )
+    filename = osp.join(str(tmpdir), "label.json")
+    LabelFile().save(
+        filename,
+        shapes=data["shapes"] + [shape],
+        imagePath=data["imagePath"],
+        imageHeight=img.shape[0],
+        imageWidth=img.shape[1],
+        imageData=base64.b64decode(data["imageData"]),
+    )
+    with open(filename) as f:
+        assert '"counts": "' in f.read()
+
+    label_file = LabelFile(filename)
+    assert len(label_file.shapes) == len(data["shapes"]) + 1
+    loaded = label_file.shapes[-1]
+    np.testing.assert_array_equal(loaded.pop("mask"), mask)
+    shape.pop("mask")
+    assert loaded == dict(shape, other_data={})
@@ -0,0 +1,67 @@
+from qtpy.QtCore import Qt
+
+from labelme.file_search import FileSearch
+from labelme.widgets import FileListWidget
+
+
+filenames = ["a/1.jpg", "a/2.png", "b/3.jpg", "b/4.jpg"]
+
+
+def test_FileListWidget(qtbot):
+    hasLabelFile_calls = []
+
+    def hasLabelFile(filename):
+        hasLabelFile_calls.append(filename)
+        return filename == "b/3.jpg"
+
+    labels = {"a/2.png": {"cat"}, "b/3.jpg": {"dog"}}
+    widget = FileListWidget(
+        hasLabelFile=hasLabelFile,
+        labelNames=lambda filename: labels.get(filename, set()),
+    )
+    qtbot.addWidget(widget)
+    model = widget.model()
+
+    widget.addFiles(filenames[:2], checked=[False, True])
+    widget.addFiles(filenames)  # the listed ones are not added again
+    assert widget.filenames() == filenames
+    assert [widget.row(filename) for filename in filenames] == [0, 1, 2, 3]
+    assert widget.row("c/5.jpg") == -1
+    assert "b/4.jpg" in widget
+
+    # checked when given, else looked up once when needed
+    assert hasLabelFile_calls == []
+    assert [widget.isChecked(filename) for filename in filenames] == [
+        False,
+        True,
+        True,
+        False,
+    ]
+    assert model.data(model.index(2), Qt.CheckStateRole) == Qt.Checked
+    assert model.data(model.index(2)) == "b/3.jpg"
+    widget.isChecked("b/3.jpg")
+    assert hasLabelFile_calls == ["b/3.jpg", "b/4.jpg"]
+
+    changed = []
+    model.dataChanged.connect(lambda first, last: changed.append(first.row()))
+    widget.setChecked("b/4.jpg", True)
+    assert changed == [3]
+    assert widget.isChecked("b/4.jpg")
+
+    widget.setCurrentRow(1)
+    widget.setSearch(FileSearch("is:labeled"))
+    assert widget.filenames() == ["a/2.png", "b/3.jpg", "b/4.jpg"]
+    assert widget.row("a/1.jpg") == -1
+    assert widget.row("b/3.jpg") == 1
+    assert widget.currentRow() == 0  # still a/2.png
+    # added files are filtered as well
+    widget.addFiles(["c/5.jpg", "c/6.jpg"], checked=[False, True])
+    assert widget.filenames()[-1] == "c/6.jpg"
+    assert widget.count() == 4
+
+    widget.setSearch(FileSearch("label:dog"))
+    assert widget.filenames() == ["b/3.jpg"]
+    widget.setSearch(None)
+    assert widget.count() == 6
+    widget.clear()
+    assert widget.count() == 0